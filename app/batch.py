@@ -0,0 +1,306 @@
+"""
+Análisis por lotes de reportes Lighthouse desde la línea de comandos.
+
+Lee todos los reportes de un directorio (o de un patrón glob), los parsea y
+preprocesa en un pool de procesos y los resume con un pool asíncrono acotado de
+llamadas al modelo. Por cada reporte escribe un archivo Markdown con el resumen y
+el resumen determinista, y añade una línea a results.jsonl. Ese archivo sirve
+también de checkpoint: al relanzar el comando se saltan los reportes que ya
+terminaron bien y no han cambiado.
+
+Uso:
+    uv run python app/batch.py reports/ --out batch-output
+    uv run python app/batch.py "reports/**/*.json" --workers 8 --llm-concurrency 4
+    uv run python app/batch.py reports/ --strategy digest   # sin llamadas al modelo
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Paquetes de la raíz del repositorio (rag/)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.cache import get_summary_cache
+from core.chunking import chunk_report
+from core.digest import build_report_digest, rank_failing_audits
+from core.model import (
+    FALLBACK_SUMMARY_PREFIX,
+    report_summary_cache_key,
+    summarize_preprocessed_report,
+)
+from core.ratelimit import TokenRateLimiter
+from core.report_io import load_preprocessed_report
+from core.tokens import count_tokens
+
+RESULTS_FILE = "results.jsonl"
+REPORTS_DIR = "reports"
+
+_UNSAFE_CHARS_RE = re.compile(r"[^\w.-]+")
+
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    cached: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+
+def collect_report_paths(source: str) -> list[Path]:
+    """Archivos .json de un directorio (recursivo) o que coinciden con un glob."""
+    path = Path(source)
+    if path.is_dir():
+        paths = path.rglob("*.json")
+    else:
+        paths = (Path(p) for p in glob.glob(source, recursive=True))
+    return sorted(p for p in paths if p.is_file())
+
+
+def load_checkpoint(results_path: Path) -> dict[str, dict]:
+    """Resultados correctos de una ejecución anterior, por ruta del reporte."""
+    done = {}
+    if not results_path.exists():
+        return done
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Última línea cortada por una interrupción
+                continue
+            if record.get("status") == "ok":
+                done[record["path"]] = record
+    return done
+
+
+def _file_signature(path: Path) -> dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _load_report(path: str) -> tuple[dict, str]:
+    """Parsea y preprocesa un reporte (se ejecuta en el pool de procesos)."""
+    data = Path(path).read_bytes()
+    processed, _ = load_preprocessed_report(data)
+    return processed, hashlib.sha256(data).hexdigest()
+
+
+def _report_file_name(path: Path, sha256: str) -> str:
+    return f"{_UNSAFE_CHARS_RE.sub('_', path.stem)}-{sha256[:8]}.md"
+
+
+def _write_report_file(target: Path, path: Path, processed: dict, summary: str | None) -> None:
+    parts = [f"# {path.name}", ""]
+    if summary is not None:
+        parts += ["## Resumen", "", summary, ""]
+    parts += ["## Resumen determinista", "", build_report_digest(processed), ""]
+    target.write_text("\n".join(parts), encoding="utf-8")
+
+
+async def run_batch(
+    paths: list[Path],
+    out_dir: Path,
+    workers: int | None = None,
+    llm_concurrency: int = 4,
+    strategy: str = "llm",
+    resume: bool = True,
+    tokens_per_minute: int | None = None,
+) -> BatchStats:
+    """
+    Procesa los reportes y escribe los resultados en out_dir.
+
+    Args:
+        paths: Reportes a procesar
+        out_dir: Directorio de salida (results.jsonl y reports/)
+        workers: Procesos para parsear y preprocesar (por defecto, uno por CPU)
+        llm_concurrency: Reportes que se resumen a la vez con el modelo
+        strategy: "llm" o "digest" (solo el resumen determinista)
+        resume: Saltar los reportes ya procesados según results.jsonl
+        tokens_per_minute: Límite de tokens por minuto compartido por todo el lote
+    """
+    reports_dir = out_dir / REPORTS_DIR
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    results_path = out_dir / RESULTS_FILE
+
+    done = load_checkpoint(results_path) if resume else {}
+    if not resume and results_path.exists():
+        results_path.unlink()
+
+    stats = BatchStats(total=len(paths))
+    pending = []
+    for path in paths:
+        previous = done.get(str(path))
+        if previous is not None and all(
+            previous.get(key) == value for key, value in _file_signature(path).items()
+        ):
+            stats.skipped += 1
+        else:
+            pending.append(path)
+
+    loop = asyncio.get_running_loop()
+    cache = get_summary_cache()
+    rate_limiter = TokenRateLimiter(tokens_per_minute) if tokens_per_minute else None
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+    # Acota los reportes preprocesados que esperan turno en memoria
+    in_flight = asyncio.Semaphore((workers or os.cpu_count() or 1) + 2 * llm_concurrency)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(
+        results_path, "a", encoding="utf-8"
+    ) as results:
+
+        async def process(path: Path) -> None:
+            record = {"path": str(path), **_file_signature(path)}
+            async with in_flight:
+                start = time.perf_counter()
+                try:
+                    processed, sha256 = await loop.run_in_executor(pool, _load_report, str(path))
+                    record["parse_seconds"] = round(time.perf_counter() - start, 3)
+
+                    summary = None
+                    if strategy == "llm":
+                        key = report_summary_cache_key(processed)
+                        record["cached"] = cache.get(key) is not None
+                        start = time.perf_counter()
+                        async with llm_slots:
+                            summary = await asyncio.to_thread(
+                                summarize_preprocessed_report,
+                                processed,
+                                rate_limiter=rate_limiter,
+                            )
+                        record["summary_seconds"] = round(time.perf_counter() - start, 3)
+                        if summary.startswith(FALLBACK_SUMMARY_PREFIX):
+                            # El resumen determinista de respaldo no cuenta como
+                            # terminado: queda con error para reintentarlo al relanzar
+                            raise RuntimeError(summary.split("\n", 1)[0])
+                        if not record["cached"]:
+                            # Estimación: los trozos enviados al modelo y el resumen devuelto
+                            record["input_tokens"] = sum(
+                                count_tokens(chunk) for chunk in chunk_report(processed)
+                            )
+                            record["output_tokens"] = count_tokens(summary)
+
+                    report_file = reports_dir / _report_file_name(path, sha256)
+                    _write_report_file(report_file, path, processed, summary)
+
+                    categories = processed.get("categories", {})
+                    record.update(
+                        status="ok",
+                        sha256=sha256,
+                        url=processed.get("finalUrl") or processed.get("requestedUrl"),
+                        scores={
+                            category_id: category.get("score")
+                            for category_id, category in categories.items()
+                        },
+                        failing_audits=len(rank_failing_audits(processed)),
+                        report_file=str(report_file.relative_to(out_dir)),
+                    )
+                except Exception as e:
+                    record.update(status="error", error=f"{type(e).__name__}: {e}")
+
+            # Una línea por reporte, escrita en cuanto termina (checkpoint)
+            results.write(json.dumps(record, ensure_ascii=False) + "\n")
+            results.flush()
+
+            if record["status"] == "ok":
+                stats.succeeded += 1
+                stats.cached += bool(record.get("cached"))
+                stats.input_tokens += record.get("input_tokens", 0)
+                stats.output_tokens += record.get("output_tokens", 0)
+            else:
+                stats.failed += 1
+            finished = stats.succeeded + stats.failed + stats.skipped
+            detail = record.get("error") or record.get("report_file")
+            print(f"[{finished}/{stats.total}] {path} {record['status']}: {detail}", flush=True)
+
+        await asyncio.gather(*(process(path) for path in pending))
+
+    return stats
+
+
+def format_summary(stats: BatchStats) -> str:
+    processed = stats.succeeded + stats.failed
+    per_minute = processed / stats.elapsed * 60 if stats.elapsed else 0.0
+    summarized = stats.succeeded - stats.cached
+    lines = [
+        f"Reportes: {stats.total} ({stats.succeeded} correctos, {stats.failed} con error, "
+        f"{stats.skipped} ya procesados, {stats.cached} desde caché)",
+        f"Tiempo: {stats.elapsed:.1f} s · {per_minute:.1f} reportes/minuto",
+    ]
+    if summarized > 0 and stats.input_tokens:
+        lines.append(
+            f"Tokens por reporte resumido (aprox.): "
+            f"{stats.input_tokens / summarized:.0f} de entrada, "
+            f"{stats.output_tokens / summarized:.0f} de salida"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analiza por lotes un directorio de reportes Lighthouse"
+    )
+    parser.add_argument("source", help="Directorio o patrón glob de reportes JSON")
+    parser.add_argument("--out", default="batch-output", help="Directorio de salida")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos de parseo")
+    parser.add_argument(
+        "--llm-concurrency", type=int, default=4, help="Reportes resumidos a la vez"
+    )
+    parser.add_argument("--strategy", choices=["llm", "digest"], default="llm")
+    parser.add_argument(
+        "--tokens-per-minute", type=int, default=None, help="Límite de tokens del lote"
+    )
+    parser.add_argument(
+        "--no-resume", action="store_true", help="Ignorar el checkpoint y empezar de cero"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    paths = collect_report_paths(args.source)
+    if not paths:
+        print(f"No se encontraron reportes en {args.source}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        stats = asyncio.run(
+            run_batch(
+                paths,
+                Path(args.out),
+                workers=args.workers,
+                llm_concurrency=args.llm_concurrency,
+                strategy=args.strategy,
+                resume=not args.no_resume,
+                tokens_per_minute=args.tokens_per_minute,
+            )
+        )
+    except KeyboardInterrupt:
+        print("\nInterrumpido; vuelve a lanzar el comando para continuar.", file=sys.stderr)
+        sys.exit(130)
+
+    print()
+    print(format_summary(stats))
+    if stats.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Caché de resúmenes de reportes Lighthouse.
+
+Los resúmenes se identifican por el contenido del reporte preprocesado, el modelo
+que los generó y la versión de los prompts de resumen, de modo que un mismo reporte
+solo se resume una vez aunque se vuelva a cargar o se hagan varias preguntas. Los
+nodos intermedios del resumen en árbol (cada trozo y cada fusión) se guardan por su
+texto de entrada, así que si solo cambia una parte del reporte solo se recalcula
+su camino hasta la raíz.
+
+La caché tiene dos niveles:
+- Memoria: LRU acotado por número de entradas.
+- Disco: SQLite acotado por tamaño total, desalojando las entradas usadas hace más tiempo.
+
+Si SQLite falla en una operación (por ejemplo, "database is locked" cuando los
+workers de app/batch.py y la app comparten el directorio), el error se registra
+en el logger "lighthouse_assistant.cache" y esa operación usa solo la memoria.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from .telemetry import record_cache
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "lighthouse-assistant"
+
+_logger = logging.getLogger("lighthouse_assistant.cache")
+
+
+def report_hash(preprocessed: dict) -> str:
+    """
+    Calcula un hash estable del reporte preprocesado.
+
+    Usa una serialización canónica (claves ordenadas, sin espacios) para que dos
+    reportes con el mismo contenido produzcan siempre el mismo hash.
+    """
+    canonical = json.dumps(
+        preprocessed, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def summary_cache_key(preprocessed: dict, model: str, prompt_version: str) -> str:
+    """Clave de caché para el resumen de un reporte con un modelo y versión de prompt."""
+    return summary_cache_key_for_hash(report_hash(preprocessed), model, prompt_version)
+
+
+def summary_cache_key_for_hash(digest: str, model: str, prompt_version: str) -> str:
+    """Como summary_cache_key, a partir del report_hash del reporte."""
+    raw = f"{digest}:{model}:{prompt_version}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def summary_node_key(kind: str, text: str, model: str, prompt_version: str) -> str:
+    """
+    Clave de caché de un nodo del resumen en árbol: el resumen de un trozo
+    ("chunk") o la fusión de varios resúmenes ("fusion"), según su texto de entrada.
+    """
+    raw = f"{kind}:{model}:{prompt_version}:{text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SummaryCache:
+    """
+    Caché de dos niveles (memoria LRU + SQLite) para textos de resumen.
+
+    Es segura para usarse desde varios hilos. Si la base de datos en disco no se
+    puede abrir, la caché sigue funcionando solo en memoria; si falla una lectura
+    o escritura, esa operación se trata como un fallo de caché o se queda en memoria.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        max_memory_entries: int = 128,
+        max_disk_bytes: int = 50 * 1024 * 1024,
+    ):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._db = None
+
+        if path is not None:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(path), check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS summaries ("
+                    "key TEXT PRIMARY KEY, "
+                    "value TEXT NOT NULL, "
+                    "size INTEGER NOT NULL, "
+                    "accessed_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except (OSError, sqlite3.Error):
+                self._db = None
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats.memory_hits += 1
+                record_cache("summary", "memory_hit")
+                return self._memory[key]
+
+            row = None
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value FROM summaries WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        self._db.execute(
+                            "UPDATE summaries SET accessed_at = ? WHERE key = ?",
+                            (time.time(), key),
+                        )
+                        self._db.commit()
+                except sqlite3.Error as e:
+                    self._disk_error("leer", e)
+                if row is not None:
+                    self._remember(key, row[0])
+                    self._stats.disk_hits += 1
+                    record_cache("summary", "disk_hit")
+                    return row[0]
+
+            self._stats.misses += 1
+            record_cache("summary", "miss")
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._remember(key, value)
+
+            if self._db is not None:
+                size = len(value.encode("utf-8"))
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO summaries (key, value, size, accessed_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, value, size, time.time()),
+                    )
+                    self._evict_disk()
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    self._disk_error("escribir", e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM summaries")
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    self._disk_error("vaciar", e)
+
+    def stats(self) -> dict:
+        """Contadores de aciertos y fallos de la caché."""
+        with self._lock:
+            data = asdict(self._stats)
+            data["hits"] = self._stats.hits
+            data["hit_rate"] = self._stats.hit_rate
+            data["memory_entries"] = len(self._memory)
+            return data
+
+    def _disk_error(self, operation: str, error: sqlite3.Error) -> None:
+        """Registra un error de SQLite y deshace la transacción a medias (con self._lock)."""
+        _logger.warning("No se pudo %s la caché de resúmenes en disco: %s", operation, error)
+        try:
+            self._db.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _remember(self, key: str, value: str) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats.evictions += 1
+
+    def _evict_disk(self) -> None:
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM summaries"
+        ).fetchone()
+        if total <= self.max_disk_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT key, size FROM summaries ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM summaries WHERE key = ?", (key,))
+            total -= size
+            self._stats.evictions += 1
+
+
+_summary_cache: SummaryCache | None = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    """
+    Devuelve la caché de resúmenes compartida por todo el proceso.
+
+    El directorio se puede cambiar con LIGHTHOUSE_CACHE_DIR; si se define vacío,
+    la caché solo usa memoria.
+    """
+    global _summary_cache
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            cache_dir = os.getenv("LIGHTHOUSE_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+            path = Path(cache_dir) / "summaries.sqlite3" if cache_dir else None
+            _summary_cache = SummaryCache(path=path)
+        return _summary_cache
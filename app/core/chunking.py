@@ -0,0 +1,231 @@
+"""
+Troceado del reporte preprocesado para el resumen por trozos.
+
+En lugar de cortar el JSON con indentación cada 3000 caracteres (lo que parte
+auditorías por la mitad y gasta tokens en espacios), chunk_report empaqueta
+auditorías completas en trozos de hasta un presupuesto de tokens:
+
+- Una cabecera con la URL, la configuración y las puntuaciones por categoría.
+- Las auditorías agrupadas por categoría, en el orden de LIGHTHOUSE_CATEGORIES,
+  cada una en una línea de JSON compacto y de peor a mejor puntuación. Cada
+  sección lleva su título, y se repite si la categoría continúa en otro trozo.
+- En el modo "failures" (por defecto) se omiten las auditorías aprobadas
+  (score == 1) y las que no aplican o son manuales; la cabecera de cada sección
+  indica cuántas se han omitido.
+
+SUMMARY_CHUNKING elige el modo ("failures", "structured" o "fixed", el troceado
+anterior por caracteres) y SUMMARY_CHUNK_TOKENS el presupuesto por trozo.
+"""
+
+import json
+import os
+import re
+
+from .prompts import LIGHTHOUSE_CATEGORIES
+from .tokens import count_tokens, truncate_to_tokens
+
+CHUNKING_MODES = ("failures", "structured", "fixed")
+
+# Tokens por trozo: deja sitio al prompt y a los 800 tokens de salida sin
+# acercarse al límite por minuto del modelo pequeño
+DEFAULT_CHUNK_TOKENS = 2000
+
+# Auditorías sin información útil para el resumen en el modo "failures"
+_SKIPPED_MODES = {"notApplicable", "manual"}
+
+# Enlaces Markdown de las descripciones: se conserva el texto, no la URL
+_LINK_RE = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+
+# Sección para las auditorías que no pertenecen a ninguna categoría conocida
+OTHER_GROUP = "other"
+
+
+def chunking_mode() -> str:
+    mode = os.getenv("SUMMARY_CHUNKING", "failures").lower()
+    return mode if mode in CHUNKING_MODES else "failures"
+
+
+def chunk_token_budget() -> int:
+    try:
+        return int(os.getenv("SUMMARY_CHUNK_TOKENS", str(DEFAULT_CHUNK_TOKENS)))
+    except ValueError:
+        return DEFAULT_CHUNK_TOKENS
+
+
+def _compact(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def fixed_size_chunks(preprocessed: dict, chunk_size: int = 3000) -> list[str]:
+    """JSON preprocesado con indentación, en trozos de máximo chunk_size caracteres."""
+    report_text = json.dumps(preprocessed, indent=2, ensure_ascii=False)
+    return [report_text[i : i + chunk_size] for i in range(0, len(report_text), chunk_size)]
+
+
+def audit_groups(preprocessed: dict) -> dict[str, list[str]]:
+    """
+    Ids de auditoría agrupados por categoría.
+
+    Cada auditoría va a la primera categoría (en el orden de LIGHTHOUSE_CATEGORIES
+    y después el del reporte) que la pondera. El preprocesamiento solo conserva
+    los pesos mayores que 0, así que las oportunidades y diagnósticos de
+    rendimiento (con metricSavings o numericValue) se asignan a "performance";
+    el resto queda en OTHER_GROUP.
+    """
+    categories = preprocessed.get("categories", {})
+    order = [c for c in LIGHTHOUSE_CATEGORIES if c in categories]
+    order += [c for c in categories if c not in LIGHTHOUSE_CATEGORIES]
+
+    owner = {}
+    for category_id in order:
+        for audit_id in categories[category_id].get("auditWeights", {}):
+            owner.setdefault(audit_id, category_id)
+
+    groups: dict[str, list[str]] = {category_id: [] for category_id in order}
+    groups[OTHER_GROUP] = []
+    for audit_id, audit in preprocessed.get("audits", {}).items():
+        category_id = owner.get(audit_id)
+        if category_id is None:
+            is_performance = (
+                audit.get("scoreDisplayMode") == "metricSavings" or "numericValue" in audit
+            )
+            category_id = (
+                "performance" if is_performance and "performance" in groups else OTHER_GROUP
+            )
+        groups[category_id].append(audit_id)
+    return {category_id: ids for category_id, ids in groups.items() if ids}
+
+
+def _audit_line(audit_id: str, audit: dict) -> str:
+    compact = {"id": audit_id}
+    for key, value in audit.items():
+        if key == "id":
+            continue
+        if key == "description" and isinstance(value, str):
+            value = _LINK_RE.sub(r"\1", value)
+        compact[key] = value
+    return _compact(compact)
+
+
+def _header(preprocessed: dict) -> str:
+    lines = []
+    for key, value in preprocessed.items():
+        if key in ("audits", "categories"):
+            continue
+        if key == "timing":
+            # Las entradas son el perfilado interno de Lighthouse; basta el total
+            if not isinstance(value, dict) or "total" not in value:
+                continue
+            value = value["total"]
+        lines.append(f"{key}: {value if isinstance(value, str) else _compact(value)}")
+    categories = preprocessed.get("categories", {})
+    if categories:
+        lines.append("## Puntuaciones por categoría")
+        for category_id, category in categories.items():
+            summary = {
+                key: _LINK_RE.sub(r"\1", value) if key == "description" else value
+                for key, value in category.items()
+                if key != "auditWeights"
+            }
+            lines.append(_compact({"id": category_id, **summary}))
+    return "\n".join(lines)
+
+
+def _sort_key(audit: dict) -> tuple:
+    # De peor a mejor; las auditorías sin puntuación al final
+    score = audit.get("score")
+    return (score is None, score if isinstance(score, (int, float)) else 0)
+
+
+def structured_chunks(
+    preprocessed: dict, token_budget: int = DEFAULT_CHUNK_TOKENS, failures_only: bool = True
+) -> list[str]:
+    """
+    Trozos de auditorías completas agrupadas por categoría (ver el docstring del módulo).
+
+    Una auditoría que por sí sola supera token_budget se recorta.
+    """
+    audits = preprocessed.get("audits", {})
+    categories = preprocessed.get("categories", {})
+
+    chunks: list[str] = []
+    lines: list[str] = []
+    used = 0
+
+    def flush():
+        nonlocal lines, used
+        if lines:
+            chunks.append("\n".join(lines))
+        lines, used = [], 0
+
+    header = _header(preprocessed)
+    if header:
+        header = truncate_to_tokens(header, token_budget // 2)
+        lines.append(header)
+        used = count_tokens(header) + 1
+
+    for category_id, audit_ids in audit_groups(preprocessed).items():
+        selected = [
+            audit_id
+            for audit_id in audit_ids
+            if not failures_only
+            or (
+                audits[audit_id].get("score") != 1
+                and audits[audit_id].get("scoreDisplayMode") not in _SKIPPED_MODES
+            )
+        ]
+        omitted = len(audit_ids) - len(selected)
+        if not selected and not omitted:
+            continue
+
+        title = categories.get(category_id, {}).get("title") or category_id
+        section = f"## Auditorías: {title}"
+        if omitted:
+            section += f" ({omitted} aprobadas o sin aplicar omitidas)"
+        section_tokens = count_tokens(section) + 1
+
+        selected.sort(key=lambda audit_id: _sort_key(audits[audit_id]))
+        audit_lines = [_audit_line(audit_id, audits[audit_id]) for audit_id in selected]
+        first_tokens = count_tokens(audit_lines[0]) + 1 if audit_lines else 0
+
+        # La sección empieza en un trozo nuevo si no cabe con su primera auditoría
+        if used + section_tokens + first_tokens > token_budget:
+            flush()
+        lines.append(section)
+        used += section_tokens
+
+        for position, line in enumerate(audit_lines):
+            line_tokens = count_tokens(line) + 1
+            if position and used + line_tokens > token_budget:
+                flush()
+                lines.append(f"{section} (continuación)")
+                used = count_tokens(lines[0]) + 1
+            if line_tokens > token_budget - used:
+                line = truncate_to_tokens(line, max(1, token_budget - used - 1))
+                line_tokens = count_tokens(line) + 1
+            lines.append(line)
+            used += line_tokens
+
+    flush()
+    return chunks
+
+
+def chunk_report(
+    preprocessed: dict, mode: str | None = None, token_budget: int | None = None
+) -> list[str]:
+    """
+    Trozos del reporte preprocesado para resumir con el modelo pequeño.
+
+    Args:
+        preprocessed: Reporte devuelto por preprocess_lighthouse_report
+        mode: "failures", "structured" o "fixed" (por defecto SUMMARY_CHUNKING)
+        token_budget: Tokens máximos por trozo (por defecto SUMMARY_CHUNK_TOKENS)
+    """
+    mode = mode or chunking_mode()
+    if mode == "fixed":
+        return fixed_size_chunks(preprocessed)
+    return structured_chunks(
+        preprocessed,
+        token_budget=token_budget or chunk_token_budget(),
+        failures_only=mode == "failures",
+    )
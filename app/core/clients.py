@@ -0,0 +1,133 @@
+"""
+Clientes de Groq compartidos por todo el proceso.
+
+Crear un cliente por llamada abre un pool de conexiones nuevo (y un handshake TLS)
+en cada turno del chat y en cada resumen. Aquí se crea un único cliente por
+API key y URL base, con conexiones keep-alive, y se reutiliza en todas las
+llamadas. Para cambiar timeout o reintentos en una llamada concreta se usa
+client.with_options(...), que comparte el mismo pool de conexiones.
+
+Configuración (variables de entorno):
+- GROQ_TIMEOUT: timeout total por petición en segundos (60)
+- GROQ_CONNECT_TIMEOUT: timeout de conexión en segundos (5)
+- GROQ_MAX_RETRIES: reintentos del SDK ante errores transitorios (2)
+- GROQ_MAX_CONNECTIONS: conexiones simultáneas máximas (20)
+- GROQ_MAX_KEEPALIVE_CONNECTIONS: conexiones ociosas que se mantienen abiertas (10)
+- GROQ_KEEPALIVE_EXPIRY: segundos que una conexión ociosa sigue abierta (60)
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+
+import httpx
+from groq import AsyncGroq, DefaultAsyncHttpxClient, DefaultHttpxClient, Groq
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    timeout: float = 60.0
+    connect_timeout: float = 5.0
+    max_retries: int = 2
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "ClientSettings":
+        return cls(
+            timeout=float(os.getenv("GROQ_TIMEOUT", cls.timeout)),
+            connect_timeout=float(os.getenv("GROQ_CONNECT_TIMEOUT", cls.connect_timeout)),
+            max_retries=int(os.getenv("GROQ_MAX_RETRIES", cls.max_retries)),
+            max_connections=int(os.getenv("GROQ_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive_connections=int(
+                os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", cls.max_keepalive_connections)
+            ),
+            keepalive_expiry=float(
+                os.getenv("GROQ_KEEPALIVE_EXPIRY", cls.keepalive_expiry)
+            ),
+        )
+
+    @property
+    def httpx_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    @property
+    def httpx_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+_clients: dict[tuple, Groq] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, AsyncGroq]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def _client_key() -> tuple:
+    # Si cambian la API key o la URL base (p. ej. en benchmarks) se crea otro cliente
+    return (os.getenv("GROQ_API_KEY"), os.getenv("GROQ_BASE_URL"))
+
+
+def get_groq_client() -> Groq:
+    """Cliente síncrono compartido, con pool de conexiones keep-alive."""
+    key = _client_key()
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            settings = ClientSettings.from_env()
+            client = Groq(
+                api_key=key[0],
+                base_url=key[1],
+                timeout=settings.httpx_timeout,
+                max_retries=settings.max_retries,
+                http_client=DefaultHttpxClient(
+                    timeout=settings.httpx_timeout, limits=settings.httpx_limits
+                ),
+            )
+            _clients[key] = client
+        return client
+
+
+def get_async_groq_client() -> AsyncGroq:
+    """
+    Cliente asíncrono compartido dentro del event loop actual.
+
+    Las conexiones de httpx.AsyncClient pertenecen al loop en el que se crean, así
+    que se mantiene un cliente por loop.
+
+    Raises:
+        RuntimeError: Si se llama fuera de un event loop en ejecución
+    """
+    loop = asyncio.get_running_loop()
+    key = _client_key()
+    with _lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            settings = ClientSettings.from_env()
+            client = AsyncGroq(
+                api_key=key[0],
+                base_url=key[1],
+                timeout=settings.httpx_timeout,
+                max_retries=settings.max_retries,
+                http_client=DefaultAsyncHttpxClient(
+                    timeout=settings.httpx_timeout, limits=settings.httpx_limits
+                ),
+            )
+            loop_clients[key] = client
+        return client
+
+
+def reset_clients() -> None:
+    """Cierra y descarta los clientes síncronos (los asíncronos se liberan con su loop)."""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
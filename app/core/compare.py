@@ -0,0 +1,349 @@
+"""
+Comparación local de varios reportes Lighthouse y tendencias por URL.
+
+Los reportes preprocesados se alinean por id de auditoría y de categoría en
+matrices de NumPy (reportes × auditorías), de modo que las diferencias de
+puntuación y de numericValue, las regresiones y las series temporales se
+calculan de forma vectorizada aunque haya cientos de ejecuciones. El resultado
+es una tabla compacta que se pasa al modelo en lugar de pedirle que compare
+resúmenes en prosa.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .digest import CORE_WEB_VITALS, clean, format_score
+from .report_model import PASSING_SCORE, get_report_model
+from .tokens import count_tokens, truncate_to_tokens
+
+# Cambio mínimo de puntuación (0-1) para considerar una regresión o mejora
+MIN_SCORE_DELTA = 0.05
+
+# Filas máximas por tabla
+MAX_CHANGES = 10
+MAX_TREND_ROWS = 10
+
+
+@dataclass
+class ReportMatrix:
+    """Reportes alineados, ordenados por fetchTime (los que no lo tienen, al final)."""
+
+    names: list[str]
+    urls: list[str]
+    fetch_times: np.ndarray  # datetime64[s], NaT si falta
+    category_ids: list[str]
+    category_titles: dict[str, str]
+    category_scores: np.ndarray  # (reportes, categorías), NaN si falta
+    audit_ids: list[str]
+    audit_titles: dict[str, str]
+    audit_units: dict[str, str]
+    scores: np.ndarray  # (reportes, auditorías), NaN si falta o no puntúa
+    numeric: np.ndarray  # (reportes, auditorías), numericValue o NaN
+
+    def rows_by_url(self) -> dict[str, list[int]]:
+        """Índices de fila de cada URL, en orden cronológico."""
+        rows: dict[str, list[int]] = {}
+        for index, url in enumerate(self.urls):
+            rows.setdefault(url, []).append(index)
+        return rows
+
+
+@dataclass
+class AuditChange:
+    audit_id: str
+    title: str
+    before: float | None
+    after: float | None
+    numeric_before: float | None
+    numeric_after: float | None
+    unit: str | None
+
+    @property
+    def delta(self) -> float | None:
+        if self.before is None or self.after is None:
+            return None
+        return self.after - self.before
+
+
+@dataclass
+class ReportComparison:
+    baseline: str
+    current: str
+    category_scores: dict[str, tuple[float | None, float | None]]
+    regressions: list[AuditChange]
+    improvements: list[AuditChange]
+
+
+def _parse_time(value) -> np.datetime64:
+    if not value:
+        return np.datetime64("NaT", "s")
+    try:
+        return np.datetime64(str(value).rstrip("Z")[:19], "s")
+    except ValueError:
+        return np.datetime64("NaT", "s")
+
+
+def _number(value) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+
+
+def build_report_matrix(reports: dict[str, dict]) -> ReportMatrix:
+    """
+    Alinea los reportes preprocesados por id de auditoría y de categoría.
+
+    Las columnas de puntuaciones y numericValue de cada reporte salen ya en arrays
+    de su modelo (core/report_model.py) y se copian a la matriz de una vez.
+    """
+    names = list(reports)
+    models = {name: get_report_model(reports[name]) for name in names}
+    fetch_times = np.array([_parse_time(models[n].fetch_time) for n in names])
+    # argsort estable: NaT va al final y los empates conservan el orden de carga
+    order = np.argsort(fetch_times, kind="stable")
+    names = [names[i] for i in order]
+    fetch_times = fetch_times[order]
+
+    category_titles: dict[str, str] = {}
+    audit_titles: dict[str, str] = {}
+    audit_units: dict[str, str] = {}
+    for name in names:
+        model = models[name]
+        for category_id, category in model.categories.items():
+            category_titles.setdefault(category_id, category.title)
+        for audit in model.audits:
+            audit_titles.setdefault(audit.id, audit.title or audit.id)
+        for audit_id, audit in model.metrics.items():
+            if audit.numeric_unit:
+                audit_units.setdefault(audit_id, audit.numeric_unit)
+
+    category_index = {category_id: i for i, category_id in enumerate(category_titles)}
+    audit_index = {audit_id: i for i, audit_id in enumerate(audit_titles)}
+    category_scores = np.full((len(names), len(category_index)), np.nan)
+    scores = np.full((len(names), len(audit_index)), np.nan)
+    numeric = np.full((len(names), len(audit_index)), np.nan)
+
+    for row, name in enumerate(names):
+        model = models[name]
+        for category_id, category in model.categories.items():
+            category_scores[row, category_index[category_id]] = _number(category.score)
+        columns = np.fromiter(
+            (audit_index[audit.id] for audit in model.audits),
+            dtype=np.intp,
+            count=len(model.audits),
+        )
+        scores[row, columns] = model.scores
+        numeric[row, columns] = model.numeric
+
+    return ReportMatrix(
+        names=names,
+        urls=[models[name].url for name in names],
+        fetch_times=fetch_times,
+        category_ids=list(category_titles),
+        category_titles=category_titles,
+        category_scores=category_scores,
+        audit_ids=list(audit_titles),
+        audit_titles=audit_titles,
+        audit_units=audit_units,
+        scores=scores,
+        numeric=numeric,
+    )
+
+
+def _optional(value: float) -> float | None:
+    return None if np.isnan(value) else float(value)
+
+
+def compare_rows(
+    matrix: ReportMatrix,
+    baseline: int,
+    current: int,
+    min_delta: float = MIN_SCORE_DELTA,
+) -> ReportComparison:
+    """
+    Diferencias entre dos filas de la matriz.
+
+    Es regresión (o mejora) una auditoría cuya puntuación baja (o sube) al menos
+    min_delta, o que pasa de aprobada a suspendida (o al revés). Se ordenan de
+    mayor a menor cambio.
+    """
+    before, after = matrix.scores[baseline], matrix.scores[current]
+    delta = after - before
+    valid = ~np.isnan(delta)
+    crossed_down = valid & (before >= PASSING_SCORE) & (after < PASSING_SCORE)
+    crossed_up = valid & (before < PASSING_SCORE) & (after >= PASSING_SCORE)
+    regressed = np.flatnonzero((valid & (delta <= -min_delta)) | crossed_down)
+    improved = np.flatnonzero((valid & (delta >= min_delta)) | crossed_up)
+
+    def changes(columns: np.ndarray, descending: bool) -> list[AuditChange]:
+        ordered = columns[np.argsort(delta[columns] * (-1 if descending else 1), kind="stable")]
+        return [
+            AuditChange(
+                audit_id=matrix.audit_ids[column],
+                title=matrix.audit_titles[matrix.audit_ids[column]],
+                before=_optional(before[column]),
+                after=_optional(after[column]),
+                numeric_before=_optional(matrix.numeric[baseline, column]),
+                numeric_after=_optional(matrix.numeric[current, column]),
+                unit=matrix.audit_units.get(matrix.audit_ids[column]),
+            )
+            for column in ordered
+        ]
+
+    return ReportComparison(
+        baseline=matrix.names[baseline],
+        current=matrix.names[current],
+        category_scores={
+            category_id: (
+                _optional(matrix.category_scores[baseline, column]),
+                _optional(matrix.category_scores[current, column]),
+            )
+            for column, category_id in enumerate(matrix.category_ids)
+        },
+        regressions=changes(regressed, descending=False),
+        improvements=changes(improved, descending=True),
+    )
+
+
+def regression_counts(matrix: ReportMatrix) -> dict[str, np.ndarray]:
+    """
+    Regresiones entre cada ejecución y la anterior de la misma URL.
+
+    Returns:
+        dict: Por URL, un array con el número de auditorías que empeoran en cada
+        ejecución respecto a la anterior (la primera no tiene anterior)
+    """
+    counts = {}
+    for url, rows in matrix.rows_by_url().items():
+        series = matrix.scores[rows]
+        steps = np.diff(series, axis=0)
+        counts[url] = np.sum(steps <= -MIN_SCORE_DELTA, axis=1)
+    return counts
+
+
+def _format_numeric(value: float | None, unit: str | None) -> str:
+    if value is None:
+        return "-"
+    if unit == "millisecond":
+        return f"{value:.0f} ms"
+    if unit == "byte":
+        return f"{value / 1024:.0f} KiB"
+    if unit == "unitless":
+        return f"{value:.3f}"
+    return f"{value:.4g}"
+
+
+def _format_time(value: np.datetime64) -> str:
+    return "-" if np.isnat(value) else str(value.astype("datetime64[m]")).replace("T", " ")
+
+
+def _format_comparison(matrix: ReportMatrix, comparison: ReportComparison, header: str) -> list[str]:
+    lines = [f"### {header}"]
+
+    categories = []
+    for category_id, (before, after) in comparison.category_scores.items():
+        title = matrix.category_titles[category_id]
+        if before is None or after is None:
+            categories.append(f"{title} {format_score(before)}→{format_score(after)}")
+        else:
+            change = round((after - before) * 100)
+            categories.append(
+                f"{title} {format_score(before)}→{format_score(after)} ({change:+d})"
+                if change
+                else f"{title} {format_score(after)} (=)"
+            )
+    if categories:
+        lines.append("Categorías: " + ", ".join(categories))
+
+    for label, changes in (
+        ("Regresiones", comparison.regressions),
+        ("Mejoras", comparison.improvements),
+    ):
+        if not changes:
+            lines.append(f"{label}: ninguna")
+            continue
+        lines.append(f"{label} ({len(changes)}):")
+        lines.append("id\tantes\tdespués\tvalor antes\tvalor después\ttítulo")
+        for change in changes[:MAX_CHANGES]:
+            lines.append(
+                "\t".join(
+                    [
+                        change.audit_id,
+                        format_score(change.before),
+                        format_score(change.after),
+                        _format_numeric(change.numeric_before, change.unit),
+                        _format_numeric(change.numeric_after, change.unit),
+                        clean(change.title),
+                    ]
+                )
+            )
+    return lines
+
+
+def _format_trend(matrix: ReportMatrix, url: str, rows: list[int]) -> list[str]:
+    vitals = [
+        (acronym, matrix.audit_ids.index(audit_id))
+        for audit_id, acronym in CORE_WEB_VITALS
+        if audit_id in matrix.audit_titles
+    ]
+    lines = [f"### Tendencia de {url} ({len(rows)} ejecuciones)"]
+    header = ["fecha"] + [matrix.category_titles[c] for c in matrix.category_ids]
+    lines.append("\t".join(header + [acronym for acronym, _ in vitals]))
+    for row in rows[-MAX_TREND_ROWS:]:
+        cells = [_format_time(matrix.fetch_times[row])]
+        cells += [format_score(_optional(score)) for score in matrix.category_scores[row]]
+        cells += [
+            _format_numeric(
+                _optional(matrix.numeric[row, column]),
+                matrix.audit_units.get(matrix.audit_ids[column]),
+            )
+            for _, column in vitals
+        ]
+        lines.append("\t".join(cells))
+    return lines
+
+
+def build_comparison_context(reports: dict[str, dict], max_tokens: int = 800) -> str | None:
+    """
+    Tabla de comparación de los reportes para el modelo.
+
+    Para cada URL con varias ejecuciones compara la última con la anterior y, si
+    hay tres o más, añade su serie temporal. Si todas las URLs son distintas,
+    compara cada reporte con el primero (por fetchTime).
+
+    Returns:
+        str | None: Comparación en Markdown/TSV, o None con menos de dos reportes
+    """
+    if len(reports) < 2:
+        return None
+
+    matrix = build_report_matrix(reports)
+    rows_by_url = matrix.rows_by_url()
+    repeated = {url: rows for url, rows in rows_by_url.items() if len(rows) >= 2}
+
+    lines = [
+        "## COMPARACIÓN DE REPORTES",
+        "Calculada localmente alineando auditorías por id (puntuaciones 0-100). "
+        "Usa estas cifras exactas al comparar reportes.",
+        "",
+    ]
+    if repeated:
+        for url, rows in repeated.items():
+            previous, latest = rows[-2], rows[-1]
+            comparison = compare_rows(matrix, previous, latest)
+            header = (
+                f"{url}: {matrix.names[previous]} ({_format_time(matrix.fetch_times[previous])})"
+                f" → {matrix.names[latest]} ({_format_time(matrix.fetch_times[latest])})"
+            )
+            lines += _format_comparison(matrix, comparison, header) + [""]
+            if len(rows) >= 3:
+                lines += _format_trend(matrix, url, rows) + [""]
+    else:
+        for row in range(1, len(matrix.names)):
+            comparison = compare_rows(matrix, 0, row)
+            header = f"{matrix.names[0]} ({matrix.urls[0]}) → {matrix.names[row]} ({matrix.urls[row]})"
+            lines += _format_comparison(matrix, comparison, header) + [""]
+
+    text = "\n".join(lines).rstrip()
+    if count_tokens(text) > max_tokens:
+        text = truncate_to_tokens(text, max_tokens)
+    return text
@@ -0,0 +1,214 @@
+"""
+Ensamblado del contexto del modelo principal dentro de un presupuesto de tokens.
+
+El system prompt y el último mensaje del usuario siempre se envían. El resto del
+presupuesto se reparte por prioridad:
+1. Resúmenes de reportes, los más relevantes para la pregunta primero (se recortan
+   o se omiten si no caben).
+2. Los turnos recientes de la conversación, completos.
+3. Los turnos anteriores, compactados a unos pocos tokens cada uno.
+Lo que no cabe se descarta, empezando por lo más antiguo.
+"""
+
+import os
+import re
+from dataclasses import asdict, dataclass, field
+
+from .tokens import count_message_tokens, count_tokens, truncate_to_tokens
+
+_WORD_RE = re.compile(r"\w{3,}")
+
+# Tokens mínimos para que merezca la pena incluir un resumen recortado
+_MIN_REPORT_TOKENS = 100
+
+
+@dataclass(frozen=True)
+class ContextBudget:
+    """
+    Presupuesto de tokens del prompt (sin contar la respuesta).
+
+    Se puede configurar con CONTEXT_TOKEN_BUDGET, CONTEXT_RECENT_MESSAGES y
+    CONTEXT_COMPACTED_MESSAGE_TOKENS.
+    """
+
+    total_tokens: int = 16000
+    recent_messages: int = 6
+    compacted_message_tokens: int = 80
+
+    @classmethod
+    def from_env(cls) -> "ContextBudget":
+        return cls(
+            total_tokens=int(os.getenv("CONTEXT_TOKEN_BUDGET", cls.total_tokens)),
+            recent_messages=int(os.getenv("CONTEXT_RECENT_MESSAGES", cls.recent_messages)),
+            compacted_message_tokens=int(
+                os.getenv("CONTEXT_COMPACTED_MESSAGE_TOKENS", cls.compacted_message_tokens)
+            ),
+        )
+
+
+@dataclass
+class ContextAccounting:
+    """Tokens usados por cada sección del prompt de una petición."""
+
+    budget: int
+    system: int = 0
+    reports: dict[str, int] = field(default_factory=dict)
+    reports_overhead: int = 0
+    history: int = 0
+    recent_messages: int = 0
+    compacted_messages: int = 0
+    dropped_messages: int = 0
+    truncated_reports: list[str] = field(default_factory=list)
+    dropped_reports: list[str] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return (
+            self.system + sum(self.reports.values()) + self.reports_overhead + self.history
+        )
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["total"] = self.total
+        return data
+
+
+@dataclass
+class ContextPlan:
+    messages: list[dict]
+    report_summaries: dict[str, str]
+    accounting: ContextAccounting
+
+
+def rank_reports(question: str, report_summaries: dict[str, str]) -> list[str]:
+    """
+    Nombres de los reportes ordenados por relevancia para la pregunta.
+
+    Un reporte mencionado por nombre va primero; después cuentan las palabras
+    compartidas entre la pregunta y el resumen. Los empates conservan el orden.
+    """
+    question_lower = question.lower()
+    question_words = set(_WORD_RE.findall(question_lower))
+
+    def score(item: tuple[int, str]) -> tuple:
+        position, name = item
+        stem = name.lower().rsplit(".", 1)[0]
+        mentioned = stem in question_lower or name.lower() in question_lower
+        overlap = len(question_words & set(_WORD_RE.findall(report_summaries[name].lower())))
+        return (not mentioned, -overlap, position)
+
+    return [name for _, name in sorted(enumerate(report_summaries), key=score)]
+
+
+def _compact(message: dict, max_tokens: int) -> dict:
+    return {**message, "content": truncate_to_tokens(str(message.get("content", "")), max_tokens)}
+
+
+def fit_context(
+    system_tokens: int,
+    messages: list[dict],
+    report_summaries: dict[str, str] | None = None,
+    budget: ContextBudget | None = None,
+    reports_overhead_tokens: int = 0,
+) -> ContextPlan:
+    """
+    Ajusta resúmenes e historial al presupuesto de tokens.
+
+    Args:
+        system_tokens: Tokens del system prompt (siempre se incluye)
+        messages: Historial completo; el último mensaje siempre se incluye
+        report_summaries: Resúmenes por nombre de reporte
+        budget: Presupuesto (por defecto ContextBudget.from_env())
+        reports_overhead_tokens: Tokens fijos de la sección de reportes
+            (encabezados e instrucciones), solo si se incluye algún reporte
+
+    Returns:
+        ContextPlan: Historial y resúmenes que caben, con el desglose de tokens
+    """
+    budget = budget or ContextBudget.from_env()
+    report_summaries = report_summaries or {}
+    accounting = ContextAccounting(budget=budget.total_tokens, system=system_tokens)
+
+    last, older = messages[-1:], messages[:-1]
+    question = str(last[0].get("content", "")) if last else ""
+    available = budget.total_tokens - system_tokens - count_message_tokens(last)
+
+    split = len(older) - budget.recent_messages if budget.recent_messages else len(older)
+    old, recent = older[: max(0, split)], older[max(0, split) :]
+
+    # Reservar parte del presupuesto para los turnos recientes
+    history_reserve = min(count_message_tokens(recent), max(0, available) // 3)
+
+    # 1. Resúmenes de reportes por relevancia
+    fitted_reports: dict[str, str] = {}
+    if report_summaries:
+        report_budget = available - history_reserve - reports_overhead_tokens
+        headers = {
+            name: count_tokens(f"### Reporte: {name}\n\n\n\n---\n\n")
+            for name in report_summaries
+        }
+
+        # Primero los que caben completos; después se recortan los demás en el resto
+        deferred = []
+        for name in rank_reports(question, report_summaries):
+            tokens = count_tokens(report_summaries[name]) + headers[name]
+            if tokens <= report_budget:
+                fitted_reports[name] = report_summaries[name]
+                accounting.reports[name] = tokens
+                report_budget -= tokens
+            else:
+                deferred.append(name)
+
+        for name in deferred:
+            if report_budget - headers[name] < _MIN_REPORT_TOKENS:
+                accounting.dropped_reports.append(name)
+                continue
+            summary = truncate_to_tokens(report_summaries[name], report_budget - headers[name])
+            tokens = count_tokens(summary) + headers[name]
+            fitted_reports[name] = summary
+            accounting.reports[name] = tokens
+            accounting.truncated_reports.append(name)
+            report_budget -= tokens
+
+        if fitted_reports:
+            accounting.reports_overhead = reports_overhead_tokens
+            available -= accounting.reports_overhead + sum(accounting.reports.values())
+
+        # Conservar el orden original para que el prompt sea estable
+        fitted_reports = {
+            name: fitted_reports[name] for name in report_summaries if name in fitted_reports
+        }
+
+    # 2 y 3. Historial: recientes completos, anteriores compactados (de nuevo a viejo)
+    kept: list[dict] = []
+    remaining = available
+    candidates = [(message, True) for message in old] + [
+        (message, False) for message in recent
+    ]
+
+    for index in range(len(candidates) - 1, -1, -1):
+        message, is_old = candidates[index]
+        if not is_old:
+            tokens = count_message_tokens([message])
+            if tokens <= remaining:
+                kept.append(message)
+                accounting.recent_messages += 1
+                remaining -= tokens
+                continue
+
+        compacted = _compact(message, budget.compacted_message_tokens)
+        tokens = count_message_tokens([compacted])
+        if tokens > remaining:
+            accounting.dropped_messages = index + 1
+            break
+        kept.append(compacted)
+        accounting.compacted_messages += 1
+        remaining -= tokens
+
+    kept.reverse()
+    history = kept + last
+    accounting.history = count_message_tokens(history)
+
+    return ContextPlan(
+        messages=history, report_summaries=fitted_reports, accounting=accounting
+    )
@@ -0,0 +1,161 @@
+"""
+Resumen determinista de reportes Lighthouse, sin llamadas al modelo.
+
+Construye un bloque compacto en Markdown/TSV a partir del reporte preprocesado:
+puntuaciones por categoría, Core Web Vitals y auditorías con problemas ordenadas
+por impacto. Se ejecuta en milisegundos y sirve como estrategia de resumen
+alternativa o como respaldo cuando Groq no responde.
+
+Las auditorías, el impacto y el orden de las suspendidas salen del modelo del
+reporte de core/report_model.py, calculado una vez por reporte. Los bloques de
+Core Web Vitals y de auditorías suspendidas se reutilizan en los contextos
+enfocados (core/prefetch.py), las comparaciones (core/compare.py) y la
+recuperación de auditorías (core/retrieval.py).
+"""
+
+from .report_model import AuditRecord, ReportModel, get_report_model
+from .tokens import count_tokens
+
+# Métricas de carga mostradas en la sección de Core Web Vitals (id, sigla)
+CORE_WEB_VITALS = [
+    ("largest-contentful-paint", "LCP"),
+    ("interaction-to-next-paint", "INP"),
+    ("cumulative-layout-shift", "CLS"),
+    ("first-contentful-paint", "FCP"),
+    ("total-blocking-time", "TBT"),
+    ("speed-index", "SI"),
+]
+
+
+# Cabecera de la tabla TSV de auditorías con problemas
+FAILING_AUDITS_HEADER = "id\tpuntuación\tvalor\ttítulo"
+
+
+def format_score(score: float | None) -> str:
+    """Puntuación 0-1 como entero 0-100 ("-" si no hay)."""
+    return "-" if score is None else f"{score * 100:.0f}"
+
+
+def clean(text) -> str:
+    """Texto en una línea, apto para una celda TSV."""
+    if text is None:
+        return "-"
+    return " ".join(str(text).replace("\xa0", " ").split())
+
+
+def core_web_vitals(model: ReportModel) -> list[tuple[str, AuditRecord]]:
+    """(sigla, auditoría) de las CORE_WEB_VITALS presentes en el reporte, en su orden."""
+    return [
+        (acronym, model.audit(audit_id))
+        for audit_id, acronym in CORE_WEB_VITALS
+        if audit_id in model.positions
+    ]
+
+
+def render_core_web_vitals(vitals: list[tuple[str, AuditRecord]]) -> list[str]:
+    """Una línea "- SIGLA: valor (puntuación N)" por métrica."""
+    return [
+        f"- {acronym}: {clean(audit.display_value)} (puntuación {format_score(audit.score)})"
+        for acronym, audit in vitals
+    ]
+
+
+def render_failing_audits(
+    audits: list[AuditRecord], token_budget: int, used_tokens: int = 0
+) -> list[str]:
+    """
+    Tabla TSV (cabecera y una fila por auditoría) de las auditorías dadas.
+
+    Las filas que harían pasar de token_budget (contando los used_tokens ya
+    ocupados) se sustituyen por una línea "... y N auditorías más".
+    """
+    lines = [FAILING_AUDITS_HEADER]
+    used = used_tokens + count_tokens(FAILING_AUDITS_HEADER) + 1
+    for position, audit in enumerate(audits):
+        row = "\t".join(
+            [
+                clean(audit.id),
+                format_score(audit.score),
+                clean(audit.display_value),
+                clean(audit.title),
+            ]
+        )
+        row_tokens = count_tokens(row) + 1
+        if used + row_tokens > token_budget:
+            lines.append(f"... y {len(audits) - position} auditorías más")
+            break
+        lines.append(row)
+        used += row_tokens
+    return lines
+
+
+def audit_impact(processed: dict) -> dict[str, float]:
+    """
+    Impacto de cada auditoría en las puntuaciones de categoría.
+
+    Para cada categoría, una auditoría pesa weight / suma de pesos de la categoría;
+    el impacto es ese peso relativo multiplicado por lo que le falta a su
+    puntuación para llegar a 1, sumado sobre todas las categorías que la incluyen.
+    """
+    model = get_report_model(processed)
+    return {
+        model.audits[position].id: float(model.impact[position])
+        for category in model.categories.values()
+        if category.total_weight
+        for position in category.audit_positions
+        if model.audits[position].score is not None
+    }
+
+
+def rank_failing_audits(processed: dict) -> list[dict]:
+    """
+    Auditorías con puntuación < 0.9, de mayor a menor impacto.
+
+    Las auditorías sin peso en ninguna categoría (por ejemplo, oportunidades de
+    rendimiento) quedan detrás, ordenadas por numericValue.
+    """
+    audits = processed.get("audits", {})
+    return [audits[record.id] for record in get_report_model(processed).failing_audits()]
+
+
+def build_report_digest(processed: dict, token_budget: int = 1500) -> str:
+    """
+    Genera un resumen en Markdown/TSV del reporte preprocesado.
+
+    Las cabeceras, categorías y Core Web Vitals siempre se incluyen; la tabla de
+    auditorías con problemas se recorta para no superar token_budget.
+
+    Args:
+        processed: Reporte devuelto por preprocess_lighthouse_report
+        token_budget: Tokens máximos aproximados del resumen
+
+    Returns:
+        str: Resumen del reporte
+    """
+    lines = [f"URL: {processed.get('finalUrl') or processed.get('requestedUrl', '-')}"]
+    if "fetchTime" in processed:
+        lines.append(f"Fecha: {processed['fetchTime']}")
+    if "runtimeError" in processed:
+        lines.append(f"Error de ejecución: {clean(processed['runtimeError'])}")
+
+    model = get_report_model(processed)
+    if model.categories:
+        lines.append("")
+        lines.append("### Puntuaciones por categoría")
+        for category in model.categories.values():
+            lines.append(f"- {category.title}: {format_score(category.score)}/100")
+
+    vitals = core_web_vitals(model)
+    if vitals:
+        lines.append("")
+        lines.append("### Core Web Vitals")
+        lines.extend(render_core_web_vitals(vitals))
+
+    failing = model.failing_audits()
+    if failing:
+        lines.append("")
+        lines.append(f"### Auditorías con problemas ({len(failing)}, por impacto)")
+        used = count_tokens("\n".join(lines))
+        lines.extend(render_failing_audits(failing, token_budget, used))
+
+    return "\n".join(lines)
@@ -0,0 +1,187 @@
+"""
+Ingestión de reportes Lighthouse en segundo plano.
+
+En cuanto se carga un reporte se encola su preprocesamiento y resumen en un pool
+de hilos compartido por todo el proceso, de modo que el chat solo tenga que
+esperar por los reportes que todavía no están listos. Cuando un reporte queda
+listo se encola también el prefetch de sus categorías más bajas (core/prefetch.py),
+que se detiene mientras el chat responde (pause_prefetch / resume_prefetch).
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable
+
+from .model import (
+    preprocess_lighthouse_report,
+    summarize_focused_context,
+    summarize_preprocessed_report,
+)
+from .prefetch import Prefetcher
+from .telemetry import span, start_trace
+
+
+class ReportStatus(str, Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+
+
+@dataclass
+class IngestedReport:
+    name: str
+    status: ReportStatus = ReportStatus.QUEUED
+    processed: dict | None = None
+    summary: str | None = None
+    error: str | None = None
+    # Desglose por etapas de la ingestión (ver core/telemetry.py)
+    trace: dict | None = None
+    future: Future | None = field(default=None, repr=False)
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Pool de hilos compartido por todas las sesiones (REPORT_INGEST_WORKERS, 2 por defecto)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.getenv("REPORT_INGEST_WORKERS", "2"))
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="report-ingest"
+            )
+        return _executor
+
+
+class ReportIngestor:
+    """
+    Seguimiento de la ingestión de los reportes de una sesión.
+
+    No usa ninguna API de Streamlit, así que se puede guardar en
+    st.session_state y los hilos de fondo solo modifican su propio estado.
+    """
+
+    def __init__(self, on_ready: Callable[[IngestedReport], None] | None = None):
+        """
+        Args:
+            on_ready: Se llama (desde el hilo de fondo) con cada reporte que termina
+                bien, por ejemplo para persistir su resumen
+        """
+        self._reports: dict[str, IngestedReport] = {}
+        self._lock = threading.Lock()
+        self._on_ready = on_ready
+        self.prefetcher = Prefetcher(summarize=summarize_focused_context)
+
+    def submit(self, name: str, report: dict, preprocessed: bool = False) -> None:
+        """
+        Encola el preprocesamiento y resumen de un reporte.
+
+        Con preprocessed=True el reporte ya viene preprocesado (por ejemplo, de
+        load_preprocessed_report) y solo se resume.
+        """
+        entry = IngestedReport(name=name)
+        with self._lock:
+            self._reports[name] = entry
+        entry.future = _get_executor().submit(self._ingest, entry, report, preprocessed)
+
+    def restore(self, name: str, summary: str, processed: dict | None = None) -> None:
+        """Registra como listo un reporte ya resumido (por ejemplo, desde core/store.py)."""
+        entry = IngestedReport(
+            name=name, status=ReportStatus.READY, processed=processed, summary=summary
+        )
+        with self._lock:
+            self._reports[name] = entry
+        if processed is not None:
+            self.prefetcher.schedule(name, processed)
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            entry = self._reports.pop(name, None)
+        if entry is not None and entry.future is not None:
+            entry.future.cancel()
+        self.prefetcher.remove(name)
+
+    def pause_prefetch(self) -> None:
+        """Detiene el prefetch al llegar un mensaje del usuario."""
+        self.prefetcher.pause()
+
+    def resume_prefetch(self) -> None:
+        """Reanuda el prefetch pendiente al terminar el turno."""
+        self.prefetcher.resume()
+
+    def get(self, name: str) -> IngestedReport | None:
+        with self._lock:
+            return self._reports.get(name)
+
+    def statuses(self) -> dict[str, ReportStatus]:
+        with self._lock:
+            return {name: entry.status for name, entry in self._reports.items()}
+
+    def errors(self) -> dict[str, str]:
+        with self._lock:
+            return {
+                name: entry.error
+                for name, entry in self._reports.items()
+                if entry.status == ReportStatus.FAILED
+            }
+
+    def pending(self) -> bool:
+        """True si algún reporte está en cola o procesándose."""
+        return any(
+            status in (ReportStatus.QUEUED, ReportStatus.PROCESSING)
+            for status in self.statuses().values()
+        )
+
+    def wait(
+        self, names: list[str] | None = None, timeout: float | None = None
+    ) -> dict[str, str]:
+        """
+        Espera a que terminen los reportes indicados (o todos) y devuelve sus resúmenes.
+
+        Los reportes que fallaron se omiten del resultado.
+        """
+        with self._lock:
+            entries = [
+                entry
+                for name, entry in self._reports.items()
+                if names is None or name in names
+            ]
+
+        summaries = {}
+        for entry in entries:
+            if entry.future is not None:
+                entry.future.result(timeout=timeout)
+            if entry.status == ReportStatus.READY:
+                summaries[entry.name] = entry.summary
+        return summaries
+
+    def _ingest(self, entry: IngestedReport, report: dict, preprocessed: bool) -> None:
+        entry.status = ReportStatus.PROCESSING
+        trace = None
+        try:
+            with start_trace("ingest_report", report=entry.name) as trace:
+                if preprocessed:
+                    entry.processed = report
+                else:
+                    with span("preprocess"):
+                        entry.processed = preprocess_lighthouse_report(report)
+                entry.summary = summarize_preprocessed_report(entry.processed)
+        except Exception as e:
+            entry.error = str(e) or type(e).__name__
+        if trace is not None:
+            entry.trace = trace.as_dict()
+        entry.status = ReportStatus.FAILED if entry.error else ReportStatus.READY
+        if entry.status == ReportStatus.READY:
+            self.prefetcher.schedule(entry.name, entry.processed)
+        if entry.status == ReportStatus.READY and self._on_ready is not None:
+            try:
+                self._on_ready(entry)
+            except Exception:
+                # Persistir es opcional: el reporte sigue listo en memoria
+                pass
@@ -1,8 +1,99 @@
+import asyncio
+import contextvars
+import hashlib
 import os
-import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 from groq import Groq
-from .prompts import SYSTEM_PROMPT
+from .cache import (
+    SummaryCache,
+    get_summary_cache,
+    report_hash,
+    summary_cache_key_for_hash,
+    summary_node_key,
+)
+from .chunking import chunk_report, chunking_mode
+from .clients import get_async_groq_client, get_groq_client
+from .compare import build_comparison_context
+from .context import ContextAccounting, ContextBudget, fit_context
+from .digest import build_report_digest
+from .prompts import (
+    CHUNK_SUMMARY_PROMPT,
+    FOCUSED_SUMMARY_PROMPT,
+    FUSION_SUMMARY_PROMPT,
+    OUT_OF_SCOPE_REPLY,
+    SUMMARY_PROMPT_VERSION,
+    get_scope_validation_prompt,
+    get_system_prompt,
+)
+from .report_model import PreprocessedReport
+from .response_cache import cacheable_question, get_response_cache
+from .retrieval import select_report_context
+from .routing import (
+    Route,
+    RouteDecision,
+    check_fast_answer,
+    decide_route,
+    fast_max_tokens,
+    record_route,
+)
+from .scope import Scope, ScopeResult, classify_scope, parse_scope_answer, scope_mode
+from .singleflight import SingleFlight, completion_key
+from .telemetry import record_usage, span
+from .ratelimit import TokenRateLimiter, call_with_backoff, estimate_request_tokens
+from .tokens import count_message_tokens, count_tokens
+
+# Modelo pequeño para resúmenes y modelo principal para las respuestas
+SUMMARY_MODEL = "llama-3.1-8b-instant"
+CHAT_MODEL = "llama-3.3-70b-versatile"
+# Modelo para los turnos sencillos del chat (ver core/routing.py)
+FAST_CHAT_MODEL = SUMMARY_MODEL
+
+
+def response_prompt_version() -> str:
+    """
+    Versión de las respuestas para la caché de respuestas: cambia con el modelo o
+    el system prompt (también con el perfil de SYSTEM_PROMPT_PROFILE), así que no
+    hace falta invalidarla a mano.
+    """
+    return hashlib.sha256(f"{CHAT_MODEL}\n{get_system_prompt()}".encode("utf-8")).hexdigest()[:12]
+
+
+# Claves que nunca se conservan: datos grandes o ya resumidos en el preprocesamiento
+_SKIPPED_KEYS = frozenset(
+    {
+        "full-page-screenshot",
+        "screenshot",
+        "screenshots",
+        "trace",
+        "traces",
+        "network-requests",
+        "items",  # Ya manejamos items en preprocess
+    }
+)
+
+# Campos de cada auditoría que se conservan, en el orden de salida
+_AUDIT_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "score",
+    "scoreDisplayMode",
+    "displayValue",
+    "numericValue",
+    "numericUnit",
+)
+
+_MAX_VALUE_LENGTH = 5000
+
+# Inicio del resumen de respaldo cuando falla el modelo (no se guarda en cachés)
+FALLBACK_SUMMARY_PREFIX = "Resumen generado sin modelo"
+
+# Peticiones idénticas simultáneas de varias sesiones (ver core/singleflight.py)
+_summary_flight = SingleFlight("summary")
+_node_flight = SingleFlight("summary_node")
+_completion_flight = SingleFlight("completion")
 
 
 def preprocess_lighthouse_report(report: dict) -> dict:
@@ -11,6 +102,7 @@ def preprocess_lighthouse_report(report: dict) -> dict:
 
     Mantiene:
     - categories.*.score
+    - categories.*.auditWeights (peso de cada auditoría con peso > 0, de auditRefs)
     - audits.*.score, title, description, displayValue
     - audits.*.details.summary (si existe)
     - Métricas principales: runtimeError, configSettings, timing, finalUrl, requestedUrl
@@ -21,8 +113,13 @@ def preprocess_lighthouse_report(report: dict) -> dict:
     - traces
     - network-requests completos
     - Cualquier valor cuya longitud como string supere 5000 caracteres
+
+    La selección de campos, el filtrado de claves y el recorte de valores largos se
+    hacen en una sola pasada: cada valor se limpia al copiarlo (con las reglas de
+    _remove_large_values) en lugar de recorrer de nuevo el resultado.
     """
-    processed = {}
+    processed = PreprocessedReport()
+    max_length = _MAX_VALUE_LENGTH
 
     # Campos principales a mantener directamente
     top_level_fields = [
@@ -37,71 +134,111 @@ def preprocess_lighthouse_report(report: dict) -> dict:
 
     for field in top_level_fields:
         if field in report:
-            processed[field] = report[field]
+            _put_clean(processed, field, report[field], max_length)
 
     # Procesar configSettings (mantener solo configuración básica)
     if "configSettings" in report:
         config = report["configSettings"]
-        processed["configSettings"] = {
-            "emulatedFormFactor": config.get("emulatedFormFactor"),
-            "locale": config.get("locale"),
-            "onlyCategories": config.get("onlyCategories"),
-        }
+        processed_config = {}
+        for key in ("emulatedFormFactor", "locale", "onlyCategories"):
+            _put_clean(processed_config, key, config.get(key), max_length)
+        processed["configSettings"] = processed_config
 
     # Procesar categories (mantener scores y títulos)
     if "categories" in report:
-        processed["categories"] = {}
+        processed_categories = {}
         for category_id, category_data in report["categories"].items():
-            processed["categories"][category_id] = {
-                "id": category_data.get("id"),
-                "title": category_data.get("title"),
-                "score": category_data.get("score"),
-                "description": category_data.get("description"),
+            if category_id in _SKIPPED_KEYS:
+                continue
+
+            processed_category = {}
+            for key in ("id", "title", "score", "description"):
+                _put_clean(processed_category, key, category_data.get(key), max_length)
+
+            # Pesos de las auditorías que cuentan para la puntuación de la categoría
+            audit_weights = {
+                ref["id"]: ref["weight"]
+                for ref in category_data.get("auditRefs", [])
+                if ref.get("weight")
             }
+            if audit_weights:
+                processed_category["auditWeights"] = _remove_large_values(
+                    audit_weights, max_length
+                )
+
+            processed_categories[category_id] = processed_category
+        processed["categories"] = processed_categories
 
     # Procesar audits (mantener solo información esencial)
     if "audits" in report:
-        processed["audits"] = {}
+        processed_audits = {}
         for audit_id, audit_data in report["audits"].items():
-            processed_audit = {
-                "id": audit_data.get("id"),
-                "title": audit_data.get("title"),
-                "description": audit_data.get("description"),
-                "score": audit_data.get("score"),
-                "scoreDisplayMode": audit_data.get("scoreDisplayMode"),
-                "displayValue": audit_data.get("displayValue"),
-                "numericValue": audit_data.get("numericValue"),
-                "numericUnit": audit_data.get("numericUnit"),
-            }
+            if audit_id in _SKIPPED_KEYS:
+                continue
+
+            processed_audit = {}
+            for key in _AUDIT_FIELDS:
+                value = audit_data.get(key)
+                # Camino rápido para los valores escalares habituales
+                if value is None:
+                    continue
+                if isinstance(value, str):
+                    if len(value) > max_length:
+                        _put_clean(processed_audit, key, value, max_length)
+                    else:
+                        processed_audit[key] = value
+                elif isinstance(value, (dict, list)):
+                    _put_clean(processed_audit, key, value, max_length)
+                else:
+                    processed_audit[key] = value
 
             # Mantener solo el summary de details, NO los items completos
-            if "details" in audit_data and isinstance(audit_data["details"], dict):
-                details = audit_data["details"]
+            details = audit_data.get("details")
+            if isinstance(details, dict):
                 processed_details = {}
+                has_details = False
 
                 # Mantener summary si existe
                 if "summary" in details:
-                    processed_details["summary"] = details["summary"]
+                    _put_clean(processed_details, "summary", details["summary"], max_length)
+                    has_details = True
 
                 # Mantener type para contexto
                 if "type" in details:
-                    processed_details["type"] = details["type"]
+                    _put_clean(processed_details, "type", details["type"], max_length)
+                    has_details = True
 
                 # Si hay items, solo contar cuántos hay, no incluir el array completo
-                if "items" in details and isinstance(details["items"], list):
-                    processed_details["itemsCount"] = len(details["items"])
+                items = details.get("items")
+                if isinstance(items, list):
+                    processed_details["itemsCount"] = len(items)
+                    has_details = True
 
-                if processed_details:
+                if has_details:
                     processed_audit["details"] = processed_details
 
-            processed["audits"][audit_id] = processed_audit
-
-    # Eliminar cualquier valor que sea demasiado largo
-    processed = _remove_large_values(processed, max_length=5000)
+            processed_audits[audit_id] = processed_audit
+        processed["audits"] = processed_audits
 
     return processed
 
 
+def _put_clean(target: dict, key: str, value: Any, max_length: int) -> None:
+    """
+    Asigna target[key] = value con las mismas reglas que _remove_large_values:
+    omite claves conocidas y valores None, y recorta textos demasiado largos.
+    """
+    if key in _SKIPPED_KEYS:
+        return
+
+    value = _remove_large_values(value, max_length)
+
+    if isinstance(value, str) and len(value) > max_length:
+        target[key] = f"[Valor muy largo - {len(value)} caracteres]"
+    elif value is not None:
+        target[key] = value
+
+
 def _remove_large_values(obj: Any, max_length: int = 5000) -> Any:
     """
     Recursivamente elimina valores cuya representación en string supere max_length.
@@ -110,15 +247,7 @@ def _remove_large_values(obj: Any, max_length: int = 5000) -> Any:
         result = {}
         for key, value in obj.items():
             # Saltar campos que sabemos que son grandes
-            if key in [
-                "full-page-screenshot",
-                "screenshot",
-                "screenshots",
-                "trace",
-                "traces",
-                "network-requests",
-                "items",  # Ya manejamos items en preprocess
-            ]:
+            if key in _SKIPPED_KEYS:
                 continue
 
             processed_value = _remove_large_values(value, max_length)
@@ -140,163 +269,963 @@ def _remove_large_values(obj: Any, max_length: int = 5000) -> Any:
         return obj
 
 
-def summarize_preprocessed_report(preprocessed: dict) -> str:
+def _env_int(name: str, default: int | None) -> int | None:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def _summarize_chunk(
+    client: Groq,
+    chunk: str,
+    idx: int,
+    total: int,
+    rate_limiter: TokenRateLimiter | None = None,
+) -> str:
+    """Resume un único trozo del reporte con el modelo pequeño."""
+    messages = [
+        {"role": "system", "content": CHUNK_SUMMARY_PROMPT},
+        {
+            "role": "user",
+            "content": f"Fragmento {idx + 1} de {total}:\n\n{chunk}",
+        },
+    ]
+
+    with span("chunk_summary", chunk=idx + 1, chunks=total) as stage:
+        if rate_limiter is not None:
+            rate_limiter.acquire(
+                estimate_request_tokens(CHUNK_SUMMARY_PROMPT + chunk, max_tokens=800)
+            )
+
+        response = call_with_backoff(
+            lambda: client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=800,
+                top_p=1,
+                stream=False,
+            )
+        )
+        record_usage(stage, SUMMARY_MODEL, response.usage)
+
+    return response.choices[0].message.content
+
+
+# Separador entre resúmenes parciales al fusionarlos o concatenarlos
+_SUMMARY_SEPARATOR = "\n\n---\n\n"
+
+
+def _summary_tree_settings() -> tuple[int, int]:
+    """
+    Resúmenes por fusión (SUMMARY_FAN_IN, 4 por defecto) y tokens a partir de los
+    cuales se fusionan (SUMMARY_TARGET_TOKENS, 4000 por defecto).
+    """
+    fan_in = max(2, _env_int("SUMMARY_FAN_IN", 4))
+    target_tokens = _env_int("SUMMARY_TARGET_TOKENS", 4000)
+    return fan_in, target_tokens
+
+
+def _cached_node(cache: SummaryCache, kind: str, text: str, compute) -> str:
+    """Resumen de un nodo del árbol desde la caché, o calculado con compute()."""
+    key = summary_node_key(kind, text, SUMMARY_MODEL, SUMMARY_PROMPT_VERSION)
+    summary = cache.get(key)
+    if summary is None:
+        # Un trozo idéntico de otro resumen en curso (otra sesión, otro reporte con
+        # esa parte igual) se calcula una sola vez
+        summary = _node_flight.do(key, lambda: _compute_node(cache, key, compute))
+    return summary
+
+
+def _compute_node(cache: SummaryCache, key: str, compute) -> str:
+    summary = compute()
+    cache.put(key, summary)
+    return summary
+
+
+def _merge_summaries(
+    client: Groq,
+    combined: str,
+    level: int,
+    group: int,
+    rate_limiter: TokenRateLimiter | None = None,
+) -> str:
+    """Fusiona un grupo de resúmenes parciales con el modelo pequeño."""
+    messages = [
+        {"role": "system", "content": FUSION_SUMMARY_PROMPT},
+        {"role": "user", "content": combined},
+    ]
+
+    with span("fusion_summary", level=level, group=group + 1) as stage:
+        if rate_limiter is not None:
+            rate_limiter.acquire(
+                estimate_request_tokens(FUSION_SUMMARY_PROMPT + combined, max_tokens=1500)
+            )
+
+        response = call_with_backoff(
+            lambda: client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=1500,
+                top_p=1,
+                stream=False,
+            )
+        )
+        record_usage(stage, SUMMARY_MODEL, response.usage)
+
+    return response.choices[0].message.content
+
+
+def _map_in_context(executor: ThreadPoolExecutor, fn, items: list) -> list:
+    """
+    fn(índice, elemento) para cada elemento en el pool, conservando el orden. Cada
+    tarea se ejecuta en una copia del contexto para heredar la traza activa.
+    """
+    contexts = [contextvars.copy_context() for _ in items]
+    return list(
+        executor.map(lambda index: contexts[index].run(fn, index, items[index]), range(len(items)))
+    )
+
+
+def report_summary_cache_key(preprocessed: dict, mode: str | None = None) -> str:
+    """Clave del resumen "llm" de un reporte en la caché de resúmenes."""
+    return _summary_key_for_hash(report_hash(preprocessed), mode)
+
+
+def _summary_key_for_hash(digest: str, mode: str | None = None) -> str:
+    # El troceado y la forma del árbol cambian el resultado, así que forman parte
+    # de la clave
+    fan_in, target_tokens = _summary_tree_settings()
+    version = f"{SUMMARY_PROMPT_VERSION}:{mode or chunking_mode()}:{fan_in}:{target_tokens}"
+    return summary_cache_key_for_hash(digest, SUMMARY_MODEL, version)
+
+
+def stored_summary_key(digest: str, strategy: str | None = None) -> str:
+    """
+    Clave del resumen de un reporte (por su report_hash) en el almacén de sesiones.
+
+    Con la estrategia "llm" es la misma que en la caché de resúmenes
+    (report_summary_cache_key), así que cambiar de modelo, prompt, troceado o forma
+    del árbol no reutiliza un resumen guardado con otra configuración.
+    """
+    if strategy is None:
+        strategy = os.getenv("SUMMARY_STRATEGY", "llm")
+    if strategy == "digest":
+        return summary_cache_key_for_hash(digest, "digest", "")
+    return _summary_key_for_hash(digest)
+
+
+def summarize_preprocessed_report(
+    preprocessed: dict,
+    max_concurrency: int | None = None,
+    tokens_per_minute: int | None = None,
+    strategy: str | None = None,
+    rate_limiter: TokenRateLimiter | None = None,
+) -> str:
     """
     Resume un reporte preprocesado de Lighthouse en texto conciso.
 
-    1. Convierte el JSON preprocesado a texto
-    2. Lo divide en trozos de máximo 3000 caracteres
-    3. Envía cada trozo al modelo llama-3.1-8b-instant para resumir
-    4. Fusiona los resúmenes en un texto final < 5000 tokens
+    Con la estrategia "digest" no se llama al modelo: se devuelve el resumen
+    determinista de build_report_digest. Con la estrategia "llm" (por defecto):
+
+    1. Divide el reporte en trozos de auditorías completas agrupadas por
+       categoría, con un presupuesto de tokens por trozo (ver core/chunking.py)
+    2. Envía cada trozo al modelo llama-3.1-8b-instant para resumir
+    3. Si los resúmenes no caben juntos en SUMMARY_TARGET_TOKENS, los fusiona en
+       árbol: grupos de SUMMARY_FAN_IN resúmenes por llamada, nivel a nivel, hasta
+       que quepan; después los concatena en el orden original de los trozos
+
+    Los trozos y las fusiones de cada nivel se hacen en paralelo con un pool de
+    hilos acotado. Los errores 429 se reintentan con espera exponencial.
+
+    El resultado se guarda en la caché de resúmenes, indexado por el hash del
+    reporte, el modelo y la versión del prompt, así que un reporte ya resumido
+    no vuelve a llamar al modelo. Cada trozo y cada fusión se guardan también por
+    su texto de entrada: si cambia una parte del reporte, solo se recalculan su
+    trozo y las fusiones de su camino hasta la raíz. Si Groq falla o no responde a tiempo
+    (SUMMARY_TIMEOUT segundos por llamada, 30 por defecto) se usa el resumen
+    determinista.
+
+    Args:
+        preprocessed: Reporte devuelto por preprocess_lighthouse_report
+        max_concurrency: Llamadas simultáneas al modelo (por defecto
+            SUMMARY_MAX_CONCURRENCY o 4). Con 1 se resumen en serie.
+        tokens_per_minute: Límite de tokens por minuto (por defecto
+            SUMMARY_TOKENS_PER_MINUTE o sin límite)
+        strategy: "llm" o "digest" (por defecto SUMMARY_STRATEGY o "llm")
+        rate_limiter: Limitador compartido entre varios resúmenes; si se pasa,
+            se ignora tokens_per_minute
 
     Returns:
         str: Resumen en texto del reporte para usar como contexto
     """
+    if strategy is None:
+        strategy = os.getenv("SUMMARY_STRATEGY", "llm")
+    if strategy == "digest":
+        with span("digest"):
+            return build_report_digest(preprocessed)
+
+    cache = get_summary_cache()
+    with span("summary_cache"):
+        mode = chunking_mode()
+        cache_key = report_summary_cache_key(preprocessed, mode)
+        cached_summary = cache.get(cache_key)
+    if cached_summary is not None:
+        return cached_summary
+
+    # Las sesiones que resumen a la vez el mismo reporte comparten una ejecución
+    return _summary_flight.do(
+        cache_key,
+        lambda: _summarize_with_model(
+            preprocessed, cache, cache_key, mode, max_concurrency, tokens_per_minute, rate_limiter
+        ),
+    )
+
+
+def _summarize_with_model(
+    preprocessed: dict,
+    cache: SummaryCache,
+    cache_key: str,
+    mode: str,
+    max_concurrency: int | None,
+    tokens_per_minute: int | None,
+    rate_limiter: TokenRateLimiter | None,
+) -> str:
+    """Resumen en árbol con el modelo pequeño (ver summarize_preprocessed_report)."""
+    if max_concurrency is None:
+        max_concurrency = _env_int("SUMMARY_MAX_CONCURRENCY", 4)
+    if tokens_per_minute is None:
+        tokens_per_minute = _env_int("SUMMARY_TOKENS_PER_MINUTE", None)
+
     try:
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
-        # Convertir el JSON preprocesado a texto legible
-        report_text = json.dumps(preprocessed, indent=2, ensure_ascii=False)
-
-        # Dividir en trozos de máximo 3000 caracteres
-        chunk_size = 3000
-        chunks = []
-        for i in range(0, len(report_text), chunk_size):
-            chunks.append(report_text[i : i + chunk_size])
-
-        # Prompt para resumir cada trozo
-        summary_prompt = """Resume este fragmento del reporte de Lighthouse manteniendo solo:
-- problemas principales
-- métricas clave (performance, SEO, accesibilidad)
-- oportunidades de mejora
-- puntuaciones relevantes
-Máximo 800 tokens."""
-
-        # Resumir cada trozo con el modelo pequeño
-        chunk_summaries = []
-        for idx, chunk in enumerate(chunks):
-            messages = [
-                {"role": "system", "content": summary_prompt},
-                {
-                    "role": "user",
-                    "content": f"Fragmento {idx + 1} de {len(chunks)}:\n\n{chunk}",
-                },
-            ]
-
-            response = client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=messages,
-                temperature=0.3,
-                max_tokens=800,
-                top_p=1,
-                stream=False,
+        # Los reintentos ante 429 los gestiona call_with_backoff
+        client = get_groq_client().with_options(
+            max_retries=0,
+            timeout=float(os.getenv("SUMMARY_TIMEOUT", "30")),
+        )
+        if rate_limiter is None and tokens_per_minute:
+            rate_limiter = TokenRateLimiter(tokens_per_minute)
+
+        chunks = chunk_report(preprocessed, mode=mode)
+        fan_in, target_tokens = _summary_tree_settings()
+
+        def summarize_chunk(idx: int, chunk: str) -> str:
+            return _cached_node(
+                cache,
+                "chunk",
+                chunk,
+                lambda: _summarize_chunk(client, chunk, idx, len(chunks), rate_limiter),
             )
 
-            chunk_summaries.append(response.choices[0].message.content)
+        def merge_group(level: int, idx: int, group: list[str]) -> str:
+            if len(group) == 1:
+                return group[0]
+            combined = _SUMMARY_SEPARATOR.join(group)
+            return _cached_node(
+                cache,
+                "fusion",
+                combined,
+                lambda: _merge_summaries(client, combined, level, idx, rate_limiter),
+            )
 
-        # Si hay múltiples resúmenes, fusionarlos
-        if len(chunk_summaries) == 1:
-            final_summary = chunk_summaries[0]
-        else:
-            # Fusionar todos los resúmenes
-            combined_summaries = "\n\n---\n\n".join(chunk_summaries)
-
-            # Si el combinado es muy largo, hacer un resumen final
-            if len(combined_summaries) > 15000:  # ~5000 tokens aproximadamente
-                fusion_prompt = """Fusiona estos resúmenes del reporte de Lighthouse en un solo resumen coherente.
-Mantén:
-- Todas las puntuaciones de categorías principales
-- Problemas críticos identificados
-- Métricas clave de rendimiento
-- Oportunidades de mejora más importantes
-Máximo 1500 tokens."""
-
-                messages = [
-                    {"role": "system", "content": fusion_prompt},
-                    {"role": "user", "content": combined_summaries},
-                ]
-
-                response = client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
+        workers = max(1, min(max_concurrency, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Resumir cada trozo con el modelo pequeño
+            summaries = _map_in_context(executor, summarize_chunk, chunks)
+
+            # Fusión en árbol: mientras los resúmenes no quepan juntos en
+            # target_tokens, se fusionan en grupos de fan_in (en paralelo dentro de
+            # cada nivel), así que la profundidad crece con el logaritmo del número
+            # de trozos
+            level = 0
+            while (
+                len(summaries) > 1
+                and count_tokens(_SUMMARY_SEPARATOR.join(summaries)) > target_tokens
+            ):
+                level += 1
+                groups = [summaries[i : i + fan_in] for i in range(0, len(summaries), fan_in)]
+                summaries = _map_in_context(
+                    executor,
+                    lambda idx, group, level=level: merge_group(level, idx, group),
+                    groups,
+                )
+
+        final_summary = _SUMMARY_SEPARATOR.join(summaries)
+
+        cache.put(cache_key, final_summary)
+        return final_summary
+
+    except Exception as e:
+        # Si falla el resumen, usar el resumen determinista (sin cachearlo)
+        return (
+            f"{FALLBACK_SUMMARY_PREFIX} (error al resumir: {str(e)})\n\n"
+            + build_report_digest(preprocessed)
+        )
+
+
+def summarize_focused_context(context: str, category: str) -> str:
+    """
+    Resume con el modelo pequeño el contexto enfocado de una categoría (el modo
+    summary del prefetch, ver core/prefetch.py), con caché por texto de entrada.
+
+    Raises:
+        Exception: Los errores de Groq; el prefetch usa entonces el contexto sin resumir
+    """
+    system_prompt = FOCUSED_SUMMARY_PROMPT.format(category=category)
+
+    def compute() -> str:
+        client = get_groq_client().with_options(
+            max_retries=0,
+            timeout=float(os.getenv("SUMMARY_TIMEOUT", "30")),
+        )
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": context},
+        ]
+        with span("focused_summary", category=category) as stage:
+            response = call_with_backoff(
+                lambda: client.chat.completions.create(
+                    model=SUMMARY_MODEL,
                     messages=messages,
                     temperature=0.3,
-                    max_tokens=1500,
+                    max_tokens=600,
                     top_p=1,
                     stream=False,
                 )
+            )
+            record_usage(stage, SUMMARY_MODEL, response.usage)
+        return response.choices[0].message.content
 
-                final_summary = response.choices[0].message.content
-            else:
-                final_summary = combined_summaries
+    return _cached_node(get_summary_cache(), "focused", f"{system_prompt}\n\n{context}", compute)
 
-        return final_summary
 
-    except Exception as e:
-        # Si falla el resumen, devolver una representación básica
-        categories_info = ""
-        if "categories" in preprocessed:
-            categories_info = "\n\nCategorías:\n"
-            for cat_id, cat_data in preprocessed["categories"].items():
-                score = cat_data.get("score", 0) * 100
-                title = cat_data.get("title", cat_id)
-                categories_info += f"- {title}: {score:.0f}/100\n"
+def _build_reports_context(
+    report_summaries: dict[str, str], comparison: str | None = None
+) -> str:
+    """
+    Mensaje de sistema con el resumen de cada reporte cargado y, si hay varios,
+    la tabla de comparación calculada localmente. Va después del system prompt,
+    en su propio mensaje, para que este no cambie al cargar o quitar reportes.
+    """
+    reports_context = "## REPORTES LIGHTHOUSE DISPONIBLES\n\n"
+    reports_context += (
+        "El usuario ha cargado los siguientes reportes de Google Lighthouse. "
+        "A continuación se presenta un resumen de cada reporte (o, para "
+        "preguntas concretas, las auditorías relevantes):\n\n"
+    )
 
-        return f"Error al resumir reporte: {str(e)}\n\nInformación básica:{categories_info}"
+    for file_name, summary in report_summaries.items():
+        reports_context += f"### Reporte: {file_name}\n\n"
+        reports_context += summary
+        reports_context += "\n\n---\n\n"
 
+    if comparison:
+        reports_context += comparison + "\n\n---\n\n"
 
-def get_model_response(messages: list[dict], lighthouse_reports: dict = None, temperature: float = 0.7) -> str:
-    try:
-        # Debug: imprimir temperatura recibida
-        print(f"[DEBUG] Temperatura recibida en get_model_response: {temperature}")
+    reports_context += (
+        "\nUsa estos resúmenes para responder las preguntas del usuario. "
+        "Si el usuario hace una pregunta que requiere análisis de un reporte "
+        "y ya tienes reportes cargados, analízalos automáticamente. "
+        "Si el usuario pregunta algo que no requiere un reporte específico, "
+        "responde normalmente con tus conocimientos sobre optimización web.\n\n"
+        "NOTA: Los resúmenes incluyen las métricas clave, problemas principales "
+        "y oportunidades de mejora identificadas en los reportes."
+    )
+    return reports_context
 
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
-        system_message = {"role": "system", "content": SYSTEM_PROMPT}
+def _build_chat_messages(
+    messages: list[dict],
+    lighthouse_reports: dict | None,
+    report_summaries: dict[str, str] | None,
+    budget: ContextBudget | None = None,
+    processed_reports: dict[str, dict] | None = None,
+) -> tuple[list[dict], ContextAccounting]:
+    """
+    Mensajes para el modelo principal: system prompt + contexto de reportes +
+    historial, ajustados al presupuesto de tokens, junto con el desglose de tokens.
 
-        # Si hay reportes cargados, preprocesarlos, resumirlos e incluirlos en el contexto
-        if lighthouse_reports:
-            reports_context = "\n\n## REPORTES LIGHTHOUSE DISPONIBLES\n\n"
-            reports_context += (
-                "El usuario ha cargado los siguientes reportes de Google Lighthouse. "
-                "A continuación se presenta un resumen de cada reporte:\n\n"
+    Con processed_reports, las preguntas concretas reciben solo las auditorías
+    relevantes de cada reporte en vez del resumen (ver core/retrieval.py).
+    """
+    # Si hay reportes cargados sin resumir, preprocesarlos y resumirlos
+    if report_summaries is None and lighthouse_reports:
+        processed_reports = {
+            file_name: preprocess_lighthouse_report(report_data)
+            for file_name, report_data in lighthouse_reports.items()
+        }
+        report_summaries = {
+            file_name: summarize_preprocessed_report(processed)
+            for file_name, processed in processed_reports.items()
+        }
+
+    comparison = None
+    if report_summaries:
+        question = str(messages[-1].get("content", "")) if messages else ""
+        with span("select_context"):
+            report_summaries = select_report_context(
+                question, report_summaries, processed_reports
             )
+        # Con varios reportes, diferencias exactas calculadas localmente
+        if processed_reports and len(processed_reports) >= 2:
+            with span("compare", reports=len(processed_reports)):
+                comparison = build_comparison_context(
+                    processed_reports, max_tokens=_env_int("COMPARISON_MAX_TOKENS", 800)
+                )
+
+    system_prompt = get_system_prompt()
+    plan = fit_context(
+        system_tokens=count_message_tokens([{"content": system_prompt}]),
+        messages=messages,
+        report_summaries=report_summaries,
+        budget=budget,
+        reports_overhead_tokens=count_message_tokens(
+            [{"content": _build_reports_context({}, comparison)}]
+        ),
+    )
 
-            for file_name, report_data in lighthouse_reports.items():
-                # Preprocesar el reporte para reducir su tamaño
-                processed_report = preprocess_lighthouse_report(report_data)
-
-                # Generar resumen del reporte preprocesado
-                summary = summarize_preprocessed_report(processed_report)
-
-                reports_context += f"### Reporte: {file_name}\n\n"
-                reports_context += summary
-                reports_context += "\n\n---\n\n"
-
-            reports_context += (
-                "\nUsa estos resúmenes para responder las preguntas del usuario. "
-                "Si el usuario hace una pregunta que requiere análisis de un reporte "
-                "y ya tienes reportes cargados, analízalos automáticamente. "
-                "Si el usuario pregunta algo que no requiere un reporte específico, "
-                "responde normalmente con tus conocimientos sobre optimización web.\n\n"
-                "NOTA: Los resúmenes incluyen las métricas clave, problemas principales "
-                "y oportunidades de mejora identificadas en los reportes."
+    # El system prompt va solo y siempre igual al principio: es un prefijo común a
+    # todas las peticiones que el proveedor puede reutilizar (caché de prefijos).
+    # Lo que cambia (reportes, comparación) va en un segundo mensaje de sistema.
+    chat_messages = [{"role": "system", "content": system_prompt}]
+    if plan.report_summaries:
+        reports_context = _build_reports_context(plan.report_summaries, comparison)
+        chat_messages.append({"role": "system", "content": reports_context})
+
+    return chat_messages + plan.messages, plan.accounting
+
+
+def _local_scope(messages: list[dict], has_reports: bool) -> ScopeResult | None:
+    """
+    Clasificación local de la última pregunta (ver core/scope.py), o None si no se
+    comprueba. Las dudosas solo quedan como AMBIGUOUS si hay que consultarlas con el
+    modelo pequeño: sin reportes ni turnos anteriores, que la pregunta sola no refleja.
+    """
+    mode = scope_mode()
+    if mode == "off" or not messages or messages[-1].get("role") != "user":
+        return None
+    with span("scope") as stage:
+        result = classify_scope(str(messages[-1].get("content", "")))
+        stage.attributes["scope"] = result.scope.value
+    follow_up = has_reports or any(message.get("role") == "user" for message in messages[:-1])
+    if result.scope is Scope.AMBIGUOUS and (mode == "local" or follow_up):
+        result.scope = Scope.IN_SCOPE
+    return result
+
+
+def _scope_request(question: str) -> dict:
+    return {
+        "model": SUMMARY_MODEL,
+        "messages": [{"role": "user", "content": get_scope_validation_prompt(question)}],
+        "temperature": 0,
+        "max_tokens": 40,
+        "stream": False,
+    }
+
+
+def validate_scope(question: str) -> Scope:
+    """Consulta una pregunta dudosa al modelo pequeño; si falla, la deja pasar."""
+    with span("scope_validation") as stage:
+        try:
+            response = get_groq_client().chat.completions.create(**_scope_request(question))
+        except Exception:
+            return Scope.IN_SCOPE
+        record_usage(stage, SUMMARY_MODEL, response.usage)
+        stage.attributes["scope"] = parse_scope_answer(response.choices[0].message.content or "")
+        return stage.attributes["scope"]
+
+
+async def avalidate_scope(question: str) -> Scope:
+    """Variante asíncrona de validate_scope."""
+    with span("scope_validation") as stage:
+        try:
+            response = await get_async_groq_client().chat.completions.create(
+                **_scope_request(question)
             )
+        except Exception:
+            return Scope.IN_SCOPE
+        record_usage(stage, SUMMARY_MODEL, response.usage)
+        stage.attributes["scope"] = parse_scope_answer(response.choices[0].message.content or "")
+        return stage.attributes["scope"]
 
-            # Agregar contexto de reportes al system prompt
-            enhanced_system_prompt = SYSTEM_PROMPT + "\n\n" + reports_context
-            system_message = {"role": "system", "content": enhanced_system_prompt}
 
-        all_messages = [system_message] + messages
+def _route_turn(messages: list[dict], accounting: ContextAccounting) -> RouteDecision:
+    """Decide qué modelo responde el turno (ver core/routing.py)."""
+    with span("route") as stage:
+        decision = decide_route(
+            messages, report_count=len(accounting.reports), context_tokens=accounting.total
+        )
+        stage.attributes.update(decision.as_attributes())
+    return decision
+
 
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=all_messages,
-            temperature=temperature,
-            max_tokens=2000,
-            top_p=1,
-            stream=False,
+def _coalesced_completion(client: Groq, stage, request: dict):
+    """
+    Petición sin streaming al modelo; las idénticas simultáneas (mismo modelo,
+    mensajes y parámetros) comparten una sola llamada. El uso de tokens se anota
+    solo en el span de la que llama al modelo.
+    """
+
+    def create():
+        response = client.chat.completions.create(**request)
+        record_usage(stage, request["model"], response.usage)
+        return response
+
+    return _completion_flight.do(completion_key(request), create)
+
+
+def _fast_request(all_messages: list[dict], temperature: float) -> dict:
+    return {
+        "model": FAST_CHAT_MODEL,
+        "messages": all_messages,
+        "temperature": temperature,
+        "max_tokens": fast_max_tokens(),
+        "top_p": 1,
+        "stream": False,
+    }
+
+
+def _check_fast_response(decision: RouteDecision, response, question: str) -> str | None:
+    """Texto de la respuesta rápida, o None si no pasa check_fast_answer."""
+    choice = response.choices[0]
+    content = choice.message.content or ""
+    decision.escalated = check_fast_answer(content, question, choice.finish_reason)
+    return None if decision.escalated else content
+
+
+def _fast_answer(
+    client: Groq, all_messages: list[dict], temperature: float, decision: RouteDecision
+) -> str | None:
+    """
+    Respuesta completa del modelo rápido, o None si hay que repetir el turno con el
+    principal (la llamada falla o la respuesta no pasa check_fast_answer).
+    """
+    question = str(all_messages[-1].get("content", ""))
+    start = time.perf_counter()
+    with span("fast_completion", temperature=temperature) as stage:
+        try:
+            request = _fast_request(all_messages, temperature)
+            response = _coalesced_completion(client, stage, request)
+            content = _check_fast_response(decision, response, question)
+        except Exception as e:
+            decision.escalated, content = f"error: {type(e).__name__}", None
+        record_route(decision, Route.FAST, FAST_CHAT_MODEL, time.perf_counter() - start, stage)
+    return content
+
+
+async def _afast_answer(
+    client, all_messages: list[dict], temperature: float, decision: RouteDecision
+) -> str | None:
+    """Variante asíncrona de _fast_answer."""
+    question = str(all_messages[-1].get("content", ""))
+    start = time.perf_counter()
+    with span("fast_completion", temperature=temperature) as stage:
+        try:
+            response = await client.chat.completions.create(
+                **_fast_request(all_messages, temperature)
+            )
+            record_usage(stage, FAST_CHAT_MODEL, response.usage)
+            content = _check_fast_response(decision, response, question)
+        except Exception as e:
+            decision.escalated, content = f"error: {type(e).__name__}", None
+        record_route(decision, Route.FAST, FAST_CHAT_MODEL, time.perf_counter() - start, stage)
+    return content
+
+
+class TurnPlan:
+    """
+    Decisiones de un turno comunes a get_model_response, ResponseStream y
+    AsyncResponseStream: alcance de la pregunta, caché de respuestas, contexto y
+    ruta. Cada punto de entrada solo añade las llamadas a los modelos (síncronas,
+    asíncronas o en streaming).
+
+    plan_turn clasifica la pregunta y la busca en la caché; si `reply` no es None, el
+    turno se responde sin llamar al modelo principal. Si needs_scope_validation()
+    es cierto, la pregunta se consulta al modelo pequeño y su decisión se pasa a
+    apply_scope_validation. build_context arma los mensajes y decide la ruta, y
+    store_response guarda la respuesta final en la caché de respuestas.
+    """
+
+    def __init__(
+        self,
+        messages: list[dict],
+        lighthouse_reports: dict | None,
+        temperature: float,
+        report_summaries: dict[str, str] | None,
+        processed_reports: dict[str, dict] | None,
+    ):
+        self.messages = messages
+        self.lighthouse_reports = lighthouse_reports
+        self.temperature = temperature
+        self.report_summaries = report_summaries
+        self.processed_reports = processed_reports
+        self.scope: ScopeResult | None = None
+        # Pregunta normalizada para la caché de respuestas (None si no se cachea)
+        self.question: str | None = None
+        self.reply: str | None = None
+        self.cached = False
+        self.all_messages: list[dict] | None = None
+        self.accounting: ContextAccounting | None = None
+        self.route: RouteDecision | None = None
+
+    @property
+    def has_reports(self) -> bool:
+        return bool(self.lighthouse_reports or self.report_summaries or self.processed_reports)
+
+    @property
+    def last_question(self) -> str:
+        return str(self.messages[-1].get("content", ""))
+
+    def needs_scope_validation(self) -> bool:
+        return (
+            self.reply is None and self.scope is not None and self.scope.scope is Scope.AMBIGUOUS
         )
 
-        return response.choices[0].message.content
+    def apply_scope_validation(self, scope: Scope) -> None:
+        """Aplica la decisión del modelo pequeño sobre una pregunta dudosa."""
+        self.scope = ScopeResult(scope, "llm", self.scope.score, self.scope.matched)
+        if scope is Scope.OUT_OF_SCOPE:
+            self.reply = OUT_OF_SCOPE_REPLY
+
+    def build_context(self) -> None:
+        """Arma los mensajes para el modelo (ver _build_chat_messages) y decide la ruta."""
+        with span("build_context") as stage:
+            self.all_messages, self.accounting = _build_chat_messages(
+                self.messages,
+                self.lighthouse_reports,
+                self.report_summaries,
+                processed_reports=self.processed_reports,
+            )
+            stage.attributes["context_tokens"] = self.accounting.total
+        self.route = _route_turn(self.messages, self.accounting)
+
+    def completion_request(self, stream: bool) -> dict:
+        """Petición al modelo principal con los mensajes de build_context."""
+        return {
+            "model": CHAT_MODEL,
+            "messages": self.all_messages,
+            "temperature": self.temperature,
+            "max_tokens": 2000,
+            "top_p": 1,
+            "stream": stream,
+        }
+
+    def store_response(self, text: str) -> None:
+        """Guarda la respuesta completa (sin errores) en la caché de respuestas."""
+        if self.question is not None and text:
+            get_response_cache().put(
+                self.question, self.temperature, response_prompt_version(), text
+            )
+
+
+def plan_turn(
+    messages: list[dict],
+    lighthouse_reports: dict | None = None,
+    temperature: float = 0.7,
+    report_summaries: dict[str, str] | None = None,
+    processed_reports: dict[str, dict] | None = None,
+) -> TurnPlan:
+    """
+    Clasifica la última pregunta (ver core/scope.py) y, si puede responderse sin el
+    modelo (fuera de alcance o presente en la caché de respuestas), deja la
+    respuesta en `reply`.
+    """
+    plan = TurnPlan(
+        messages, lighthouse_reports, temperature, report_summaries, processed_reports
+    )
+    plan.scope = _local_scope(messages, plan.has_reports)
+    if plan.scope is not None and plan.scope.scope is Scope.OUT_OF_SCOPE:
+        plan.reply = OUT_OF_SCOPE_REPLY
+        return plan
+
+    with span("response_cache"):
+        cache = get_response_cache()
+        plan.question = cacheable_question(messages, plan.has_reports)
+        if plan.question is None:
+            cache.record_bypass()
+            return plan
+        cached = cache.get(plan.question, temperature, response_prompt_version())
+    if cached is not None:
+        plan.reply, plan.cached = cached, True
+    return plan
+
+
+def get_model_response(
+    messages: list[dict],
+    lighthouse_reports: dict = None,
+    temperature: float = 0.7,
+    report_summaries: dict[str, str] | None = None,
+    processed_reports: dict[str, dict] | None = None,
+) -> str:
+    """
+    Obtiene la respuesta del modelo principal.
+
+    Args:
+        messages: Historial de la conversación
+        lighthouse_reports: Reportes originales; se preprocesan y resumen aquí
+            si no se pasa report_summaries
+        temperature: Temperatura del modelo
+        report_summaries: Resúmenes ya calculados por nombre de reporte (por
+            ejemplo, por la ingestión en segundo plano)
+        processed_reports: Reportes preprocesados por nombre; permiten enviar
+            solo las auditorías relevantes para la pregunta
+
+    El system prompt, los resúmenes y el historial se ajustan al presupuesto de
+    tokens de ContextBudget (ver core/context.py). Las preguntas generales sin
+    reportes ni historial se sirven desde la caché de respuestas si es posible
+    (ver core/response_cache.py), y las que quedan fuera del alcance del asistente
+    reciben OUT_OF_SCOPE_REPLY sin llamar al modelo principal (ver core/scope.py).
+    Las definiciones y continuaciones cortas las responde el modelo rápido si su
+    respuesta pasa una comprobación local (ver core/routing.py).
+    """
+    try:
+        plan = plan_turn(
+            messages, lighthouse_reports, temperature, report_summaries, processed_reports
+        )
+        if plan.needs_scope_validation():
+            plan.apply_scope_validation(validate_scope(plan.last_question))
+        if plan.reply is not None:
+            return plan.reply
+
+        client = get_groq_client()
+        plan.build_context()
+        content = None
+        if plan.route.route is Route.FAST:
+            content = _fast_answer(client, plan.all_messages, temperature, plan.route)
+
+        if content is None:
+            start = time.perf_counter()
+            with span("completion", temperature=temperature) as stage:
+                response = _coalesced_completion(
+                    client, stage, plan.completion_request(stream=False)
+                )
+                record_route(
+                    plan.route, Route.LARGE, CHAT_MODEL, time.perf_counter() - start, stage
+                )
+            content = response.choices[0].message.content
+        plan.store_response(content)
+        return content
     except Exception as e:
         return f"Lo siento, ha ocurrido un error al procesar tu solicitud: {str(e)}"
+
+
+class ResponseStream:
+    """
+    Respuesta del modelo principal en streaming.
+
+    Al iterarla produce los fragmentos de texto a medida que llegan (se puede pasar
+    directamente a st.write_stream). Al terminar, `text` contiene la respuesta
+    completa, `time_to_first_token` / `total_time` los tiempos medidos en segundos
+    y `context_accounting` el desglose de tokens del prompt enviado. Si la
+    respuesta sale de la caché de respuestas, `cached` es True y no hay desglose;
+    `scope` guarda la clasificación de alcance de la pregunta (ver core/scope.py),
+    `route` la decisión de enrutado y `model` el modelo que ha respondido (ver
+    core/routing.py). La respuesta del modelo rápido llega en un solo fragmento,
+    después de comprobarla.
+
+    Si la llamada falla antes del primer token se produce el mismo mensaje de error
+    que get_model_response; si falla a mitad, se conserva lo recibido y se añade un
+    aviso de que la respuesta quedó incompleta.
+    """
+
+    def __init__(
+        self,
+        messages: list[dict],
+        lighthouse_reports: dict | None = None,
+        temperature: float = 0.7,
+        report_summaries: dict[str, str] | None = None,
+        processed_reports: dict[str, dict] | None = None,
+    ):
+        self.messages = messages
+        self.lighthouse_reports = lighthouse_reports
+        self.temperature = temperature
+        self.report_summaries = report_summaries
+        self.processed_reports = processed_reports
+        self.time_to_first_token: float | None = None
+        self.total_time: float | None = None
+        self.error: Exception | None = None
+        self.model: str | None = None
+        self.plan: TurnPlan | None = None
+        self._parts: list[str] = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def context_accounting(self) -> ContextAccounting | None:
+        return self.plan.accounting if self.plan else None
+
+    @property
+    def cached(self) -> bool:
+        return bool(self.plan and self.plan.cached)
+
+    @property
+    def scope(self) -> ScopeResult | None:
+        return self.plan.scope if self.plan else None
+
+    @property
+    def route(self) -> RouteDecision | None:
+        return self.plan.route if self.plan else None
+
+    def timing(self) -> dict:
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "total_time": self.total_time,
+        }
+
+    def _plan_turn(self) -> TurnPlan:
+        self.plan = plan_turn(
+            self.messages,
+            self.lighthouse_reports,
+            self.temperature,
+            self.report_summaries,
+            self.processed_reports,
+        )
+        return self.plan
+
+    def _reply_now(self, text: str, start: float) -> str:
+        """Registra como recibida una respuesta que no viene del modelo principal."""
+        self.time_to_first_token = time.perf_counter() - start
+        self._parts.append(text)
+        return text
+
+    def _receive(self, stage, chunk, start: float) -> str | None:
+        """Texto de un fragmento del streaming, ya registrado (uso y primer token)."""
+        # Groq envía el `usage` de una respuesta en streaming en el último fragmento
+        x_groq = getattr(chunk, "x_groq", None)
+        usage = getattr(x_groq, "usage", None) or getattr(chunk, "usage", None)
+        if usage is not None:
+            record_usage(stage, CHAT_MODEL, usage)
+        if not chunk.choices:
+            return None
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            return None
+
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - start
+            stage.attributes["time_to_first_token"] = round(self.time_to_first_token, 4)
+        self._parts.append(delta)
+        return delta
+
+    def __iter__(self):
+        start = time.perf_counter()
+        try:
+            plan = self._plan_turn()
+            if plan.needs_scope_validation():
+                plan.apply_scope_validation(validate_scope(plan.last_question))
+            if plan.reply is not None:
+                yield self._reply_now(plan.reply, start)
+                return
+
+            client = get_groq_client()
+            plan.build_context()
+            if plan.route.route is Route.FAST:
+                text = _fast_answer(client, plan.all_messages, self.temperature, plan.route)
+                if text is not None:
+                    self.model = FAST_CHAT_MODEL
+                    yield self._reply_now(text, start)
+                    plan.store_response(self.text)
+                    return
+
+            self.model = CHAT_MODEL
+            completion_start = time.perf_counter()
+            with span("completion", temperature=self.temperature) as stage:
+                with client.chat.completions.create(
+                    **plan.completion_request(stream=True)
+                ) as stream:
+                    for chunk in stream:
+                        delta = self._receive(stage, chunk, start)
+                        if delta:
+                            yield delta
+                self._record_large_route(stage, completion_start)
+            plan.store_response(self.text)
+        except Exception as e:
+            yield self._fail(e)
+        finally:
+            self.total_time = time.perf_counter() - start
+
+    def _record_large_route(self, stage, completion_start: float) -> None:
+        record_route(
+            self.route, Route.LARGE, CHAT_MODEL, time.perf_counter() - completion_start, stage
+        )
+
+    def _fail(self, error: Exception) -> str:
+        """Registra el error y devuelve el mensaje que se muestra al usuario."""
+        self.error = error
+        if self._parts:
+            message = f"\n\n⚠️ La respuesta se interrumpió: {str(error)}"
+        else:
+            message = f"Lo siento, ha ocurrido un error al procesar tu solicitud: {str(error)}"
+        self._parts.append(message)
+        return message
+
+
+class AsyncResponseStream(ResponseStream):
+    """
+    ResponseStream para código asíncrono (por ejemplo, el backend HTTP).
+
+    Se itera con `async for` y usa el cliente asíncrono compartido, de modo que
+    muchas respuestas simultáneas no ocupan un hilo cada una. El ensamblado del
+    contexto (conteo de tokens, recuperación de auditorías) se ejecuta en un hilo
+    para no bloquear el bucle de eventos.
+    """
+
+    async def __aiter__(self):
+        start = time.perf_counter()
+        try:
+            plan = self._plan_turn()
+            if plan.needs_scope_validation():
+                plan.apply_scope_validation(await avalidate_scope(plan.last_question))
+            if plan.reply is not None:
+                yield self._reply_now(plan.reply, start)
+                return
+
+            client = get_async_groq_client()
+            await asyncio.to_thread(plan.build_context)
+            if plan.route.route is Route.FAST:
+                text = await _afast_answer(
+                    client, plan.all_messages, self.temperature, plan.route
+                )
+                if text is not None:
+                    self.model = FAST_CHAT_MODEL
+                    yield self._reply_now(text, start)
+                    plan.store_response(self.text)
+                    return
+
+            self.model = CHAT_MODEL
+            completion_start = time.perf_counter()
+            with span("completion", temperature=self.temperature) as stage:
+                stream = await client.chat.completions.create(
+                    **plan.completion_request(stream=True)
+                )
+                async with stream:
+                    async for chunk in stream:
+                        delta = self._receive(stage, chunk, start)
+                        if delta:
+                            yield delta
+                self._record_large_route(stage, completion_start)
+            plan.store_response(self.text)
+        except Exception as e:
+            yield self._fail(e)
+        finally:
+            self.total_time = time.perf_counter() - start
+
+
+def stream_model_response(
+    messages: list[dict],
+    lighthouse_reports: dict = None,
+    temperature: float = 0.7,
+    report_summaries: dict[str, str] | None = None,
+    processed_reports: dict[str, dict] | None = None,
+) -> ResponseStream:
+    """Variante en streaming de get_model_response (mismos argumentos)."""
+    return ResponseStream(
+        messages, lighthouse_reports, temperature, report_summaries, processed_reports
+    )
@@ -0,0 +1,370 @@
+"""
+Contexto enfocado por categoría precalculado tras la ingestión (prefetch).
+
+Con un reporte cargado, las siguientes preguntas son bastante previsibles: la
+categoría más baja, la peor Core Web Vital, las principales oportunidades. En
+cuanto un reporte queda listo, ReportIngestor encola aquí el contexto enfocado de
+sus categorías con menor puntuación (las PREFETCH_CATEGORIES más bajas, 2 por
+defecto, y solo si no llegan a 90):
+
+- PREFETCH_MODE=digest (por defecto): las puntuaciones de todas las categorías y
+  las auditorías suspendidas de la categoría por impacto; en rendimiento, también
+  las Core Web Vitals de peor a mejor y las oportunidades. Sin llamadas al modelo.
+- PREFETCH_MODE=summary: además, el modelo pequeño lo resume centrado en la
+  categoría, con un presupuesto de PREFETCH_TOKEN_BUDGET tokens por reporte.
+- PREFETCH_MODE=off: desactivado.
+
+El trabajo se hace en un único hilo de fondo compartido por el proceso, solo
+mientras la sesión está ociosa: al llegar un mensaje del usuario Prefetcher.pause
+cancela lo que está en cola (y lo que está en curso se detiene antes de la
+siguiente categoría), y al terminar el turno Prefetcher.resume sigue con las
+categorías que faltan.
+
+En el chat, select_report_context (core/retrieval.py) asocia la pregunta a una
+categoría ("accesibilidad", "SEO", "¿cómo mejorar mi LCP?", "¿cuál es la
+categoría más baja?") y, si su contexto enfocado está listo, lo usa en vez de
+recuperar auditorías o enviar el resumen. Cada pregunta asociada a una categoría
+cuenta como acierto o fallo en lighthouse_cache_events_total{cache="prefetch"}.
+"""
+
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from .digest import core_web_vitals, format_score, render_core_web_vitals, render_failing_audits
+from .ratelimit import estimate_request_tokens
+from .report_model import PASSING_SCORE, ReportModel, get_report_model, report_content_hash
+from .telemetry import METRICS, record_cache, span, start_trace
+from .tokens import count_tokens
+
+PREFETCH_MODES = ("digest", "summary", "off")
+DEFAULT_PREFETCH_CATEGORIES = 2
+# Tokens (entrada + salida máxima) que puede gastar el modo summary por reporte
+DEFAULT_PREFETCH_TOKEN_BUDGET = 6000
+# Tokens máximos del contexto enfocado de una categoría
+DEFAULT_FOCUSED_TOKENS = 1000
+# Tokens máximos de salida del resumen enfocado
+FOCUSED_SUMMARY_MAX_TOKENS = 600
+
+_MAX_CONTEXTS_IN_MEMORY = 128
+
+# Palabras clave de cada categoría (sin tildes ni mayúsculas). Solo términos de
+# la categoría en general: las preguntas sobre una auditoría concreta ("contraste
+# de colores") siguen usando la recuperación.
+_CATEGORY_PATTERNS = {
+    "performance": re.compile(
+        r"\b(rendimiento|performance|velocidad|lent[oa]s?|tiempos? de carga|"
+        r"core web vitals?|web vitals?|metricas?|lcp|inp|cls|fcp|tbt|speed index|"
+        r"oportunidades)\b"
+    ),
+    "accessibility": re.compile(r"\b(accesibilidad|accessibility|accesible|a11y)\b"),
+    "best-practices": re.compile(
+        r"\b(buenas practicas|best practices|mejores practicas|practicas recomendadas)\b"
+    ),
+    "seo": re.compile(r"\b(seo|posicionamiento|buscadores)\b"),
+    "pwa": re.compile(r"\b(pwa|progressive web app|aplicacion web progresiva)\b"),
+}
+_WEAKEST_RE = re.compile(
+    r"\b((categoria|puntuacion|nota|area|apartado)s? (mas )?(baja|bajas|debil|debiles|floja)|"
+    r"peor(es)? (categoria|puntuacion|nota|area|apartado)s?|donde (estoy|esta|sale) peor)\b"
+)
+# Categoría a la que se añaden las Core Web Vitals y las oportunidades
+_PERFORMANCE_ID = "performance"
+
+METRICS.describe(
+    "lighthouse_prefetch_contexts_total",
+    "counter",
+    "Contextos enfocados del prefetch por resultado",
+)
+
+
+def prefetch_mode() -> str:
+    mode = os.getenv("PREFETCH_MODE", "digest").lower()
+    return mode if mode in PREFETCH_MODES else "digest"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def _ranked_categories(model: ReportModel) -> list[str]:
+    """Categorías con puntuación < 0.9, de menor a mayor puntuación."""
+    scored = [
+        category
+        for category in model.categories.values()
+        if category.score is not None and category.score < PASSING_SCORE
+    ]
+    return [category.id for category in sorted(scored, key=lambda c: (c.score, c.id))]
+
+
+def prefetch_categories(processed: dict, limit: int | None = None) -> list[str]:
+    """Categorías cuyo contexto enfocado se precalcula (PREFETCH_CATEGORIES más bajas)."""
+    if limit is None:
+        limit = _env_int("PREFETCH_CATEGORIES", DEFAULT_PREFETCH_CATEGORIES)
+    return _ranked_categories(get_report_model(processed))[: max(0, limit)]
+
+
+def build_focused_digest(
+    processed: dict, category_id: str, token_budget: int = DEFAULT_FOCUSED_TOKENS
+) -> str:
+    """
+    Contexto del reporte centrado en una categoría, sin llamadas al modelo.
+
+    Incluye las puntuaciones de todas las categorías y las auditorías suspendidas
+    de la categoría por impacto (recortadas a token_budget); en rendimiento,
+    también las Core Web Vitals de peor a mejor y las oportunidades (auditorías
+    suspendidas sin peso en ninguna categoría).
+    """
+    model = get_report_model(processed)
+    category = model.categories[category_id]
+    lines = [f"URL: {model.url}"]
+    scores = ", ".join(
+        f"{other.title} {format_score(other.score)}" for other in model.categories.values()
+    )
+    lines.append(f"Puntuaciones: {scores}")
+    lines.append("")
+    lines.append(f"### Categoría: {category.title} ({format_score(category.score)}/100)")
+
+    in_category = set(category.audit_positions)
+    if category_id == _PERFORMANCE_ID:
+        vitals = core_web_vitals(model)
+        vitals.sort(key=lambda item: 1.0 if item[1].score is None else item[1].score)
+        if vitals:
+            lines.append("")
+            lines.append("Core Web Vitals (de peor a mejor):")
+            lines.extend(render_core_web_vitals(vitals))
+        weighted = {
+            position
+            for other in model.categories.values()
+            for position in other.audit_positions
+        }
+        in_category |= {position for position in model.failing if position not in weighted}
+
+    failing = [model.audits[position] for position in model.failing if position in in_category]
+    if failing:
+        lines.append("")
+        lines.append(f"Auditorías con problemas ({len(failing)}, por impacto):")
+        used = count_tokens("\n".join(lines))
+        lines.extend(render_failing_audits(failing, token_budget, used))
+    return "\n".join(lines)
+
+
+def match_question_category(question: str, processed: dict) -> str | None:
+    """
+    Categoría del reporte por la que pregunta el usuario, o None.
+
+    "La categoría más baja" es la de menor puntuación del reporte. Si la pregunta
+    nombra varias categorías no se asocia a ninguna.
+    """
+    text = _normalize(question)
+    if not text:
+        return None
+    model = get_report_model(processed)
+    if _WEAKEST_RE.search(text):
+        ranked = _ranked_categories(model)
+        return ranked[0] if ranked else None
+    matches = [
+        category_id
+        for category_id, pattern in _CATEGORY_PATTERNS.items()
+        if category_id in model.categories and pattern.search(text)
+    ]
+    return matches[0] if len(matches) == 1 else None
+
+
+_contexts: OrderedDict[tuple[str, str, str], str] = OrderedDict()
+_contexts_lock = threading.Lock()
+
+
+def _context_key(processed: dict, category_id: str, mode: str) -> tuple[str, str, str]:
+    return (report_content_hash(processed), category_id, mode)
+
+
+def _store_context(key: tuple[str, str, str], context: str) -> None:
+    with _contexts_lock:
+        _contexts[key] = context
+        _contexts.move_to_end(key)
+        while len(_contexts) > _MAX_CONTEXTS_IN_MEMORY:
+            _contexts.popitem(last=False)
+
+
+def _has_context(key: tuple[str, str, str]) -> bool:
+    with _contexts_lock:
+        return key in _contexts
+
+
+def get_focused_context(processed: dict, question: str) -> str | None:
+    """
+    Contexto enfocado ya precalculado para la pregunta, o None.
+
+    Solo las preguntas asociadas a una categoría cuentan en la tasa de aciertos.
+    """
+    mode = prefetch_mode()
+    if mode == "off":
+        return None
+    category_id = match_question_category(question, processed)
+    if category_id is None:
+        return None
+    key = _context_key(processed, category_id, mode)
+    with _contexts_lock:
+        context = _contexts.get(key)
+        if context is not None:
+            _contexts.move_to_end(key)
+    record_cache("prefetch", "miss" if context is None else "hit")
+    return context
+
+
+def clear_focused_contexts() -> None:
+    with _contexts_lock:
+        _contexts.clear()
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Hilo de fondo compartido por todas las sesiones (PREFETCH_WORKERS, 1 por defecto)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, _env_int("PREFETCH_WORKERS", 1)),
+                thread_name_prefix="report-prefetch",
+            )
+        return _executor
+
+
+class Prefetcher:
+    """
+    Prefetch de los reportes de una sesión, que se detiene mientras hay un turno.
+
+    Como ReportIngestor, no usa ninguna API de Streamlit.
+    """
+
+    def __init__(self, summarize: Callable[[str, str], str] | None = None):
+        """
+        Args:
+            summarize: Resume un contexto enfocado (texto, título de la categoría)
+                en el modo summary; sin él se guarda el contexto sin resumir
+        """
+        self._summarize = summarize
+        # Reportes con categorías pendientes, tokens gastados y tarea en curso
+        self._pending: dict[str, dict] = {}
+        self._spent: dict[str, int] = {}
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._paused = threading.Event()
+        # Turnos en curso (el backend comparte un Prefetcher entre varias sesiones)
+        self._active_turns = 0
+
+    def schedule(self, name: str, processed: dict) -> None:
+        """Encola el prefetch de un reporte listo (si la sesión no está en un turno)."""
+        if prefetch_mode() == "off" or not processed:
+            return
+        with self._lock:
+            self._pending[name] = processed
+            if not self._paused.is_set():
+                self._submit(name)
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            self._pending.pop(name, None)
+            self._spent.pop(name, None)
+            future = self._futures.pop(name, None)
+        if future is not None:
+            future.cancel()
+
+    def pause(self) -> None:
+        """Detiene el prefetch al llegar un mensaje del usuario."""
+        with self._lock:
+            self._active_turns += 1
+            self._paused.set()
+            futures = list(self._futures.values())
+        for future in futures:
+            if future.cancel():
+                METRICS.inc("lighthouse_prefetch_contexts_total", result="cancelled")
+
+    def resume(self) -> None:
+        """Continúa con las categorías pendientes al terminar el último turno en curso."""
+        with self._lock:
+            self._active_turns = max(0, self._active_turns - 1)
+            if self._active_turns:
+                return
+            self._paused.clear()
+            for name in self._pending:
+                self._submit(name)
+
+    def pending(self) -> bool:
+        """True si algún reporte tiene categorías sin precalcular."""
+        with self._lock:
+            return bool(self._pending)
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Espera a las tareas en curso o en cola (no a las pausadas)."""
+        with self._lock:
+            futures = list(self._futures.values())
+        for future in futures:
+            if not future.cancelled():
+                future.result(timeout=timeout)
+
+    def _submit(self, name: str) -> None:
+        """Encola la tarea del reporte si no hay otra pendiente (con self._lock)."""
+        future = self._futures.get(name)
+        if future is not None and not future.done():
+            return
+        self._futures[name] = _get_executor().submit(self._run, name, self._pending[name])
+
+    def _reserve(self, name: str, cost: int, budget: int) -> bool:
+        """Descuenta cost del presupuesto de tokens del reporte si cabe."""
+        with self._lock:
+            spent = self._spent.get(name, 0) + cost
+            if spent > budget:
+                return False
+            self._spent[name] = spent
+            return True
+
+    def _run(self, name: str, processed: dict) -> None:
+        mode = prefetch_mode()
+        budget = _env_int("PREFETCH_TOKEN_BUDGET", DEFAULT_PREFETCH_TOKEN_BUDGET)
+        model = get_report_model(processed)
+        with start_trace("prefetch_report", report=name, mode=mode):
+            for category_id in prefetch_categories(processed):
+                if self._paused.is_set():
+                    METRICS.inc("lighthouse_prefetch_contexts_total", result="cancelled")
+                    return
+                key = _context_key(processed, category_id, mode)
+                if _has_context(key):
+                    continue
+                with span("prefetch_category", category=category_id) as stage:
+                    context = build_focused_digest(processed, category_id)
+                    if mode == "summary" and self._summarize is not None:
+                        cost = estimate_request_tokens(context, FOCUSED_SUMMARY_MAX_TOKENS)
+                        if not self._reserve(name, cost, budget):
+                            stage.attributes["skipped"] = "budget"
+                            METRICS.inc("lighthouse_prefetch_contexts_total", result="budget")
+                            break
+                        title = model.categories[category_id].title
+                        try:
+                            context = self._summarize(context, title)
+                        except Exception:
+                            # Sin resumen, el contexto enfocado determinista sigue valiendo
+                            METRICS.inc("lighthouse_prefetch_contexts_total", result="error")
+                _store_context(key, context)
+                METRICS.inc("lighthouse_prefetch_contexts_total", result="ready")
+
+        with self._lock:
+            if self._pending.get(name) is processed:
+                del self._pending[name]
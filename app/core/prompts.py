@@ -3,11 +3,15 @@ System prompts for Google Lighthouse Assistant LLM.
 Este módulo contiene los prompts del sistema para el asistente basado en Google Lighthouse.
 """
 
+import os
+import re
+from functools import lru_cache
+
 SYSTEM_PROMPT = """Eres Google Lighthouse Assistant, un asistente experto especializado en análisis y optimización web basado en Google Lighthouse.
 
 ## IDENTIDAD Y PROPÓSITO
 Eres un asistente técnico profesional que ayuda a desarrolladores, diseñadores y profesionales web a:
-- Analizar y mejorar el rendimiento de sus sitio    s web
+- Analizar y mejorar el rendimiento de sus sitios web
 - Cumplir con estándares de accesibilidad
 - Implementar mejores prácticas web
 - Optimizar para SEO
@@ -210,6 +214,47 @@ Responde SOLO con:
 Explicación breve de tu decisión (una línea)."""
 
 
+# Respuesta fija para las preguntas que el clasificador de alcance (core/scope.py)
+# descarta sin llamar al modelo principal
+OUT_OF_SCOPE_REPLY = """Lo siento, solo puedo ayudarte con temas de rendimiento web, accesibilidad, \
+mejores prácticas, SEO y Progressive Web Apps (PWA), y con el análisis de reportes de Google \
+Lighthouse.
+
+¿Tienes alguna pregunta sobre alguno de estos temas o un reporte que quieras analizar?"""
+
+# Versión de los prompts de resumen. Incrementar al modificar CHUNK_SUMMARY_PROMPT,
+# FUSION_SUMMARY_PROMPT o FOCUSED_SUMMARY_PROMPT para invalidar los resúmenes cacheados.
+SUMMARY_PROMPT_VERSION = "1"
+
+
+# Prompt para resumir cada fragmento del reporte preprocesado
+CHUNK_SUMMARY_PROMPT = """Resume este fragmento del reporte de Lighthouse manteniendo solo:
+- problemas principales
+- métricas clave (performance, SEO, accesibilidad)
+- oportunidades de mejora
+- puntuaciones relevantes
+Máximo 800 tokens."""
+
+
+# Prompt para fusionar los resúmenes parciales en uno solo
+FUSION_SUMMARY_PROMPT = """Fusiona estos resúmenes del reporte de Lighthouse en un solo resumen coherente.
+Mantén:
+- Todas las puntuaciones de categorías principales
+- Problemas críticos identificados
+- Métricas clave de rendimiento
+- Oportunidades de mejora más importantes
+Máximo 1500 tokens."""
+
+
+# Prompt para resumir el contexto enfocado de una categoría (core/prefetch.py)
+FOCUSED_SUMMARY_PROMPT = """Resume esta parte del reporte de Lighthouse centrándote en la categoría {category}.
+Mantén:
+- La puntuación de la categoría y las del resto
+- Los problemas de la categoría, de mayor a menor impacto, con sus valores
+- Las métricas y oportunidades de mejora más importantes de la categoría
+Máximo 600 tokens."""
+
+
 # Diccionario de términos y definiciones clave
 TECHNICAL_TERMS = {
     "Core Web Vitals": "Métricas clave de Google que miden la experiencia del usuario: LCP, FID/INP y CLS",
@@ -315,8 +360,85 @@ LIGHTHOUSE_CATEGORIES = {
 }
 
 
-def get_system_prompt() -> str:
-    return SYSTEM_PROMPT
+# Perfiles del system prompt del modelo principal (SYSTEM_PROMPT_PROFILE)
+PROMPT_PROFILES = ("full", "compact")
+
+# Secciones que el perfil compacto omite: el ejemplo repite el formato de respuesta
+# y el contexto repite las prioridades de las recomendaciones
+_COMPACT_DROPPED_SECTIONS = {"EJEMPLO DE INTERACCIÓN", "INFORMACIÓN DE CONTEXTO"}
+
+# Elemento de lista con viñeta ("- ") o numerado ("1. ")
+_LIST_ITEM_RE = re.compile(r"^(?:-|\d+\.)\s+(.*)$")
+
+
+def _normalize_line(line: str) -> str:
+    return "".join(c for c in line.lower() if c.isalnum())
+
+
+def build_compact_prompt(prompt: str) -> str:
+    """
+    Versión compacta de un system prompt en Markdown, generada a partir del completo:
+
+    - Omite las secciones de _COMPACT_DROPPED_SECTIONS (hasta el siguiente
+      encabezado o separador "---") y los separadores
+    - Omite los elementos de lista repetidos (sin distinguir mayúsculas ni signos)
+    - Une cada lista (viñetas o numerada) en una sola línea separada por "; ",
+      a continuación de su título si lo tiene ("Título: a; b; c")
+    - Elimina las líneas en blanco
+    """
+    lines: list[str] = []
+    items: list[str] = []
+    seen: set[str] = set()
+    skipping = False
+
+    def flush_items():
+        if not items:
+            return
+        joined = "; ".join(items)
+        items.clear()
+        if lines and lines[-1].endswith(("**", ":")) and not lines[-1].startswith("#"):
+            lines[-1] = f"{lines[-1].rstrip(':')}: {joined}"
+        else:
+            lines.append(joined)
+
+    for raw in prompt.splitlines():
+        line = raw.strip()
+        if line.startswith("## ") or line == "---":
+            flush_items()
+            skipping = line[3:].strip() in _COMPACT_DROPPED_SECTIONS
+            if not skipping and line != "---":
+                lines.append(line)
+            continue
+        if skipping or not line:
+            continue
+        item = _LIST_ITEM_RE.match(line)
+        if item:
+            key = _normalize_line(item.group(1))
+            if key not in seen:
+                seen.add(key)
+                items.append(item.group(1))
+            continue
+        flush_items()
+        lines.append(line)
+    flush_items()
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=None)
+def _system_prompt(profile: str) -> str:
+    return build_compact_prompt(SYSTEM_PROMPT) if profile == "compact" else SYSTEM_PROMPT
+
+
+def get_system_prompt(profile: str | None = None) -> str:
+    """
+    System prompt del modelo principal.
+
+    Args:
+        profile: "full" o "compact" (por defecto SYSTEM_PROMPT_PROFILE o "full")
+    """
+    if profile is None:
+        profile = os.getenv("SYSTEM_PROMPT_PROFILE", "full").lower()
+    return _system_prompt(profile if profile in PROMPT_PROFILES else "full")
 
 
 def get_analysis_prompt(report: dict) -> str:
@@ -0,0 +1,105 @@
+"""
+Control de tasa y reintentos para las llamadas a Groq.
+
+- TokenRateLimiter: limita los tokens enviados por minuto (token bucket).
+- call_with_backoff: reintenta una llamada con espera exponencial ante errores 429.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, TypeVar
+
+from groq import RateLimitError
+
+from .telemetry import record_retry
+from .tokens import count_tokens
+
+T = TypeVar("T")
+
+
+def estimate_request_tokens(text: str, max_tokens: int = 0) -> int:
+    """
+    Estimación de los tokens que consume una petición: los del texto de entrada
+    más los tokens máximos de salida, que Groq también contabiliza.
+    """
+    return count_tokens(text) + max_tokens
+
+
+class TokenRateLimiter:
+    """
+    Token bucket compartido entre hilos.
+
+    El bucket se rellena de forma continua a razón de tokens_per_minute / 60 por
+    segundo y nunca supera tokens_per_minute. Una petición mayor que la capacidad
+    se deja pasar cuando el bucket está lleno para no bloquearse indefinidamente.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        if tokens_per_minute <= 0:
+            raise ValueError("tokens_per_minute debe ser mayor que 0")
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self._available = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Bloquea hasta que haya tokens disponibles y los consume.
+
+        Returns:
+            float: Segundos que se esperó
+        """
+        needed = min(float(tokens), self.capacity)
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._available = min(
+                    self.capacity,
+                    self._available + (now - self._updated_at) * self.rate,
+                )
+                self._updated_at = now
+
+                if self._available >= needed:
+                    self._available -= needed
+                    return waited
+
+                delay = (needed - self._available) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+def call_with_backoff(
+    fn: Callable[[], T],
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+) -> T:
+    """
+    Ejecuta fn() reintentando con espera exponencial (con jitter) ante errores 429.
+
+    Si la respuesta incluye la cabecera retry-after se respeta ese valor.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except RateLimitError as e:
+            if attempt >= max_retries:
+                raise
+
+            delay = min(max_delay, base_delay * (2**attempt))
+            retry_after = e.response.headers.get("retry-after") if e.response else None
+            if retry_after:
+                try:
+                    delay = min(max_delay, float(retry_after))
+                except ValueError:
+                    pass
+
+            record_retry("rate_limit")
+            time.sleep(delay + random.uniform(0, delay * 0.1))
+            attempt += 1
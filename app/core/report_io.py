@@ -0,0 +1,133 @@
+"""
+Lectura de reportes Lighthouse subidos por el usuario.
+
+En lugar de construir el árbol JSON completo y guardarlo en la sesión, el parser
+descarta durante la lectura los subárboles que el preprocesamiento nunca conserva
+(capturas de pantalla, trazas, arrays details.items, textos i18n...) y solo se
+guarda en la sesión el reporte preprocesado. Opcionalmente el archivo original se
+vuelca a disco para poder consultarlo más tarde.
+
+Si varias sesiones suben a la vez el mismo archivo, se parsea y preprocesa una sola
+vez y todas reciben el mismo reporte preprocesado (ver core/singleflight.py), que
+no se modifica después de crearse.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import IO
+
+from .model import _SKIPPED_KEYS, preprocess_lighthouse_report
+from .singleflight import SingleFlight
+from .telemetry import span
+
+# Claves que se descartan en cualquier nivel al parsear: las que
+# preprocess_lighthouse_report omite en todo el reporte
+_DROPPED_KEYS = _SKIPPED_KEYS
+
+# Claves del nivel superior del reporte que el preprocesamiento nunca conserva
+_TOP_LEVEL_DROPPED_KEYS = frozenset(
+    {"fullPageScreenshot", "i18n", "categoryGroups", "stackPacks", "entities"}
+)
+
+# Claves de audits.*.details que no se conservan (solo summary, type y len(items));
+# en otros niveles, por ejemplo details.summary.nodes, se mantienen
+_DETAILS_DROPPED_KEYS = frozenset({"headings", "debugData", "nodes"})
+
+
+_preprocess_flight = SingleFlight("preprocess")
+
+
+class _ElidedItems(list):
+    """
+    Sustituto vacío de un array details.items que solo recuerda su longitud.
+
+    preprocess_lighthouse_report solo necesita len(items), así que no hace falta
+    conservar los elementos.
+    """
+
+    __slots__ = ("_count",)
+
+    def __init__(self, count: int):
+        super().__init__()
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def _skeleton_object(pairs: list[tuple[str, object]]) -> dict:
+    obj = {}
+    # Una auditoría: sus details ya están parseados y se podan al construirla
+    is_audit = any(key == "scoreDisplayMode" for key, _ in pairs)
+    for key, value in pairs:
+        if key == "items" and isinstance(value, list):
+            obj[key] = _ElidedItems(len(value))
+        elif key in _DROPPED_KEYS:
+            continue
+        elif is_audit and key == "details" and isinstance(value, dict):
+            for dropped in _DETAILS_DROPPED_KEYS:
+                value.pop(dropped, None)
+            obj[key] = value
+        else:
+            obj[key] = value
+    return obj
+
+
+def parse_report_skeleton(data: bytes | str) -> dict:
+    """
+    Parsea un reporte descartando los subárboles pesados en cuanto se leen.
+
+    Cada objeto se filtra al terminar de parsearse, así que las capturas, trazas e
+    items de una auditoría se liberan antes de seguir con la siguiente en lugar de
+    mantenerse hasta el final. Las claves propias del nivel superior (i18n,
+    entities...) y de details se descartan solo en ese nivel, para que el
+    resultado del preprocesamiento coincida con el del reporte completo.
+
+    Raises:
+        json.JSONDecodeError: Si el contenido no es un JSON válido
+    """
+    skeleton = json.loads(data, object_pairs_hook=_skeleton_object)
+    if isinstance(skeleton, dict):
+        for key in _TOP_LEVEL_DROPPED_KEYS:
+            skeleton.pop(key, None)
+    return skeleton
+
+
+def load_preprocessed_report(
+    source: IO[bytes] | bytes, spill_dir: str | Path | None = None
+) -> tuple[dict, Path | None]:
+    """
+    Lee un reporte subido y devuelve su versión preprocesada.
+
+    Args:
+        source: Archivo subido (o su contenido en bytes)
+        spill_dir: Si se indica, el archivo original se guarda en este directorio
+            con su hash SHA-256 como nombre
+
+    Returns:
+        tuple: (reporte preprocesado, ruta del archivo volcado o None)
+
+    Raises:
+        json.JSONDecodeError: Si el contenido no es un JSON válido
+    """
+    data = source if isinstance(source, bytes) else source.read()
+    source_hash = hashlib.sha256(data).hexdigest()
+
+    processed = _preprocess_flight.do(source_hash, lambda: _parse_and_preprocess(data))
+
+    spill_path = None
+    if spill_dir is not None:
+        spill_path = Path(spill_dir) / f"{source_hash}.json"
+        if not spill_path.exists():
+            spill_path.parent.mkdir(parents=True, exist_ok=True)
+            spill_path.write_bytes(data)
+
+    return processed, spill_path
+
+
+def _parse_and_preprocess(data: bytes) -> dict:
+    with span("parse", bytes=len(data)):
+        skeleton = parse_report_skeleton(data)
+    with span("preprocess"):
+        return preprocess_lighthouse_report(skeleton)
@@ -0,0 +1,243 @@
+"""
+Modelo compacto en memoria de un reporte preprocesado, construido una vez.
+
+Sustituye los recorridos repetidos de los dicts anidados (audits → campos,
+categories → auditWeights) por registros con __slots__ y columnas en arrays de
+NumPy, con índices precalculados:
+
+- posición de cada auditoría por id, y categorías por id
+- por categoría, con el peso de cada auditoría (los auditWeights de auditRefs)
+- auditorías suspendidas (ordenadas por impacto) y aprobadas
+- métricas: auditorías con numericValue, por id
+
+Solo guarda los campos que usan el resumen determinista, la comparación y la
+recuperación (sin descripciones ni details; el índice BM25 de rag/ tiene los
+suyos) y comparte las cadenas con el reporte, así que ocupa bastante menos que
+el dict preprocesado.
+
+get_report_model mantiene en memoria los modelos de los últimos reportes usados,
+identificados por el objeto dict: los reportes preprocesados no se modifican
+después de crearse. Para no retener el dict, se identifica con una referencia
+débil; los dicts normales no la admiten, así que preprocess_lighthouse_report y
+el almacén de sesiones devuelven PreprocessedReport. El modelo de un dict normal
+se construye en cada llamada.
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from .cache import report_hash
+
+# Lighthouse considera aprobada una auditoría con puntuación >= 0.9
+PASSING_SCORE = 0.9
+
+# Modos de puntuación en los que el score indica aprobado/suspenso
+SCORED_MODES = frozenset({"binary", "numeric", "metricSavings"})
+
+_MAX_MODELS_IN_MEMORY = 32
+
+
+def _number(value) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+class AuditRecord:
+    """Campos de una auditoría que usan el resumen determinista y la comparación."""
+
+    __slots__ = (
+        "id",
+        "title",
+        "score",
+        "score_display_mode",
+        "display_value",
+        "numeric_value",
+        "numeric_unit",
+    )
+
+    def __init__(self, audit_id: str, audit: dict):
+        self.id = audit_id
+        self.title = audit.get("title")
+        self.score = audit.get("score")
+        self.score_display_mode = audit.get("scoreDisplayMode")
+        self.display_value = audit.get("displayValue")
+        self.numeric_value = audit.get("numericValue")
+        self.numeric_unit = audit.get("numericUnit")
+
+    @property
+    def scored(self) -> bool:
+        """Si la puntuación indica aprobado/suspenso."""
+        return self.score_display_mode in SCORED_MODES and self.score is not None
+
+    @property
+    def failing(self) -> bool:
+        return self.scored and self.score < PASSING_SCORE
+
+    def __repr__(self) -> str:
+        return f"AuditRecord({self.id!r}, score={self.score!r})"
+
+
+class CategoryRecord:
+    __slots__ = ("id", "title", "score", "audit_positions", "weights", "total_weight")
+
+    def __init__(self, category_id: str, category: dict, positions: dict[str, int]):
+        self.id = category_id
+        self.title = category.get("title") or category_id
+        self.score = category.get("score")
+        weights = [
+            (positions[audit_id], weight)
+            for audit_id, weight in category.get("auditWeights", {}).items()
+            if audit_id in positions
+        ]
+        # Posiciones en ReportModel.audits de las auditorías que pondera y sus pesos
+        self.audit_positions = tuple(position for position, _ in weights)
+        self.weights = np.array([weight for _, weight in weights], dtype=np.float64)
+        self.total_weight = float(sum(weight for _, weight in weights))
+
+    def __repr__(self) -> str:
+        return f"CategoryRecord({self.id!r}, score={self.score!r})"
+
+
+class ReportModel:
+    """
+    Auditorías y categorías de un reporte preprocesado con sus índices.
+
+    Las auditorías están en el orden del reporte; las columnas scores y numeric
+    (NaN si falta o no es un número) están alineadas con ellas.
+    """
+
+    def __init__(self, processed: dict):
+        self.url = processed.get("finalUrl") or processed.get("requestedUrl") or "-"
+        self.fetch_time = processed.get("fetchTime")
+
+        audits = processed.get("audits", {})
+        self.audits: tuple[AuditRecord, ...] = tuple(
+            AuditRecord(audit_id, audit) for audit_id, audit in audits.items()
+        )
+        self.positions: dict[str, int] = {
+            record.id: position for position, record in enumerate(self.audits)
+        }
+
+        self.scores = np.array([_number(r.score) for r in self.audits], dtype=np.float64)
+        self.numeric = np.array(
+            [_number(r.numeric_value) for r in self.audits], dtype=np.float64
+        )
+
+        self.categories: dict[str, CategoryRecord] = {
+            category_id: CategoryRecord(category_id, category, self.positions)
+            for category_id, category in processed.get("categories", {}).items()
+        }
+
+        self.metrics: dict[str, AuditRecord] = {
+            record.id: record for record in self.audits if record.numeric_value is not None
+        }
+
+        # Impacto en las puntuaciones de categoría: por cada categoría, el peso
+        # relativo de la auditoría por lo que le falta a su puntuación para llegar a 1
+        self.impact = np.zeros(len(self.audits), dtype=np.float64)
+        for category in self.categories.values():
+            if not category.total_weight:
+                continue
+            columns = np.array(category.audit_positions, dtype=np.intp)
+            missing = 1 - self.scores[columns]
+            has_score = ~np.isnan(missing)
+            np.add.at(
+                self.impact,
+                columns[has_score],
+                category.weights[has_score] / category.total_weight * missing[has_score],
+            )
+
+        failing = [position for position, r in enumerate(self.audits) if r.failing]
+        failing.sort(
+            key=lambda position: (
+                -self.impact[position],
+                -(self.audits[position].numeric_value or 0),
+                self.audits[position].id or "",
+            )
+        )
+        self.failing: tuple[int, ...] = tuple(failing)
+        self.passing: tuple[int, ...] = tuple(
+            position
+            for position, r in enumerate(self.audits)
+            if r.scored and r.score >= PASSING_SCORE
+        )
+
+        self.content_hash: str | None = None
+
+    def audit(self, audit_id: str) -> AuditRecord | None:
+        position = self.positions.get(audit_id)
+        return None if position is None else self.audits[position]
+
+    def category_audits(self, category_id: str) -> list[AuditRecord]:
+        """Auditorías que pondera la categoría, en el orden de auditRefs."""
+        category = self.categories.get(category_id)
+        if category is None:
+            return []
+        return [self.audits[position] for position in category.audit_positions]
+
+    def failing_audits(self, limit: int | None = None) -> list[AuditRecord]:
+        """Auditorías con puntuación < 0.9, de mayor a menor impacto."""
+        positions = self.failing if limit is None else self.failing[:limit]
+        return [self.audits[position] for position in positions]
+
+    def passing_audits(self) -> list[AuditRecord]:
+        return [self.audits[position] for position in self.passing]
+
+    def impact_of(self, audit_id: str) -> float:
+        position = self.positions.get(audit_id)
+        return 0.0 if position is None else float(self.impact[position])
+
+
+class PreprocessedReport(dict):
+    """Reporte preprocesado: un dict que admite referencias débiles."""
+
+    __slots__ = ("__weakref__",)
+
+
+_models: OrderedDict[int, tuple[weakref.ref, ReportModel]] = OrderedDict()
+# Reentrante: el callback de una referencia débil puede ejecutarse dentro de la sección
+_models_lock = threading.RLock()
+
+
+def _forget(key: int, ref: weakref.ref) -> None:
+    """Quita el modelo de un reporte que ya no existe (callback de la referencia débil)."""
+    with _models_lock:
+        entry = _models.get(key)
+        if entry is not None and entry[0] is ref:
+            del _models[key]
+
+
+def get_report_model(processed: dict) -> ReportModel:
+    """Modelo del reporte preprocesado (construido la primera vez que se pide)."""
+    if not isinstance(processed, PreprocessedReport):
+        return ReportModel(processed)
+
+    key = id(processed)
+    with _models_lock:
+        entry = _models.get(key)
+        if entry is not None and entry[0]() is processed:
+            _models.move_to_end(key)
+            return entry[1]
+
+    model = ReportModel(processed)
+    # La referencia débil no retiene el dict; al liberarse se quita su modelo, así
+    # que su id no puede coincidir con el de otro reporte
+    ref = weakref.ref(processed, lambda ref, key=key: _forget(key, ref))
+    with _models_lock:
+        _models[key] = (ref, model)
+        _models.move_to_end(key)
+        while len(_models) > _MAX_MODELS_IN_MEMORY:
+            _models.popitem(last=False)
+    return model
+
+
+def report_content_hash(processed: dict) -> str:
+    """report_hash del reporte, calculado una sola vez por modelo."""
+    model = get_report_model(processed)
+    if model.content_hash is None:
+        model.content_hash = report_hash(processed)
+    return model.content_hash
@@ -0,0 +1,218 @@
+"""
+Caché de respuestas del modelo principal para preguntas generales.
+
+Solo se usa en turnos que no dependen de reportes cargados ni de la conversación
+previa (la pregunta es el primer mensaje del usuario); en cualquier otro caso la
+petición pasa de largo (bypass). La clave es la pregunta normalizada (minúsculas,
+sin acentos ni signos), el tramo de temperatura y la versión del prompt (modelo +
+system prompt del perfil SYSTEM_PROMPT_PROFILE).
+
+Opcionalmente, con RESPONSE_CACHE_SIMILARITY entre 0 y 1, una pregunta distinta
+también acierta si su similitud coseno con una guardada (sobre los términos del
+índice de rag/, con las siglas expandidas) supera ese umbral.
+
+Las entradas caducan a los RESPONSE_CACHE_TTL segundos (24 h por defecto) y se
+desaloja la usada hace más tiempo por encima de RESPONSE_CACHE_MAX_ENTRIES (256;
+con 0 la caché se desactiva).
+"""
+
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from dataclasses import asdict, dataclass
+
+from rag import expand_query
+
+from .telemetry import record_cache
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize_question(text: str) -> str:
+    """Minúsculas, sin acentos, sin signos y con los espacios colapsados."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def temperature_bucket(temperature: float) -> str:
+    """Los mismos tramos que muestra el control de temperatura de la UI."""
+    if temperature <= 0.3:
+        return "precise"
+    if temperature <= 0.7:
+        return "balanced"
+    return "creative"
+
+
+def cacheable_question(messages: list[dict], has_reports: bool) -> str | None:
+    """
+    Pregunta a usar como clave, o None si la respuesta puede depender de los
+    reportes cargados o de turnos anteriores.
+    """
+    if has_reports or not messages or messages[-1].get("role") != "user":
+        return None
+    if any(message.get("role") == "user" for message in messages[:-1]):
+        return None
+    return str(messages[-1].get("content", ""))
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b.get(term, 0) for term, count in a.items())
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm
+
+
+@dataclass
+class ResponseCacheStats:
+    hits: int = 0
+    similar_hits: int = 0
+    misses: int = 0
+    bypasses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Aciertos sobre las peticiones que podían usar la caché."""
+        lookups = self.hits + self.similar_hits + self.misses
+        return (self.hits + self.similar_hits) / lookups if lookups else 0.0
+
+
+@dataclass
+class _Entry:
+    scope: str
+    terms: Counter
+    response: str
+    created_at: float
+
+
+class ResponseCache:
+    """Caché en memoria con TTL y LRU, segura para usarse desde varios hilos."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 24 * 3600,
+        similarity_threshold: float | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = ResponseCacheStats()
+
+    @staticmethod
+    def _scope(temperature: float, prompt_version: str) -> str:
+        return f"{temperature_bucket(temperature)}:{prompt_version}"
+
+    @staticmethod
+    def _key(question: str, scope: str) -> str:
+        raw = f"{normalize_question(question)}:{scope}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._stats.bypasses += 1
+        record_cache("response", "bypass")
+
+    def get(self, question: str, temperature: float, prompt_version: str) -> str | None:
+        if self.max_entries <= 0:
+            return None
+        scope = self._scope(temperature, prompt_version)
+        key = self._key(question, scope)
+        now = time.time()
+
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                record_cache("response", "hit")
+                return entry.response
+
+            if self.similarity_threshold:
+                terms = Counter(expand_query(question))
+                best_key, best_score = None, 0.0
+                for other_key, other in self._entries.items():
+                    if other.scope != scope:
+                        continue
+                    score = _cosine(terms, other.terms)
+                    if score > best_score:
+                        best_key, best_score = other_key, score
+                if best_key is not None and best_score >= self.similarity_threshold:
+                    self._entries.move_to_end(best_key)
+                    self._stats.similar_hits += 1
+                    record_cache("response", "similar_hit")
+                    return self._entries[best_key].response
+
+            self._stats.misses += 1
+            record_cache("response", "miss")
+            return None
+
+    def put(self, question: str, temperature: float, prompt_version: str, response: str) -> None:
+        if self.max_entries <= 0:
+            return
+        scope = self._scope(temperature, prompt_version)
+        entry = _Entry(
+            scope=scope,
+            terms=Counter(expand_query(question)),
+            response=response,
+            created_at=time.time(),
+        )
+        with self._lock:
+            key = self._key(question, scope)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = asdict(self._stats)
+            data["hit_rate"] = self._stats.hit_rate
+            data["entries"] = len(self._entries)
+            return data
+
+    def _expire(self, now: float) -> None:
+        # Las entradas se insertan en orden de creación salvo al reutilizarse, así
+        # que hay que recorrerlas todas; la caché es pequeña
+        expired = [
+            key
+            for key, entry in self._entries.items()
+            if now - entry.created_at > self.ttl_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+        self._stats.expirations += len(expired)
+
+
+_response_cache: ResponseCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Caché de respuestas compartida por todo el proceso (ver el docstring del módulo)."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            similarity = os.getenv("RESPONSE_CACHE_SIMILARITY")
+            _response_cache = ResponseCache(
+                max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256")),
+                ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600))),
+                similarity_threshold=float(similarity) if similarity else None,
+            )
+        return _response_cache
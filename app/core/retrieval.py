@@ -0,0 +1,161 @@
+"""
+Contexto de reportes dirigido a la pregunta, con el índice de auditorías de rag/.
+
+Para preguntas concretas ("¿Cómo mejorar mi LCP?") se envían al modelo solo las
+puntuaciones por categoría y las auditorías más relevantes de cada reporte en vez
+del resumen completo. Las preguntas generales ("analiza mi reporte") no encuentran
+auditorías con suficiente puntuación y siguen usando el resumen. Las preguntas
+sobre una categoría cuyo contexto enfocado ya precalculó el prefetch
+(core/prefetch.py) usan ese contexto.
+
+El índice de cada reporte se construye una vez y se guarda por hash de contenido
+en LIGHTHOUSE_CACHE_DIR/rag (si el directorio está vacío, solo en memoria).
+
+Variables de entorno:
+    REPORT_CONTEXT_MODE: auto (por defecto), summary o retrieval
+    RAG_TOP_K: auditorías por reporte (6 por defecto)
+    RAG_MIN_SCORE: puntuación BM25 mínima de la mejor auditoría en modo auto
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from rag import AuditIndex, load_or_build_index
+
+from .cache import DEFAULT_CACHE_DIR
+from .digest import clean, format_score
+from .prefetch import get_focused_context
+from .report_model import PASSING_SCORE, get_report_model, report_content_hash
+from .telemetry import record_cache
+
+CONTEXT_MODES = ("auto", "summary", "retrieval")
+DEFAULT_TOP_K = 6
+DEFAULT_MIN_SCORE = 8.0
+
+_MAX_DESCRIPTION_LENGTH = 160
+_LEARN_MORE_RE = re.compile(r"\s*Learn (more|how)\b.*$", re.IGNORECASE)
+_MAX_INDEXES_IN_MEMORY = 32
+
+_indexes: OrderedDict[str, AuditIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _index_dir() -> Path | None:
+    cache_dir = os.getenv("LIGHTHOUSE_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+    return Path(cache_dir) / "rag" if cache_dir else None
+
+
+def get_report_index(processed: dict) -> AuditIndex:
+    """Índice de auditorías del reporte (memoria → disco → construcción)."""
+    key = report_content_hash(processed)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            record_cache("index", "memory_hit")
+            return index
+
+    record_cache("index", "miss")
+    index = load_or_build_index(processed, key, _index_dir())
+
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > _MAX_INDEXES_IN_MEMORY:
+            _indexes.popitem(last=False)
+    return index
+
+
+def _format_audit(doc) -> str:
+    parts = [f"puntuación {format_score(doc.score)}"]
+    if doc.display_value:
+        parts.append(clean(doc.display_value))
+    if doc.summary:
+        parts.append(", ".join(f"{key}={value}" for key, value in doc.summary.items()))
+
+    # Solo la primera frase, sin el enlace "Learn more" de Lighthouse
+    description = _LEARN_MORE_RE.sub("", clean(doc.description)).split(". ")[0].rstrip(".")
+    if len(description) > _MAX_DESCRIPTION_LENGTH:
+        description = description[:_MAX_DESCRIPTION_LENGTH].rstrip() + "…"
+    return f"- **{doc.title}** (`{doc.id}`): {' · '.join(parts)}. {description}."
+
+
+def build_retrieved_context(
+    processed: dict,
+    question: str,
+    top_k: int | None = None,
+    min_score: float = 0.0,
+) -> str | None:
+    """
+    Puntuaciones por categoría y auditorías relevantes para la pregunta.
+
+    De los 2 * top_k mejores resultados de BM25 se quedan top_k, con las
+    auditorías suspendidas antes que las aprobadas.
+
+    Returns:
+        str | None: Contexto del reporte, o None si ninguna auditoría alcanza
+        min_score
+    """
+    top_k = top_k or int(os.getenv("RAG_TOP_K", DEFAULT_TOP_K))
+    results = get_report_index(processed).search(question, top_k=2 * top_k)
+    if not results or results[0][1] < min_score:
+        return None
+    results.sort(key=lambda item: item[0].score is None or item[0].score >= PASSING_SCORE)
+    results = results[:top_k]
+
+    model = get_report_model(processed)
+    lines = [f"URL: {model.url}"]
+    if model.categories:
+        scores = ", ".join(
+            f"{category.title} {format_score(category.score)}"
+            for category in model.categories.values()
+        )
+        lines.append(f"Puntuaciones: {scores}")
+
+    lines.append("")
+    lines.append("### Auditorías relevantes para la pregunta")
+    lines.extend(_format_audit(doc) for doc, _ in results)
+    return "\n".join(lines)
+
+
+def select_report_context(
+    question: str,
+    report_summaries: dict[str, str],
+    processed_reports: dict[str, dict] | None,
+    mode: str | None = None,
+) -> dict[str, str]:
+    """
+    Contexto de cada reporte para la pregunta: contexto enfocado del prefetch,
+    auditorías recuperadas o resumen.
+
+    Args:
+        question: Último mensaje del usuario
+        report_summaries: Resúmenes por nombre de reporte
+        processed_reports: Reportes preprocesados por nombre (sin ellos se usan
+            siempre los resúmenes)
+        mode: auto, summary o retrieval (por defecto REPORT_CONTEXT_MODE)
+    """
+    mode = mode or os.getenv("REPORT_CONTEXT_MODE", "auto")
+    if mode not in CONTEXT_MODES:
+        raise ValueError(f"REPORT_CONTEXT_MODE desconocido: {mode}")
+    if mode == "summary" or not processed_reports or not question:
+        return report_summaries
+
+    min_score = (
+        float(os.getenv("RAG_MIN_SCORE", DEFAULT_MIN_SCORE)) if mode == "auto" else 0.0
+    )
+    selected = {}
+    for name, summary in report_summaries.items():
+        processed = processed_reports.get(name)
+        retrieved = None
+        if processed is not None:
+            try:
+                retrieved = get_focused_context(processed, question)
+                if retrieved is None:
+                    retrieved = build_retrieved_context(processed, question, min_score=min_score)
+            except Exception:
+                retrieved = None
+        selected[name] = retrieved or summary
+    return selected
@@ -0,0 +1,259 @@
+"""
+Enrutado de cada turno del chat entre el modelo rápido (8B) y el principal (70B).
+
+Antes de llamar al modelo se estima la complejidad del turno solo con reglas
+locales sobre la pregunta y el contexto ya ensamblado:
+
+- Suman: pregunta larga, comparación (de reportes o de tiempos), análisis del
+  reporte cargado ("analiza mi reporte", "¿qué priorizo?"), preguntas de
+  implementación o causas ("cómo configuro...", "paso a paso", "por qué") y
+  tener varios reportes.
+- Restan: definiciones ("¿qué es el CLS?") y continuaciones cortas de la
+  conversación ("¿y el TBT?", "gracias").
+- Un contexto de más de ROUTING_FAST_MAX_CONTEXT tokens va siempre al principal.
+
+Solo los turnos con complejidad < 0 (una definición o una continuación corta sin
+nada que sume) van al modelo rápido; el resto, también las preguntas generales,
+van al principal. La respuesta completa del modelo rápido pasa una comprobación
+local (check_fast_answer: vacía, truncada, demasiado corta, un rechazo, en otro
+idioma o repetitiva) y, si no la supera, se repite el turno con el modelo
+principal. Cada decisión se anota en el span "route", en las métricas
+lighthouse_route_total / lighthouse_route_duration_seconds y en el logger
+"lighthouse_assistant.routing".
+
+MODEL_ROUTING elige el modo: "auto" (por defecto) u "off" (siempre el principal).
+"""
+
+import logging
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from enum import Enum
+
+from .telemetry import METRICS
+from .tokens import count_tokens
+
+ROUTING_MODES = ("auto", "off")
+
+# Tokens máximos de la pregunta para no contar como larga
+DEFAULT_MAX_FAST_QUESTION_TOKENS = 40
+# Tokens máximos del contexto (system prompt + reportes + historial) para el rápido
+DEFAULT_MAX_FAST_CONTEXT = 6000
+# Tokens máximos de respuesta del modelo rápido
+DEFAULT_FAST_MAX_TOKENS = 1024
+# Caracteres mínimos de una respuesta válida del modelo rápido
+MIN_FAST_ANSWER_CHARS = 60
+
+_DEFINITION_RE = re.compile(
+    r"^(que (es|son|significa|significan|quiere decir|mide)|para que sirve|"
+    r"define|definicion de|what (is|are|does)|explica(me)? (brevemente )?que es)\b"
+)
+_COMPARISON_RE = re.compile(
+    r"\b(compar\w*|diferencias?|versus|vs|frente a|mejor que|peor que|evolucion\w*|"
+    r"tendencias?|regresion\w*|empeor\w*|antes y despues|entre (los|las) (dos|reportes))\b"
+)
+_REPORT_ANALYSIS_RE = re.compile(
+    r"\b(analiza\w*|analisis|prioriz\w*|diagnostic\w*|resume\w*|resumen|plan|"
+    r"(mi|mis|nuestro|nuestra|el|este) (reporte|informe|sitio|web|pagina|auditoria)s?|"
+    r"reportes?|informes?|problemas principales|que (debo|deberia) (mejorar|arreglar))\b"
+)
+_IMPLEMENTATION_RE = re.compile(
+    r"\b(como (puedo |debo |se )?(implement|configur|optimiz|reduc|arregl|corrig|migr)\w*|"
+    r"paso a paso|codigo|ejemplo de|estrategia|por que)\b"
+)
+_FOLLOW_UP_RE = re.compile(
+    r"^(y|e|pero|entonces|vale|ok|okay|gracias|perfecto|genial|entendido|de acuerdo|"
+    r"and|thanks)\b"
+)
+# Palabras máximas de una continuación corta
+_SHORT_FOLLOW_UP_WORDS = 8
+
+_REFUSAL_RE = re.compile(
+    r"\b(no puedo (ayudar|responder)|lo siento, (pero )?no|i (can ?not|can't|am unable)|"
+    r"as an ai|como (modelo|ia|inteligencia artificial))\b"
+)
+_SPANISH_WORDS = frozenset("el la los las de del que en para con por una es se".split())
+_ENGLISH_WORDS = frozenset("the of and to is in for with that you your this are".split())
+
+_logger = logging.getLogger("lighthouse_assistant.routing")
+
+METRICS.describe("lighthouse_route_total", "counter", "Turnos del chat por ruta y resultado")
+METRICS.describe(
+    "lighthouse_route_duration_seconds", "histogram", "Duración de la llamada por ruta"
+)
+
+
+class Route(str, Enum):
+    FAST = "fast"
+    LARGE = "large"
+
+
+@dataclass
+class RouteDecision:
+    route: Route
+    # Puntos de complejidad (< 0: modelo rápido)
+    complexity: int
+    # Motivos que han sumado o restado, en orden
+    reasons: list[str] = field(default_factory=list)
+    # Motivo por el que la respuesta rápida no valió (se repitió con el principal)
+    escalated: str | None = None
+
+    def as_attributes(self) -> dict:
+        attributes = {
+            "route": self.route.value,
+            "complexity": self.complexity,
+            "reasons": ",".join(self.reasons),
+        }
+        if self.escalated:
+            attributes["escalated"] = self.escalated
+        return attributes
+
+
+def routing_mode() -> str:
+    mode = os.getenv("MODEL_ROUTING", "auto").lower()
+    return mode if mode in ROUTING_MODES else "auto"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def fast_max_tokens() -> int:
+    return _env_int("ROUTING_FAST_MAX_TOKENS", DEFAULT_FAST_MAX_TOKENS)
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def decide_route(
+    messages: list[dict], report_count: int = 0, context_tokens: int = 0
+) -> RouteDecision:
+    """
+    Ruta del turno según la última pregunta y el contexto (ver el docstring del módulo).
+
+    Args:
+        messages: Historial de la conversación (el último mensaje es la pregunta)
+        report_count: Reportes cuyo contexto se envía en el prompt
+        context_tokens: Tokens del prompt ya ensamblado
+    """
+    if routing_mode() == "off":
+        return RouteDecision(Route.LARGE, 0, ["desactivado"])
+
+    question = str(messages[-1].get("content", "")) if messages else ""
+    text = _normalize(question)
+    complexity = 0
+    reasons = []
+
+    if context_tokens > _env_int("ROUTING_FAST_MAX_CONTEXT", DEFAULT_MAX_FAST_CONTEXT):
+        return RouteDecision(Route.LARGE, 1, ["contexto grande"])
+
+    if count_tokens(question) > _env_int(
+        "ROUTING_MAX_FAST_QUESTION_TOKENS", DEFAULT_MAX_FAST_QUESTION_TOKENS
+    ):
+        complexity += 2
+        reasons.append("pregunta larga")
+    if _COMPARISON_RE.search(text):
+        complexity += 3
+        reasons.append("comparación")
+    if report_count and _REPORT_ANALYSIS_RE.search(text):
+        complexity += 2
+        reasons.append("análisis del reporte")
+    if report_count >= 2:
+        complexity += 1
+        reasons.append("varios reportes")
+    if _IMPLEMENTATION_RE.search(text):
+        complexity += 1
+        reasons.append("cómo o por qué")
+    if _DEFINITION_RE.search(text):
+        complexity -= 2
+        reasons.append("definición")
+
+    # Continuación: empieza como tal ("¿y el TBT?") o es muy corta, tras una respuesta
+    words = len(text.split())
+    follow_up = any(message.get("role") == "assistant" for message in messages[:-1])
+    if (
+        follow_up
+        and words <= _SHORT_FOLLOW_UP_WORDS
+        and (_FOLLOW_UP_RE.search(text) or words <= _SHORT_FOLLOW_UP_WORDS // 2)
+    ):
+        complexity -= 1
+        reasons.append("continuación corta")
+
+    if not reasons:
+        reasons.append("general")
+    route = Route.FAST if complexity < 0 else Route.LARGE
+    return RouteDecision(route, complexity, reasons)
+
+
+def check_fast_answer(
+    answer: str, question: str = "", finish_reason: str | None = None
+) -> str | None:
+    """
+    Motivo por el que la respuesta del modelo rápido no vale, o None si vale.
+
+    Solo detecta fallos evidentes: respuesta vacía, cortada por max_tokens,
+    demasiado corta, un rechazo al principio, en inglés para una pregunta en
+    español, o con la misma línea repetida.
+    """
+    text = answer.strip()
+    if not text:
+        return "vacía"
+    if finish_reason == "length":
+        return "truncada"
+    if len(text) < MIN_FAST_ANSWER_CHARS:
+        return "corta"
+    if _REFUSAL_RE.search(_normalize(text[:300])):
+        return "rechazo"
+
+    question_words = _normalize(question).split()
+    answer_words = _normalize(text).split()
+    if sum(w in _SPANISH_WORDS for w in question_words) > sum(
+        w in _ENGLISH_WORDS for w in question_words
+    ):
+        spanish = sum(w in _SPANISH_WORDS for w in answer_words)
+        english = sum(w in _ENGLISH_WORDS for w in answer_words)
+        if english > 2 * spanish and english >= 5:
+            return "idioma"
+
+    lines = [line.strip() for line in text.splitlines() if len(line.strip()) > 20]
+    if lines and max(lines.count(line) for line in set(lines)) >= 3:
+        return "repetición"
+    return None
+
+
+def record_route(
+    decision: RouteDecision, route: Route, model: str, latency: float, span=None
+) -> None:
+    """
+    Registra una llamada de la ruta indicada y su duración (métricas, span y log).
+
+    El resultado es "rejected" para una respuesta rápida que no pasó
+    check_fast_answer, "escalated" para la llamada al principal que la sustituye
+    y "ok" en el resto.
+    """
+    if not decision.escalated:
+        outcome = "ok"
+    else:
+        outcome = "rejected" if route is Route.FAST else "escalated"
+    METRICS.inc("lighthouse_route_total", route=route.value, outcome=outcome)
+    METRICS.observe("lighthouse_route_duration_seconds", latency, route=route.value)
+    if span is not None:
+        span.attributes.update(decision.as_attributes())
+        span.attributes["route"] = route.value
+    _logger.info(
+        "route=%s outcome=%s model=%s complexity=%d reasons=%s latency=%.3fs%s",
+        route.value,
+        outcome,
+        model,
+        decision.complexity,
+        ",".join(decision.reasons),
+        latency,
+        f" escalated={decision.escalated}" if decision.escalated else "",
+    )
@@ -0,0 +1,287 @@
+"""
+Clasificador local de alcance de las preguntas (sin red, solo CPU).
+
+Antes de llamar al modelo principal se decide si la pregunta entra en los temas
+del asistente (rendimiento web, accesibilidad, mejores prácticas, SEO, PWA y
+reportes Lighthouse):
+
+1. Puntuación por palabras clave: términos del dominio (los de TECHNICAL_TERMS,
+   las categorías de Lighthouse y una lista propia) suman; términos claramente
+   ajenos (recetas, deportes, política...) indican fuera de tema.
+2. Si las palabras clave no deciden y hay un modelo lineal sobre TF-IDF entrenado
+   (SCOPE_MODEL_PATH, ver benchmarks/scope_classifier.py), se usa su probabilidad.
+3. Lo que sigue siendo dudoso queda como AMBIGUOUS; model.py lo consulta con el
+   modelo pequeño (SCOPE_VALIDATION_PROMPT) o, si la pregunta es una continuación
+   de la conversación o hay reportes cargados, lo deja pasar.
+
+SCOPE_CLASSIFIER elige el modo: "auto" (por defecto), "local" (sin consultar al
+modelo pequeño; lo dudoso pasa) u "off".
+"""
+
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+
+from rag import tokenize
+
+from .prompts import LIGHTHOUSE_CATEGORIES, TECHNICAL_TERMS
+
+SCOPE_MODES = ("auto", "local", "off")
+
+# Probabilidades del modelo lineal a partir de las cuales se decide sin el modelo
+# pequeño
+MODEL_IN_THRESHOLD = 0.8
+MODEL_OUT_THRESHOLD = 0.2
+
+# Términos que por sí solos sitúan la pregunta en el dominio
+_STRONG_TERMS = frozenset(
+    """
+    lighthouse pagespeed psi webpagetest devtools vitals lcp fcp cls tbt inp fid tti
+    ttfb wcag aria seo pwa rendimiento performance accesibilidad accessibility
+    reporte reportes informe auditoria auditorias audit audits metrica metricas
+    puntuacion puntuaciones score lazy loading minificar minificacion minify
+    viewport sitemap robots canonical hreflang cdn renderizado render paint layout
+    contentful blocking webp avif preload prefetch preconnect bundle webpack gzip
+    brotli compresion indexar indexacion rastreo crawl metadatos meta structured
+    lectores lector screen reader contraste alt favicon https http2 http3 dom
+    hydration hidratacion redirecciones redirects speed splitting minifico precarga
+    precargar precargo defer diferir difiero critical tabindex focus byte
+    """.split()
+)
+
+# Términos del dominio que por sí solos no bastan
+_WEAK_TERMS = frozenset(
+    """
+    web webs pagina paginas sitio sitios carga cargar cargue velocidad lento lenta
+    rapido rapida optimizar optimizacion mejorar imagen imagenes fuente fuentes
+    movil moviles mobile navegador navegadores google buscador buscadores enlace
+    enlaces formulario formularios boton botones teclado color colores titulo
+    titulos encabezados headings servidor codigo script scripts javascript js css
+    html framework frameworks react angular vue nextjs wordpress instalable
+    offline notificaciones responsive url urls cache usuario usuarios
+    experiencia semantica etiqueta etiquetas ranking posicionamiento trafico
+    hilo terceros saltos banners respuesta
+    """.split()
+)
+
+# Términos que indican que la pregunta no tiene que ver con la web
+_OFF_TOPIC_TERMS = frozenset(
+    """
+    receta recetas cocina cocinar comida paella futbol partido partidos deporte
+    deportes liga equipo politica politico presidente elecciones gobierno religion
+    dios clima lluvia chiste chistes poema poemas cancion canciones pelicula
+    peliculas serie series novela libro libros medico medicina enfermedad sintomas
+    dieta salud amor pareja novia novio viaje viajes vuelo vuelos hotel horoscopo
+    bitcoin criptomoneda criptomonedas bolsa invertir inversion impuestos hipoteca
+    ecuacion matematicas fisica quimica historia guerra capital traduce traducir
+    ensayo redacta cuento mascota perro gato coche coches musica juego videojuego
+    videojuegos publicidad anuncios marketing
+    """.split()
+)
+
+# Saludos y preguntas sobre el propio asistente: las contesta el modelo principal
+_CONVERSATIONAL_TERMS = frozenset(
+    """
+    hola buenas buenos dias tardes noches gracias ayuda ayudar ayudarme quien eres
+    adios hello hi thanks puedes
+    """.split()
+)
+
+
+def _domain_vocabulary() -> frozenset[str]:
+    """Tokens de TECHNICAL_TERMS y de los nombres de las categorías de Lighthouse."""
+    tokens = set()
+    for term in TECHNICAL_TERMS:
+        tokens.update(tokenize(term))
+    for category_id, category in LIGHTHOUSE_CATEGORIES.items():
+        tokens.update(tokenize(category_id.replace("-", " ")))
+        for metric in category["key_metrics"]:
+            # Solo las siglas entre paréntesis, p. ej. "(LCP)"
+            if "(" in metric:
+                tokens.update(tokenize(metric[metric.index("(") :]))
+    return frozenset(tokens) - _WEAK_TERMS
+
+
+_DOMAIN_TERMS = _STRONG_TERMS | _domain_vocabulary()
+
+
+class Scope(str, Enum):
+    IN_SCOPE = "in_scope"
+    OUT_OF_SCOPE = "out_of_scope"
+    AMBIGUOUS = "ambiguous"
+
+
+@dataclass
+class ScopeResult:
+    scope: Scope
+    # "keywords", "model" (modelo lineal), "llm" (modelo pequeño) o "backend"
+    # (decidido en el backend, ver backend/client.py)
+    source: str
+    score: float = 0.0
+    matched: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ScopeModel:
+    """Regresión logística sobre TF-IDF de los tokens de la pregunta."""
+
+    vocabulary: dict[str, int]
+    idf: list[float]
+    weights: list[float]
+    bias: float
+
+    def features(self, question: str) -> dict[int, float]:
+        counts: dict[int, int] = {}
+        for token in tokenize(question):
+            index = self.vocabulary.get(token)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+        vector = {index: count * self.idf[index] for index, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {index: value / norm for index, value in vector.items()} if norm else {}
+
+    def predict_proba(self, question: str) -> float:
+        """Probabilidad de que la pregunta esté dentro del alcance."""
+        features = self.features(question)
+        z = self.bias + sum(self.weights[index] * value for index, value in features.items())
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def save(self, path: str | Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "vocabulary": self.vocabulary,
+                    "idf": self.idf,
+                    "weights": self.weights,
+                    "bias": self.bias,
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ScopeModel":
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def train_scope_model(
+    examples: list[tuple[str, bool]],
+    epochs: int = 1000,
+    learning_rate: float = 2.0,
+    l2: float = 0.001,
+) -> ScopeModel:
+    """
+    Entrena el modelo lineal con descenso de gradiente (en lote) sobre NumPy.
+
+    Args:
+        examples: Pares (pregunta, dentro del alcance)
+    """
+    import numpy as np
+
+    documents = [set(tokenize(question)) for question, _ in examples]
+    vocabulary = {
+        token: index for index, token in enumerate(sorted(set().union(*documents)))
+    }
+    df = np.zeros(len(vocabulary))
+    for tokens in documents:
+        for token in tokens:
+            df[vocabulary[token]] += 1
+    idf = np.log((1 + len(documents)) / (1 + df)) + 1
+
+    model = ScopeModel(vocabulary, idf.tolist(), [0.0] * len(vocabulary), 0.0)
+    X = np.zeros((len(examples), len(vocabulary)))
+    for row, (question, _) in enumerate(examples):
+        for index, value in model.features(question).items():
+            X[row, index] = value
+    y = np.array([1.0 if label else 0.0 for _, label in examples])
+
+    weights = np.zeros(len(vocabulary))
+    bias = 0.0
+    for _ in range(epochs):
+        predictions = 1.0 / (1.0 + np.exp(-(X @ weights + bias)))
+        error = predictions - y
+        weights -= learning_rate * (X.T @ error / len(y) + l2 * weights)
+        bias -= learning_rate * error.mean()
+
+    model.weights = weights.tolist()
+    model.bias = float(bias)
+    return model
+
+
+_scope_model: ScopeModel | None = None
+_scope_model_path: str | None = None
+_scope_model_lock = threading.Lock()
+
+
+def get_scope_model() -> ScopeModel | None:
+    """Modelo lineal indicado en SCOPE_MODEL_PATH, o None si no hay."""
+    global _scope_model, _scope_model_path
+    path = os.getenv("SCOPE_MODEL_PATH")
+    if not path:
+        return None
+    with _scope_model_lock:
+        if _scope_model is None or _scope_model_path != path:
+            _scope_model = ScopeModel.load(path)
+            _scope_model_path = path
+        return _scope_model
+
+
+def scope_mode() -> str:
+    mode = os.getenv("SCOPE_CLASSIFIER", "auto").lower()
+    return mode if mode in SCOPE_MODES else "auto"
+
+
+def score_keywords(question: str) -> tuple[float, int, list[str]]:
+    """Puntuación del dominio, coincidencias ajenas y términos encontrados."""
+    score, off_topic, matched = 0.0, 0, []
+    for token in tokenize(question):
+        if token in _DOMAIN_TERMS:
+            score += 2
+        elif token in _WEAK_TERMS:
+            score += 1
+        elif token in _OFF_TOPIC_TERMS:
+            off_topic += 1
+        else:
+            continue
+        matched.append(token)
+    return score, off_topic, matched
+
+
+def classify_scope(question: str, model: ScopeModel | None = None) -> ScopeResult:
+    """
+    Clasifica la pregunta sin llamar a ningún modelo remoto.
+
+    Args:
+        question: Texto de la pregunta
+        model: Modelo lineal para los casos dudosos (por defecto, get_scope_model())
+    """
+    score, off_topic, matched = score_keywords(question)
+
+    if score >= 2 and not off_topic:
+        return ScopeResult(Scope.IN_SCOPE, "keywords", score, matched)
+    if off_topic and not score:
+        return ScopeResult(Scope.OUT_OF_SCOPE, "keywords", score, matched)
+    tokens = tokenize(question)
+    if not off_topic and (not tokens or all(t in _CONVERSATIONAL_TERMS for t in tokens)):
+        return ScopeResult(Scope.IN_SCOPE, "keywords", score, matched)
+
+    model = model if model is not None else get_scope_model()
+    if model is not None:
+        probability = model.predict_proba(question)
+        if probability >= MODEL_IN_THRESHOLD:
+            return ScopeResult(Scope.IN_SCOPE, "model", probability, matched)
+        if probability <= MODEL_OUT_THRESHOLD:
+            return ScopeResult(Scope.OUT_OF_SCOPE, "model", probability, matched)
+
+    return ScopeResult(Scope.AMBIGUOUS, "keywords", score, matched)
+
+
+def parse_scope_answer(answer: str) -> Scope:
+    """Interpreta la respuesta del modelo pequeño a SCOPE_VALIDATION_PROMPT."""
+    # Ante una respuesta inesperada se deja pasar la pregunta
+    return Scope.OUT_OF_SCOPE if "OUT_OF_SCOPE" in answer.upper() else Scope.IN_SCOPE
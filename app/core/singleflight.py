@@ -0,0 +1,109 @@
+"""
+Agrupación de peticiones idénticas simultáneas (single-flight).
+
+Cuando varias sesiones suben a la vez el mismo reporte, cada una preprocesaba y
+resumía por su cuenta el mismo contenido. Con SingleFlight, la primera llamada con
+una clave (la "líder") ejecuta el cálculo y las que llegan con la misma clave
+mientras está en curso esperan y reciben su resultado (o su excepción), sin
+repetirlo. Al terminar la clave se libera: las llamadas posteriores ya encuentran
+el resultado en la caché correspondiente.
+
+Se usa con estas claves:
+
+- preprocess: hash SHA-256 del archivo subido (core/report_io.py)
+- summary: clave del resumen en la caché, con el hash de contenido del reporte
+- summary_node: clave de cada trozo, fusión o resumen enfocado (core/model.py)
+- completion: hash de la petición sin streaming al modelo (completion_key)
+
+Las respuestas en streaming no se agrupan: cada sesión recibe sus fragmentos.
+Cada llamada cuenta en lighthouse_coalesced_requests_total con role="leader" o
+role="shared". REQUEST_COALESCING=0 lo desactiva.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, TypeVar
+
+from .telemetry import METRICS, span
+
+T = TypeVar("T")
+
+METRICS.describe(
+    "lighthouse_coalesced_requests_total",
+    "counter",
+    "Peticiones por tipo que ejecutaron el cálculo (leader) o esperaron otro (shared)",
+)
+
+
+def coalescing_enabled() -> bool:
+    return os.getenv("REQUEST_COALESCING", "1") != "0"
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Ejecuta una sola vez a la vez el cálculo de cada clave. Seguro entre hilos."""
+
+    def __init__(self, kind: str):
+        """
+        Args:
+            kind: Tipo de petición para las métricas y los spans
+        """
+        self.kind = kind
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Resultado de fn(), compartido con las llamadas simultáneas con la misma clave.
+
+        Raises:
+            Exception: La excepción de fn(), también en las llamadas que esperaban
+        """
+        if not coalescing_enabled():
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            METRICS.inc("lighthouse_coalesced_requests_total", kind=self.kind, role="shared")
+            with span("coalesced_wait", kind=self.kind):
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        METRICS.inc("lighthouse_coalesced_requests_total", kind=self.kind, role="leader")
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def completion_key(request: dict) -> str:
+    """Clave de una petición al modelo: modelo, mensajes y parámetros."""
+    raw = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
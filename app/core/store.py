@@ -0,0 +1,395 @@
+"""
+Almacén persistente de sesiones y reportes (SQLite en modo WAL).
+
+Guarda lo necesario para reabrir una sesión sin volver a procesar nada ni llamar
+al modelo:
+
+- Reportes preprocesados, una sola vez por contenido (hash de cache.report_hash)
+  aunque los suban varias sesiones, como JSON compacto comprimido con zlib. El
+  hash SHA-256 del archivo original apunta al reporte, así que al volver a subir
+  el mismo archivo no se parsea ni se preprocesa.
+- Los resúmenes de cada reporte, uno por configuración del resumen (la clave de
+  model.stored_summary_key: estrategia, modelo, prompt, troceado y forma del árbol).
+- Las sesiones: qué reportes tiene cargados (con su nombre) y el historial del chat.
+
+restore_session solo lee los nombres, resúmenes e historial; los reportes se
+descomprimen al acceder a ellos (LazyReports). LIGHTHOUSE_STORE_PATH cambia la
+ruta de la base de datos (por defecto, sessions.sqlite3 en LIGHTHOUSE_CACHE_DIR);
+si se define vacía, no se persiste nada.
+
+Si SQLite falla (base de datos bloqueada, disco lleno, archivo dañado), el error
+se registra y la operación se da por no hecha: las lecturas devuelven None y la
+sesión sigue solo en memoria (st.session_state), como la caché de resúmenes.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Callable, MutableMapping
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .cache import DEFAULT_CACHE_DIR, report_hash
+from .report_model import PreprocessedReport
+
+_logger = logging.getLogger("lighthouse_assistant.store")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS report_summaries (
+    key TEXT PRIMARY KEY,
+    report_hash TEXT NOT NULL REFERENCES reports(hash),
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS report_sources (
+    source_hash TEXT PRIMARY KEY,
+    report_hash TEXT NOT NULL REFERENCES reports(hash)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_reports (
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    name TEXT NOT NULL,
+    report_hash TEXT NOT NULL REFERENCES reports(hash),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (session_id, name)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+"""
+
+
+def _compress(report: dict) -> bytes:
+    raw = json.dumps(report, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, 6)
+
+
+def _decompress(data: bytes) -> dict:
+    return PreprocessedReport(json.loads(zlib.decompress(data)))
+
+
+@dataclass
+class StoredSession:
+    session_id: str
+    # Hash del reporte por nombre, en el orden en que se cargaron
+    reports: dict[str, str] = field(default_factory=dict)
+    # Resumen por nombre (solo de los reportes ya resumidos)
+    summaries: dict[str, str] = field(default_factory=dict)
+    messages: list[dict] = field(default_factory=list)
+
+
+class SessionStore:
+    """
+    Sesiones y reportes en una base de datos SQLite.
+
+    Es segura para usarse desde varios hilos (una conexión protegida por un lock);
+    WAL permite además que varios procesos lean mientras otro escribe. Los errores
+    de SQLite no se propagan (ver el docstring del módulo).
+    """
+
+    def __init__(self, path: str | Path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    # Reportes
+
+    def put_report(self, report: dict, source_hash: str | None = None) -> str:
+        """
+        Guarda un reporte preprocesado si no existía y devuelve su hash.
+
+        Args:
+            report: Reporte devuelto por preprocess_lighthouse_report
+            source_hash: SHA-256 del archivo original, para find_source
+        """
+        digest = report_hash(report)
+        with self._lock:
+            try:
+                exists = self._db.execute(
+                    "SELECT 1 FROM reports WHERE hash = ?", (digest,)
+                ).fetchone()
+                if exists is None:
+                    data = _compress(report)
+                    self._db.execute(
+                        "INSERT INTO reports (hash, data, size, created_at) VALUES (?, ?, ?, ?)",
+                        (digest, data, len(data), time.time()),
+                    )
+                if source_hash is not None:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO report_sources (source_hash, report_hash) "
+                        "VALUES (?, ?)",
+                        (source_hash, digest),
+                    )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db_error("guardar el reporte", e)
+        return digest
+
+    def find_source(self, source_hash: str) -> str | None:
+        """Hash del reporte ya guardado para un archivo original, o None."""
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT report_hash FROM report_sources WHERE source_hash = ?", (source_hash,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._db_error("buscar el archivo", e)
+                return None
+        return row[0] if row else None
+
+    def load_report(self, digest: str) -> dict | None:
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT data FROM reports WHERE hash = ?", (digest,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._db_error("leer el reporte", e)
+                return None
+        return _decompress(row[0]) if row else None
+
+    def put_summary(self, digest: str, key: str, summary: str) -> None:
+        """
+        Guarda el resumen de un reporte ya guardado.
+
+        Args:
+            digest: Hash del reporte (el de put_report)
+            key: Clave del resumen (model.stored_summary_key)
+        """
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO report_summaries (key, report_hash, summary) "
+                    "VALUES (?, ?, ?)",
+                    (key, digest, summary),
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db_error("guardar el resumen", e)
+
+    def get_summary(self, key: str) -> str | None:
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT summary FROM report_summaries WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._db_error("leer el resumen", e)
+                return None
+        return row[0] if row else None
+
+    # Sesiones
+
+    def _touch(self, session_id: str) -> None:
+        now = time.time()
+        self._db.execute(
+            "INSERT INTO sessions (id, created_at, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET updated_at = excluded.updated_at",
+            (session_id, now, now),
+        )
+
+    def add_session_report(self, session_id: str, name: str, digest: str) -> None:
+        with self._lock:
+            try:
+                self._touch(session_id)
+                (position,) = self._db.execute(
+                    "SELECT COALESCE(MAX(position) + 1, 0) FROM session_reports "
+                    "WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO session_reports "
+                    "(session_id, name, report_hash, position) VALUES (?, ?, ?, ?)",
+                    (session_id, name, digest, position),
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db_error("añadir el reporte a la sesión", e)
+
+    def remove_session_report(self, session_id: str, name: str) -> None:
+        with self._lock:
+            try:
+                self._db.execute(
+                    "DELETE FROM session_reports WHERE session_id = ? AND name = ?",
+                    (session_id, name),
+                )
+                self._touch(session_id)
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db_error("quitar el reporte de la sesión", e)
+
+    def sync_messages(self, session_id: str, messages: list[dict]) -> None:
+        """
+        Guarda los mensajes del historial que aún no estaban guardados; si falla,
+        se vuelven a intentar en la siguiente llamada.
+        """
+        with self._lock:
+            try:
+                (stored,) = self._db.execute(
+                    "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if stored >= len(messages):
+                    return
+                self._touch(session_id)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO messages (session_id, seq, role, content) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (session_id, seq, message["role"], message["content"])
+                        for seq, message in enumerate(messages[stored:], start=stored)
+                    ],
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db_error("guardar los mensajes", e)
+
+    def restore_session(
+        self, session_id: str, summary_key: Callable[[str], str] | None = None
+    ) -> StoredSession | None:
+        """
+        Reportes, resúmenes e historial de una sesión, sin cargar los reportes.
+
+        Args:
+            session_id: Id de la sesión
+            summary_key: Clave del resumen a partir del hash de cada reporte
+                (model.stored_summary_key); sin ella no se leen resúmenes
+
+        Devuelve None si la sesión no existe o no se puede leer.
+        """
+        with self._lock:
+            try:
+                exists = self._db.execute(
+                    "SELECT 1 FROM sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+                if exists is None:
+                    return None
+                reports = self._db.execute(
+                    "SELECT name, report_hash FROM session_reports "
+                    "WHERE session_id = ? ORDER BY position",
+                    (session_id,),
+                ).fetchall()
+                summaries = {}
+                if summary_key is not None:
+                    for name, digest in reports:
+                        row = self._db.execute(
+                            "SELECT summary FROM report_summaries WHERE key = ?",
+                            (summary_key(digest),),
+                        ).fetchone()
+                        if row is not None:
+                            summaries[name] = row[0]
+                messages = self._db.execute(
+                    "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq",
+                    (session_id,),
+                ).fetchall()
+            except sqlite3.Error as e:
+                self._db_error("restaurar la sesión", e)
+                return None
+
+        session = StoredSession(session_id, reports=dict(reports), summaries=summaries)
+        session.messages = [{"role": role, "content": content} for role, content in messages]
+        return session
+
+    def stats(self) -> dict:
+        with self._lock:
+            try:
+                reports, stored_bytes = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM reports"
+                ).fetchone()
+                (sessions,) = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            except sqlite3.Error as e:
+                self._db_error("leer las estadísticas", e)
+                reports = stored_bytes = sessions = 0
+        return {"reports": reports, "stored_bytes": stored_bytes, "sessions": sessions}
+
+    def _db_error(self, operation: str, error: sqlite3.Error) -> None:
+        """Registra un error de SQLite y deshace la transacción a medias (con self._lock)."""
+        _logger.warning("No se pudo %s en el almacén de sesiones: %s", operation, error)
+        try:
+            self._db.rollback()
+        except sqlite3.Error:
+            pass
+
+
+class LazyReports(MutableMapping):
+    """
+    Reportes preprocesados por nombre que se leen del almacén al acceder a ellos.
+
+    Se comporta como el dict de st.session_state.lighthouse_reports: los reportes
+    nuevos se asignan directamente y los restaurados se descomprimen una vez.
+    """
+
+    def __init__(self, store: SessionStore, hashes: dict[str, str]):
+        self._store = store
+        self._hashes = dict(hashes)
+        self._loaded: dict[str, dict] = {}
+
+    def __getitem__(self, name: str) -> dict:
+        if name not in self._loaded:
+            report = self._store.load_report(self._hashes[name])
+            if report is None:
+                raise KeyError(name)
+            self._loaded[name] = report
+        return self._loaded[name]
+
+    def __setitem__(self, name: str, report: dict) -> None:
+        self._hashes.pop(name, None)
+        self._loaded[name] = report
+
+    def __delitem__(self, name: str) -> None:
+        if name not in self._hashes and name not in self._loaded:
+            raise KeyError(name)
+        self._hashes.pop(name, None)
+        self._loaded.pop(name, None)
+
+    def __iter__(self):
+        yield from self._hashes
+        yield from (name for name in self._loaded if name not in self._hashes)
+
+    def __len__(self) -> int:
+        return len(self._hashes.keys() | self._loaded.keys())
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._hashes or name in self._loaded
+
+
+_session_store: SessionStore | None = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore | None:
+    """Almacén compartido por todo el proceso, o None si está desactivado."""
+    global _session_store
+    with _session_store_lock:
+        if _session_store is None:
+            path = os.getenv("LIGHTHOUSE_STORE_PATH")
+            if path is None:
+                cache_dir = os.getenv("LIGHTHOUSE_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+                path = str(Path(cache_dir) / "sessions.sqlite3") if cache_dir else ""
+            if not path:
+                return None
+            try:
+                _session_store = SessionStore(path)
+            except (OSError, sqlite3.Error):
+                return None
+        return _session_store
@@ -0,0 +1,365 @@
+"""
+Telemetría del pipeline: trazas por etapa, logs estructurados y métricas.
+
+Cada operación de alto nivel (cargar un reporte, ingerirlo, un turno del chat) es
+una traza formada por spans, uno por etapa: parseo, preprocesamiento, cada
+llamada de resumen, la fusión, el ensamblado del contexto, la respuesta final...
+Cada span guarda su duración, los tokens de `usage` de Groq con su coste
+estimado, los aciertos de caché y los reintentos.
+
+Al cerrarse, la traza se escribe como una línea JSON en el logger
+"lighthouse_assistant.telemetry" (TELEMETRY_LOG=0 lo desactiva) y sus valores se
+acumulan en métricas con el formato de exposición de Prometheus
+(render_prometheus(), servido en GET /metrics por el backend).
+
+La traza activa se propaga con contextvars, así que las funciones instrumentadas
+no reciben ningún argumento extra. Los hilos de un ThreadPoolExecutor no heredan
+el contexto: cada tarea se ejecuta en una copia (contextvars.copy_context()) o se
+pasa la traza explícitamente a span().
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+
+# Precios públicos de Groq en USD por millón de tokens (entrada, salida);
+# orientativos, solo para estimar el coste de cada etapa
+MODEL_PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+
+_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_trace: ContextVar["Trace | None"] = ContextVar("telemetry_trace", default=None)
+_current_span: ContextVar["Span | None"] = ContextVar("telemetry_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    attributes: dict = field(default_factory=dict)
+    # Segundos desde el inicio de la traza
+    start: float = 0.0
+    duration: float | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": round(self.start, 4),
+            "duration": round(self.duration, 4) if self.duration is not None else None,
+            **self.attributes,
+        }
+
+
+class Trace:
+    """Spans de una operación; se pueden añadir desde varios hilos."""
+
+    def __init__(self, name: str, attributes: dict | None = None):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes or {})
+        self.started_at = time.time()
+        self.duration: float | None = None
+        self.spans: list[Span] = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def totals(self) -> dict:
+        """Tokens, coste, reintentos y aciertos de caché sumados de todos los spans."""
+        totals = {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cost_usd": 0.0,
+            "retries": 0,
+            "cache_hits": 0,
+        }
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            attributes = span.attributes
+            totals["prompt_tokens"] += attributes.get("prompt_tokens", 0)
+            totals["completion_tokens"] += attributes.get("completion_tokens", 0)
+            totals["cost_usd"] += attributes.get("cost_usd", 0.0)
+            totals["retries"] += attributes.get("retries", 0)
+            totals["cache_hits"] += sum(
+                value == "hit" or str(value).endswith("_hit")
+                for key, value in attributes.items()
+                if key.endswith("_cache")
+            )
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        return totals
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        return {
+            "trace": self.name,
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 4) if self.duration is not None else None,
+            **self.attributes,
+            **self.totals(),
+            "spans": [span.as_dict() for span in spans],
+        }
+
+
+class MetricsRegistry:
+    """Contadores e histogramas con etiquetas, exportables en formato Prometheus."""
+
+    def __init__(self):
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._histograms: dict[tuple[str, tuple], list] = {}
+        self._help: dict[str, tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Cuentas por bucket, suma y total
+                histogram = self._histograms[key] = [[0] * len(_DURATION_BUCKETS), 0.0, 0]
+            for i, bound in enumerate(_DURATION_BUCKETS):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self) -> dict:
+        """Valores actuales de los contadores, por nombre y etiquetas."""
+        with self._lock:
+            return {
+                f"{name}{_format_labels(labels)}": value
+                for (name, labels), value in self._counters.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, [list(value[0]), value[1], value[2]])
+                for key, value in self._histograms.items()
+            )
+
+        lines = []
+        described = set()
+
+        def header(name: str) -> None:
+            if name not in described and name in self._help:
+                kind, help_text = self._help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                described.add(name)
+
+        for (name, labels), value in counters:
+            header(name)
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), (buckets, total, count) in histograms:
+            header(name)
+            for bound, bucket_count in zip(_DURATION_BUCKETS, buckets):
+                bucket_labels = labels + (("le", _format_value(bound)),)
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {bucket_count}")
+            inf_labels = labels + (("le", "+Inf"),)
+            lines.append(f"{name}_bucket{_format_labels(inf_labels)} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("lighthouse_trace_duration_seconds", "histogram", "Duración de cada operación")
+METRICS.describe("lighthouse_stage_duration_seconds", "histogram", "Duración de cada etapa")
+METRICS.describe("lighthouse_stage_errors_total", "counter", "Etapas terminadas con error")
+METRICS.describe("lighthouse_tokens_total", "counter", "Tokens según usage de Groq")
+METRICS.describe("lighthouse_cost_usd_total", "counter", "Coste estimado en USD")
+METRICS.describe("lighthouse_cache_events_total", "counter", "Consultas a las cachés")
+METRICS.describe("lighthouse_retries_total", "counter", "Reintentos de llamadas al modelo")
+
+_recent_traces: deque = deque(maxlen=50)
+_logger = logging.getLogger("lighthouse_assistant.telemetry")
+_logger_lock = threading.Lock()
+_logger_configured = False
+
+
+def _get_logger() -> logging.Logger:
+    """Logger de telemetría; si la aplicación no configura logging, escribe en stderr."""
+    global _logger_configured
+    with _logger_lock:
+        if not _logger_configured:
+            if not _logger.handlers and not logging.getLogger().handlers:
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                _logger.addHandler(handler)
+                _logger.propagate = False
+            if _logger.level == logging.NOTSET:
+                _logger.setLevel(logging.INFO)
+            _logger_configured = True
+    return _logger
+
+
+def _reset(var: ContextVar, token: Token) -> None:
+    try:
+        var.reset(token)
+    except ValueError:
+        # Generador cerrado desde otro contexto (por ejemplo, al recolectarse)
+        var.set(None)
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def recent_traces() -> list[dict]:
+    """Últimas trazas terminadas en el proceso, de la más antigua a la más reciente."""
+    return [trace.as_dict() for trace in list(_recent_traces)]
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Trace]:
+    """Abre una traza y la hace activa para los span() que se ejecuten dentro."""
+    trace = Trace(name, attributes)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            trace.attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _reset(_current_trace, token)
+        trace.duration = time.perf_counter() - trace._start
+        _finish_trace(trace)
+
+
+@contextmanager
+def span(name: str, trace: Trace | None = None, **attributes) -> Iterator[Span]:
+    """
+    Mide una etapa dentro de la traza activa (o de la indicada).
+
+    Sin traza, la etapa solo se acumula en las métricas.
+    """
+    trace = trace if trace is not None else _current_trace.get()
+    current = Span(name, dict(attributes))
+    start = time.perf_counter()
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            current.attributes["error"] = type(e).__name__
+            METRICS.inc("lighthouse_stage_errors_total", stage=name)
+        raise
+    finally:
+        _reset(_current_span, token)
+        current.duration = time.perf_counter() - start
+        METRICS.observe("lighthouse_stage_duration_seconds", current.duration, stage=name)
+        if trace is not None:
+            current.start = start - trace._start
+            trace.add_span(current)
+
+
+def record_usage(current: Span | None, model: str, usage) -> None:
+    """
+    Anota los tokens de un objeto `usage` de Groq (y su coste) en el span,
+    incluidos los tokens de prompt servidos desde la caché de prefijos del
+    proveedor (prompt_tokens_details.cached_tokens) si los informa.
+    """
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        cached_tokens = details.get("cached_tokens") or 0
+    else:
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    cost = (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+    METRICS.inc("lighthouse_tokens_total", prompt_tokens, model=model, kind="prompt")
+    METRICS.inc("lighthouse_tokens_total", completion_tokens, model=model, kind="completion")
+    if cached_tokens:
+        METRICS.inc("lighthouse_tokens_total", cached_tokens, model=model, kind="cached")
+    METRICS.inc("lighthouse_cost_usd_total", cost, model=model)
+    if current is not None:
+        attributes = current.attributes
+        attributes["model"] = model
+        attributes["prompt_tokens"] = attributes.get("prompt_tokens", 0) + prompt_tokens
+        attributes["completion_tokens"] = (
+            attributes.get("completion_tokens", 0) + completion_tokens
+        )
+        if cached_tokens:
+            attributes["cached_tokens"] = attributes.get("cached_tokens", 0) + cached_tokens
+        attributes["cost_usd"] = round(attributes.get("cost_usd", 0.0) + cost, 8)
+
+
+def record_cache(cache: str, result: str) -> None:
+    """Registra una consulta a una caché ("hit", "memory_hit", "miss"...)."""
+    METRICS.inc("lighthouse_cache_events_total", cache=cache, result=result)
+    current = _current_span.get()
+    if current is not None:
+        current.attributes[f"{cache}_cache"] = result
+
+
+def record_retry(reason: str) -> None:
+    METRICS.inc("lighthouse_retries_total", reason=reason)
+    current = _current_span.get()
+    if current is not None:
+        current.attributes["retries"] = current.attributes.get("retries", 0) + 1
+
+
+def render_prometheus() -> str:
+    return METRICS.render_prometheus()
+
+
+def _finish_trace(trace: Trace) -> None:
+    status = "error" if "error" in trace.attributes else "ok"
+    METRICS.observe(
+        "lighthouse_trace_duration_seconds", trace.duration, trace=trace.name, status=status
+    )
+    _recent_traces.append(trace)
+    if os.getenv("TELEMETRY_LOG", "1") != "0":
+        _get_logger().info(json.dumps(trace.as_dict(), ensure_ascii=False, default=str))
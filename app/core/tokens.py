@@ -0,0 +1,109 @@
+"""
+Conteo de tokens para dimensionar prompts y contexto.
+
+El contador se elige una vez por proceso, en este orden:
+1. LIGHTHOUSE_TOKENIZER: ruta a un tokenizer.json (p. ej. el de Llama 3) que se
+   carga con la librería `tokenizers`, si está instalada.
+2. `tiktoken` con la codificación cl100k_base, si está instalado (su vocabulario
+   es parecido al de Llama 3).
+3. Un tokenizador aproximado local basado en expresiones regulares.
+
+Ni `tokenizers` ni `tiktoken` son dependencias del proyecto, así que con una
+instalación normal (`uv sync`) los tokens se **estiman** con el tokenizador
+aproximado, que sirve para repartir el presupuesto de contexto pero no coincide
+con el conteo real del modelo. counter_name() indica qué contador se está usando.
+"""
+
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Callable
+
+# Palabras, números y signos sueltos, como los separa un pre-tokenizador BPE
+_PIECE_RE = re.compile(r"\w+|[^\w\s]+|\s+")
+
+# Tokens extra por mensaje del chat (rol y separadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_logger = logging.getLogger("lighthouse_assistant.tokens")
+
+
+def _approximate_tokens(text: str) -> int:
+    """
+    Aproximación sin dependencias: cada palabra cuesta un token por cada ~4
+    caracteres, los signos de puntuación uno por cada ~2 y los espacios solo
+    cuentan a partir del segundo carácter seguido (indentación).
+    """
+    total = 0
+    for piece in _PIECE_RE.findall(text):
+        first = piece[0]
+        if first.isspace():
+            total += (len(piece) - 1) // 4
+        elif first.isalnum() or first == "_":
+            total += 1 + (len(piece) - 1) // 4
+        else:
+            total += (len(piece) + 1) // 2
+    return total
+
+
+@lru_cache(maxsize=1)
+def _select_counter() -> tuple[str, Callable[[str], int]]:
+    tokenizer_path = os.getenv("LIGHTHOUSE_TOKENIZER")
+    if tokenizer_path:
+        try:
+            from tokenizers import Tokenizer
+
+            tokenizer = Tokenizer.from_file(tokenizer_path)
+            return "tokenizers", lambda text: len(
+                tokenizer.encode(text, add_special_tokens=False).ids
+            )
+        except Exception as e:
+            _logger.warning("No se pudo cargar LIGHTHOUSE_TOKENIZER=%s: %s", tokenizer_path, e)
+
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "tiktoken", lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        pass
+
+    return "approximate", _approximate_tokens
+
+
+def _get_counter() -> Callable[[str], int]:
+    return _select_counter()[1]
+
+
+def counter_name() -> str:
+    """Contador en uso: "tokenizers", "tiktoken" o "approximate"."""
+    return _select_counter()[0]
+
+
+def count_tokens(text: str) -> int:
+    """Número de tokens de un texto."""
+    if not text:
+        return 0
+    return _get_counter()(text)
+
+
+def count_message_tokens(messages: list[dict]) -> int:
+    """Tokens de una lista de mensajes del chat, incluido el coste fijo por mensaje."""
+    return sum(
+        count_tokens(str(message.get("content", ""))) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = " […]") -> str:
+    """Recorta un texto para que (con el marcador) no supere max_tokens."""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    budget = max(0, max_tokens - count_tokens(marker))
+    # Estimación proporcional y ajuste hasta que quepa
+    end = len(text) * budget // max(1, count_tokens(text))
+    while end > 0 and count_tokens(text[:end]) > budget:
+        end = end * 9 // 10
+    return text[:end].rstrip() + marker
@@ -1,5 +1,11 @@
+import sys
+from pathlib import Path
+
 from dotenv import load_dotenv
 
+# Paquetes de la raíz del repositorio (rag/, backend/)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
 from ui.layout import render_layout
 from ui.chat import render_chat
 
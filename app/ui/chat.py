@@ -1,5 +1,9 @@
+import os
+
 import streamlit as st
-from core.model import get_model_response
+from core.model import stream_model_response
+from core.telemetry import span, start_trace
+from ui.layout import get_report_ingestor, persist_messages
 
 
 def render_chat():
@@ -42,16 +46,67 @@ def render_chat():
         st.session_state.messages.append({"role": "user", "content": prompt})
 
         with st.chat_message("assistant"):
-            with st.spinner("Pensando..."):
-                # Obtener reportes cargados si existen
-                lighthouse_reports = st.session_state.get("lighthouse_reports", {})
+            # Obtener reportes cargados (preprocesados) si existen
+            lighthouse_reports = st.session_state.get("lighthouse_reports", {})
+
+            # Obtener temperatura del slider (default 0.7)
+            temperature = st.session_state.get("temperature", 0.7)
+            backend_url = os.getenv("BACKEND_URL")
+
+            with start_trace(
+                "chat_turn",
+                temperature=temperature,
+                reports=len(lighthouse_reports),
+                backend=bool(backend_url),
+            ) as trace:
+                # Esperar solo por los reportes que aún se están procesando
+                ingestor = get_report_ingestor()
+                # El prefetch no compite con la respuesta (ver core/prefetch.py)
+                ingestor.pause_prefetch()
+                try:
+                    with span("wait_reports"):
+                        if ingestor.pending():
+                            with st.spinner("Procesando reportes..."):
+                                report_summaries = ingestor.wait(list(lighthouse_reports))
+                        else:
+                            report_summaries = ingestor.wait(list(lighthouse_reports))
 
-                # Obtener temperatura del slider (default 0.7)
-                temperature = st.session_state.get("temperature", 0.7)
-                print(f"[DEBUG] Temperatura obtenida del session_state: {temperature}")
+                    # Mostrar la respuesta a medida que llega
+                    if backend_url:
+                        from backend.client import RemoteResponseStream
 
-                response = get_model_response(
-                    st.session_state.messages, lighthouse_reports, temperature
+                        stream = RemoteResponseStream(
+                            backend_url,
+                            st.session_state.messages,
+                            reports=ingestor.report_ids(list(lighthouse_reports)),
+                            temperature=temperature,
+                        )
+                    else:
+                        stream = stream_model_response(
+                            st.session_state.messages,
+                            temperature=temperature,
+                            report_summaries=report_summaries,
+                            processed_reports=lighthouse_reports,
+                        )
+                    with span("stream_response"):
+                        st.write_stream(stream)
+                finally:
+                    ingestor.resume_prefetch()
+                response = stream.text
+
+            st.session_state.last_trace = trace.as_dict()
+            st.session_state.last_response_timing = stream.timing()
+            if stream.context_accounting is not None:
+                st.session_state.last_context_accounting = stream.context_accounting.as_dict()
+            if stream.cached:
+                st.caption("Respuesta desde caché")
+            elif stream.time_to_first_token is not None and stream.context_accounting:
+                st.caption(
+                    f"Primer token: {stream.time_to_first_token:.2f} s · "
+                    f"Total: {stream.total_time:.2f} s · "
+                    f"Contexto: {stream.context_accounting.total} tokens · "
+                    f"Modelo: {stream.model}"
                 )
-                st.markdown(response)
         st.session_state.messages.append({"role": "assistant", "content": response})
+
+    persist_messages()
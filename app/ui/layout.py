@@ -1,5 +1,207 @@
 import streamlit as st
+import hashlib
 import json
+import os
+import uuid
+
+from core.ingestion import IngestedReport, ReportIngestor, ReportStatus
+from core.cache import report_hash
+from core.model import FALLBACK_SUMMARY_PREFIX, stored_summary_key
+from core.report_io import load_preprocessed_report
+from core.store import LazyReports, get_session_store
+from core.telemetry import start_trace
+
+STATUS_LABELS = {
+    ReportStatus.QUEUED: "⏳ En cola",
+    ReportStatus.PROCESSING: "⚙️ Procesando",
+    ReportStatus.READY: "✅ Listo",
+    ReportStatus.FAILED: "❌ Error",
+}
+
+
+def get_session_id() -> str:
+    """Id de la sesión, guardado en la URL (?session=...) para sobrevivir a las recargas."""
+    if "session_id" not in st.session_state:
+        session_id = st.query_params.get("session") or uuid.uuid4().hex
+        st.query_params["session"] = session_id
+        st.session_state.session_id = session_id
+    return st.session_state.session_id
+
+
+def _persist_summary(entry: IngestedReport) -> None:
+    store = get_session_store()
+    # El resumen de respaldo no se guarda: al reabrir se vuelve a intentar
+    if store is not None and not entry.summary.startswith(FALLBACK_SUMMARY_PREFIX):
+        digest = report_hash(entry.processed)
+        store.put_summary(digest, stored_summary_key(digest), entry.summary)
+
+
+def get_report_ingestor() -> ReportIngestor:
+    if "report_ingestor" not in st.session_state:
+        backend_url = os.getenv("BACKEND_URL")
+        if backend_url:
+            # Los resúmenes y el chat se procesan en el backend compartido
+            from backend.client import RemoteReportIngestor
+
+            st.session_state.report_ingestor = RemoteReportIngestor(backend_url)
+        else:
+            st.session_state.report_ingestor = ReportIngestor(on_ready=_persist_summary)
+    return st.session_state.report_ingestor
+
+
+def persist_messages() -> None:
+    """Guarda en el almacén los mensajes nuevos del historial."""
+    store = get_session_store()
+    if store is not None and st.session_state.get("messages"):
+        store.sync_messages(get_session_id(), st.session_state.messages)
+
+
+def _restore_session():
+    """
+    Recupera los reportes, resúmenes e historial de la sesión de la URL tras una
+    recarga de la página o un reinicio, sin volver a procesar ni llamar al modelo.
+    """
+    if st.session_state.get("session_restored"):
+        return
+    st.session_state.session_restored = True
+
+    store = get_session_store()
+    if store is None:
+        return
+    with start_trace("restore_session"):
+        stored = store.restore_session(get_session_id(), summary_key=stored_summary_key)
+        if stored is None:
+            return
+
+        reports = LazyReports(store, stored.reports)
+        st.session_state.lighthouse_reports = reports
+        st.session_state.messages = stored.messages
+
+        ingestor = get_report_ingestor()
+        for name in stored.reports:
+            summary = stored.summaries.get(name)
+            if summary is not None and isinstance(ingestor, ReportIngestor):
+                ingestor.restore(name, summary)
+            else:
+                try:
+                    report = reports[name]
+                except KeyError:
+                    # El reporte no llegó a guardarse (ver core/store.py)
+                    del reports[name]
+                    continue
+                # Sin resumen guardado (o con el backend): se resume de nuevo
+                ingestor.submit(name, report, preprocessed=True)
+
+
+def _load_uploaded_report(uploaded_file, spill_dir: str | None) -> tuple[dict, str | None]:
+    """
+    Reporte preprocesado de un archivo subido y su resumen, si ya se había hecho.
+
+    Con el almacén activo, un archivo que ya subió cualquier sesión se lee de él
+    sin parsearlo ni preprocesarlo.
+    """
+    store = get_session_store()
+    if store is None:
+        processed, _ = load_preprocessed_report(uploaded_file, spill_dir=spill_dir)
+        return processed, None
+
+    data = uploaded_file.getvalue()
+    source_hash = hashlib.sha256(data).hexdigest()
+    digest = store.find_source(source_hash)
+    processed = store.load_report(digest) if digest else None
+    if processed is None:
+        processed, _ = load_preprocessed_report(data, spill_dir=spill_dir)
+        digest = store.put_report(processed, source_hash)
+
+    store.add_session_report(get_session_id(), uploaded_file.name, digest)
+    return processed, store.get_summary(stored_summary_key(digest))
+
+
+def _render_report_list():
+    ingestor = get_report_ingestor()
+    statuses = ingestor.statuses()
+    errors = ingestor.errors()
+
+    st.success(f"✅ {len(st.session_state.lighthouse_reports)} reporte(s) cargado(s)")
+
+    # Listar reportes con su estado y opción de eliminar
+    for file_name in list(st.session_state.lighthouse_reports.keys()):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.text(f"📄 {file_name}")
+            status = statuses.get(file_name)
+            if status is not None:
+                st.caption(STATUS_LABELS[status])
+            if file_name in errors:
+                st.caption(errors[file_name])
+        with col2:
+            if st.button("🗑️", key=f"delete_{file_name}"):
+                del st.session_state.lighthouse_reports[file_name]
+                ingestor.remove(file_name)
+                store = get_session_store()
+                if store is not None:
+                    store.remove_session_report(get_session_id(), file_name)
+                st.session_state.report_removed = True
+                st.rerun()
+
+
+def _trace_rows(trace: dict) -> list[dict]:
+    rows = []
+    for stage in trace["spans"]:
+        tokens = stage.get("prompt_tokens", 0) + stage.get("completion_tokens", 0)
+        caches = [
+            f"{key.removesuffix('_cache')}: {value}"
+            for key, value in stage.items()
+            if key.endswith("_cache")
+        ]
+        rows.append(
+            {
+                "Etapa": stage["name"],
+                "Inicio (s)": stage["start"],
+                "Duración (s)": stage["duration"],
+                "Tokens": tokens or None,
+                "Caché": ", ".join(caches) or None,
+                "Reintentos": stage.get("retries") or None,
+            }
+        )
+    return rows
+
+
+def _trace_caption(trace: dict) -> str:
+    return (
+        f"Total: {trace['duration']:.2f} s · "
+        f"Tokens: {trace['prompt_tokens']} + {trace['completion_tokens']} · "
+        f"Coste estimado: ${trace['cost_usd']:.5f} · "
+        f"Aciertos de caché: {trace['cache_hits']} · Reintentos: {trace['retries']}"
+    )
+
+
+def _render_telemetry_panel():
+    """Desglose por etapas de la última respuesta y de la ingestión de los reportes."""
+    trace = st.session_state.get("last_trace")
+    if trace is None or os.getenv("TELEMETRY_PANEL", "1") == "0":
+        return
+
+    with st.expander("📈 Última petición"):
+        st.caption(_trace_caption(trace))
+        st.dataframe(_trace_rows(trace), hide_index=True)
+
+        # Solo la ingestión local guarda la traza de cada reporte
+        get_entry = getattr(get_report_ingestor(), "get", None)
+        for file_name in st.session_state.get("lighthouse_reports", {}):
+            entry = get_entry(file_name) if get_entry else None
+            if entry is not None and entry.trace is not None:
+                st.markdown(f"**Ingestión de {file_name}**")
+                st.caption(_trace_caption(entry.trace))
+                st.dataframe(_trace_rows(entry.trace), hide_index=True)
+
+
+@st.fragment(run_every=1.0)
+def _render_pending_report_list():
+    # Refresca el estado mientras haya reportes procesándose
+    if not get_report_ingestor().pending():
+        st.rerun()
+    _render_report_list()
 
 
 def render_layout():
@@ -7,6 +209,8 @@ def render_layout():
 
     st.title("Asistente :blue[Google Lighthouse]")
 
+    _restore_session()
+
     with st.sidebar:
         st.subheader("⚙️ Configuración del Modelo")
 
@@ -46,33 +250,40 @@ def render_layout():
             if "lighthouse_reports" not in st.session_state:
                 st.session_state.lighthouse_reports = {}
 
+            # Directorio opcional donde guardar los archivos originales
+            spill_dir = os.getenv("LIGHTHOUSE_SPILL_DIR") or None
+
             # Cargar nuevos reportes
             for uploaded_file in uploaded_files:
                 try:
-                    report_data = json.load(uploaded_file)
                     file_name = uploaded_file.name
 
                     # Solo agregar si es nuevo o diferente
                     if file_name not in st.session_state.lighthouse_reports:
-                        st.session_state.lighthouse_reports[file_name] = report_data
+                        # En la sesión solo se guarda el reporte preprocesado
+                        with start_trace("load_report", report=file_name):
+                            processed_report, summary = _load_uploaded_report(
+                                uploaded_file, spill_dir
+                            )
+                        st.session_state.lighthouse_reports[file_name] = processed_report
                         st.session_state.report_loaded = True
+                        ingestor = get_report_ingestor()
+                        if summary is not None and isinstance(ingestor, ReportIngestor):
+                            ingestor.restore(file_name, summary, processed_report)
+                        else:
+                            # Resumir en segundo plano
+                            ingestor.submit(file_name, processed_report, preprocessed=True)
 
                 except json.JSONDecodeError:
                     st.error(f"Error al leer {uploaded_file.name}: no es un JSON válido")
 
         # Mostrar reportes cargados
         if "lighthouse_reports" in st.session_state and st.session_state.lighthouse_reports:
-            st.success(f"✅ {len(st.session_state.lighthouse_reports)} reporte(s) cargado(s)")
-
-            # Listar reportes con opción de eliminar
-            for file_name in list(st.session_state.lighthouse_reports.keys()):
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.text(f"📄 {file_name}")
-                with col2:
-                    if st.button("🗑️", key=f"delete_{file_name}"):
-                        del st.session_state.lighthouse_reports[file_name]
-                        st.session_state.report_removed = True
-                        st.rerun()
+            if get_report_ingestor().pending():
+                _render_pending_report_list()
+            else:
+                _render_report_list()
         else:
             st.info("No hay reportes cargados")
+
+        _render_telemetry_panel()
@@ -0,0 +1,14 @@
+"""
+Backend HTTP asíncrono con la ingestión, el resumen y el chat de app/core.
+
+Se ejecuta con `python -m backend` y lo comparten todas las sesiones de la UI
+(ver backend/client.py y BACKEND_URL).
+"""
+
+import sys
+from pathlib import Path
+
+# core/ vive en app/, que Streamlit pone en sys.path pero aquí hay que añadir
+_APP_DIR = str(Path(__file__).resolve().parents[1] / "app")
+if _APP_DIR not in sys.path:
+    sys.path.append(_APP_DIR)
@@ -0,0 +1,37 @@
+"""
+Arranca el backend de análisis.
+
+Uso:
+    python -m backend --host 127.0.0.1 --port 8000
+"""
+
+import argparse
+import asyncio
+
+from dotenv import load_dotenv
+
+from .app import create_server
+
+
+async def _serve(host: str, port: int) -> None:
+    server = create_server()
+    await server.start(host, port)
+    print(f"Backend escuchando en http://{host}:{server.address[1]}")
+    await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend de Lighthouse Assistant")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    load_dotenv()
+    try:
+        asyncio.run(_serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Rutas HTTP del backend de análisis.
+
+    GET  /health                      Estado y carga del servicio
+    GET  /metrics                     Métricas en formato Prometheus
+    POST /reports[?preprocessed=1]    Sube un reporte (JSON); devuelve su id
+    GET  /reports/{report_id}         Estado de la ingestión
+    GET  /reports/{report_id}/summary[?timeout=s]
+                                      Espera y devuelve el resumen
+    POST /chat                        {"messages", "reports", "temperature", "stream"}
+                                      Respuesta JSON o eventos SSE (delta / done)
+
+Las peticiones rechazadas por contrapresión devuelven 503 con Retry-After.
+"""
+
+import os
+
+from core.telemetry import render_prometheus
+
+from .http import (
+    HTTPError,
+    HTTPServer,
+    Request,
+    Response,
+    Router,
+    StreamResponse,
+    json_response,
+    sse_event,
+)
+from .service import AnalysisService, Overloaded
+
+RETRY_AFTER_SECONDS = "1"
+
+
+def _overloaded(error: Overloaded) -> HTTPError:
+    return HTTPError(503, str(error), headers={"Retry-After": RETRY_AFTER_SECONDS})
+
+
+def _chat_arguments(request: Request) -> tuple[list[dict], dict[str, str], float, bool]:
+    payload = request.json()
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "Se esperaba un objeto JSON")
+
+    messages = payload.get("messages")
+    if (
+        not isinstance(messages, list)
+        or not messages
+        or not all(isinstance(m, dict) and "role" in m and "content" in m for m in messages)
+    ):
+        raise HTTPError(400, "messages debe ser una lista no vacía de {role, content}")
+
+    reports = payload.get("reports") or {}
+    if not isinstance(reports, dict):
+        raise HTTPError(400, "reports debe ser un objeto {nombre: report_id}")
+
+    try:
+        temperature = float(payload.get("temperature", 0.7))
+    except (TypeError, ValueError):
+        raise HTTPError(400, "temperature debe ser un número")
+    return messages, reports, temperature, bool(payload.get("stream"))
+
+
+def create_router(service: AnalysisService) -> Router:
+    router = Router()
+
+    async def health(request: Request):
+        return json_response({"status": "ok", **service.stats()})
+
+    async def metrics(request: Request):
+        return Response(
+            body=render_prometheus().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def upload_report(request: Request):
+        preprocessed = request.query.get("preprocessed") in ("1", "true")
+        try:
+            report_id, created = await service.ingest(request.body, preprocessed=preprocessed)
+        except ValueError:
+            raise HTTPError(400, "El reporte no es un JSON válido")
+        except Overloaded as e:
+            raise _overloaded(e)
+        return json_response(service.report_info(report_id), status=202 if created else 200)
+
+    async def get_report(request: Request):
+        info = service.report_info(request.params["report_id"])
+        if info is None:
+            raise HTTPError(404, "Reporte no encontrado")
+        return json_response(info)
+
+    async def get_summary(request: Request):
+        report_id = request.params["report_id"]
+        try:
+            timeout = float(request.query["timeout"]) if "timeout" in request.query else None
+        except ValueError:
+            raise HTTPError(400, "timeout debe ser un número")
+        try:
+            summary = await service.summary(report_id, timeout=timeout)
+        except KeyError:
+            raise HTTPError(404, "Reporte no encontrado")
+        except TimeoutError:
+            raise HTTPError(504, "El reporte aún se está procesando")
+        return json_response({**service.report_info(report_id), "summary": summary})
+
+    async def chat(request: Request):
+        messages, reports, temperature, stream = _chat_arguments(request)
+        events = service.stream_chat(messages, reports, temperature)
+
+        # El primer evento llega después de pasar la cola: los rechazos y reportes
+        # desconocidos aún se pueden devolver como errores HTTP
+        try:
+            first = await anext(events)
+        except Overloaded as e:
+            raise _overloaded(e)
+        except KeyError as e:
+            raise HTTPError(404, f"Reporte no encontrado: {e.args[0]}")
+
+        if stream:
+
+            async def chunks():
+                event = first
+                try:
+                    while True:
+                        kind, data = event
+                        yield sse_event(
+                            data if kind == "done" else {"content": data}, event=kind
+                        )
+                        if kind == "done":
+                            return
+                        event = await anext(events)
+                finally:
+                    # Si el cliente se desconecta se deja de generar la respuesta
+                    await events.aclose()
+
+            return StreamResponse(chunks=chunks())
+
+        parts = []
+        event = first
+        while event[0] != "done":
+            parts.append(event[1])
+            event = await anext(events)
+        return json_response({"content": "".join(parts), **event[1]})
+
+    router.add("GET", "/health", health)
+    router.add("GET", "/metrics", metrics)
+    router.add("POST", "/reports", upload_report)
+    router.add("GET", "/reports/{report_id}", get_report)
+    router.add("GET", "/reports/{report_id}/summary", get_summary)
+    router.add("POST", "/chat", chat)
+    return router
+
+
+def create_server(service: AnalysisService | None = None) -> HTTPServer:
+    max_body_bytes = int(os.getenv("BACKEND_MAX_BODY_BYTES", 50 * 1024 * 1024))
+    return HTTPServer(create_router(service or AnalysisService()), max_body_bytes)
@@ -0,0 +1,236 @@
+"""
+Cliente síncrono del backend para la UI de Streamlit.
+
+RemoteReportIngestor y RemoteResponseStream tienen la misma interfaz que
+ReportIngestor y ResponseStream de core/, así que la UI solo elige una u otra
+implementación según BACKEND_URL.
+"""
+
+import json
+import threading
+import time
+
+import httpx
+
+from core.context import ContextAccounting
+from core.ingestion import ReportStatus
+from core.routing import Route, RouteDecision
+from core.scope import Scope, ScopeResult
+
+_clients: dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def get_backend_http_client(base_url: str) -> httpx.Client:
+    """Cliente HTTP con conexiones keep-alive compartido por todas las sesiones."""
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = httpx.Client(
+                base_url=base_url, timeout=httpx.Timeout(60.0, connect=5.0)
+            )
+            _clients[base_url] = client
+        return client
+
+
+class RemoteReportIngestor:
+    """ReportIngestor que delega la ingestión en el backend."""
+
+    def __init__(self, base_url: str):
+        self.http = get_backend_http_client(base_url)
+        self._ids: dict[str, str] = {}
+        self._statuses: dict[str, ReportStatus] = {}
+        self._errors: dict[str, str] = {}
+
+    def submit(self, name: str, report: dict, preprocessed: bool = False) -> None:
+        try:
+            response = self.http.post(
+                "/reports",
+                params={"preprocessed": "1"} if preprocessed else None,
+                content=json.dumps(report).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self._ids.pop(name, None)
+            self._statuses[name] = ReportStatus.FAILED
+            self._errors[name] = f"Backend no disponible: {e}"
+            return
+        data = response.json()
+        self._ids[name] = data["report_id"]
+        self._update(name, data)
+
+    def remove(self, name: str) -> None:
+        # El backend conserva el reporte para otras sesiones
+        self._ids.pop(name, None)
+        self._statuses.pop(name, None)
+        self._errors.pop(name, None)
+
+    def pause_prefetch(self) -> None:
+        # El backend detiene su propio prefetch mientras responde
+        pass
+
+    def resume_prefetch(self) -> None:
+        pass
+
+    def report_ids(self, names: list[str] | None = None) -> dict[str, str]:
+        return {
+            name: report_id
+            for name, report_id in self._ids.items()
+            if (names is None or name in names)
+            and self._statuses.get(name) != ReportStatus.FAILED
+        }
+
+    def _update(self, name: str, data: dict) -> None:
+        self._statuses[name] = ReportStatus(data["status"])
+        if data.get("error"):
+            self._errors[name] = data["error"]
+
+    def _refresh(self) -> None:
+        for name, report_id in list(self._ids.items()):
+            if self._statuses.get(name) in (ReportStatus.READY, ReportStatus.FAILED):
+                continue
+            try:
+                response = self.http.get(f"/reports/{report_id}")
+                response.raise_for_status()
+                self._update(name, response.json())
+            except httpx.HTTPError as e:
+                self._statuses[name] = ReportStatus.FAILED
+                self._errors[name] = f"Backend no disponible: {e}"
+
+    def statuses(self) -> dict[str, ReportStatus]:
+        self._refresh()
+        return dict(self._statuses)
+
+    def errors(self) -> dict[str, str]:
+        return {
+            name: error
+            for name, error in self._errors.items()
+            if self._statuses.get(name) == ReportStatus.FAILED
+        }
+
+    def pending(self) -> bool:
+        return any(
+            status in (ReportStatus.QUEUED, ReportStatus.PROCESSING)
+            for status in self.statuses().values()
+        )
+
+    def wait(
+        self, names: list[str] | None = None, timeout: float | None = None
+    ) -> dict[str, str]:
+        summaries = {}
+        for name, report_id in self.report_ids(names).items():
+            params = {"timeout": str(timeout)} if timeout is not None else None
+            try:
+                response = self.http.get(
+                    f"/reports/{report_id}/summary", params=params, timeout=None
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                self._statuses[name] = ReportStatus.FAILED
+                self._errors[name] = f"Backend no disponible: {e}"
+                continue
+            data = response.json()
+            self._update(name, data)
+            if self._statuses[name] == ReportStatus.READY:
+                summaries[name] = data["summary"]
+        return summaries
+
+
+class RemoteResponseStream:
+    """
+    ResponseStream servido por el backend mediante Server-Sent Events.
+
+    Mide los tiempos en el cliente (incluyen la red y la cola del backend) y toma
+    del evento final el desglose de tokens, el modelo, la ruta y el alcance.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        messages: list[dict],
+        reports: dict[str, str] | None = None,
+        temperature: float = 0.7,
+    ):
+        self.http = get_backend_http_client(base_url)
+        self.messages = messages
+        self.reports = reports or {}
+        self.temperature = temperature
+        self.time_to_first_token: float | None = None
+        self.total_time: float | None = None
+        self.error: Exception | None = None
+        self.context_accounting: ContextAccounting | None = None
+        self.cached = False
+        self.scope: ScopeResult | None = None
+        self.route: RouteDecision | None = None
+        self.model: str | None = None
+        self._parts: list[str] = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def timing(self) -> dict:
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "total_time": self.total_time,
+        }
+
+    def __iter__(self):
+        start = time.perf_counter()
+        payload = {
+            "messages": self.messages,
+            "reports": self.reports,
+            "temperature": self.temperature,
+            "stream": True,
+        }
+        try:
+            with self.http.stream("POST", "/chat", json=payload, timeout=None) as response:
+                if response.status_code != 200:
+                    response.read()
+                    raise RuntimeError(response.json().get("error", response.status_code))
+
+                event = None
+                for line in response.iter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: ") :]
+                    elif line.startswith("data: "):
+                        data = json.loads(line[len("data: ") :])
+                        if event == "done":
+                            self._finish(data)
+                        else:
+                            if self.time_to_first_token is None:
+                                self.time_to_first_token = time.perf_counter() - start
+                            self._parts.append(data["content"])
+                            yield data["content"]
+        except Exception as e:
+            self.error = e
+            if self._parts:
+                message = f"\n\n⚠️ La respuesta se interrumpió: {str(e)}"
+            else:
+                message = f"Lo siento, ha ocurrido un error al procesar tu solicitud: {str(e)}"
+            self._parts.append(message)
+            yield message
+        finally:
+            self.total_time = time.perf_counter() - start
+
+    def _finish(self, data: dict) -> None:
+        if data.get("error"):
+            self.error = RuntimeError(data["error"])
+        self.cached = bool(data.get("cached"))
+        self.model = data.get("model")
+        if data.get("scope"):
+            # El backend solo envía la decisión, no cómo se tomó
+            self.scope = ScopeResult(Scope(data["scope"]), "backend")
+        route = data.get("route")
+        if route:
+            self.route = RouteDecision(
+                Route(route["route"]),
+                route["complexity"],
+                reasons=route["reasons"].split(",") if route["reasons"] else [],
+                escalated=route.get("escalated"),
+            )
+        context = data.get("context")
+        if context:
+            context.pop("total", None)
+            self.context_accounting = ContextAccounting(**context)
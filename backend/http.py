@@ -0,0 +1,276 @@
+"""
+Capa HTTP del backend sobre tornado.
+
+tornado se ocupa del protocolo (parseo, keep-alive, Transfer-Encoding: chunked en
+las respuestas en streaming); aquí quedan las rutas (Router), los tipos de
+petición y respuesta que usan los handlers de backend/app.py y las reglas sobre
+el cuerpo de las peticiones:
+
+- Solo se aceptan cuerpos con un único Content-Length; una petición con
+  Transfer-Encoding (sola o junto a Content-Length) o con la cabecera repetida se
+  rechaza, para que un proxy delante no pueda interpretar sus límites de otra forma.
+- Un Content-Length mayor que max_body_bytes devuelve 413 sin leer el cuerpo.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable
+from urllib.parse import parse_qsl
+
+from tornado.httpserver import HTTPServer as TornadoHTTPServer
+from tornado.iostream import StreamClosedError
+from tornado.netutil import bind_sockets
+from tornado.web import Application, RequestHandler, stream_request_body
+
+MAX_HEADER_BYTES = 64 * 1024
+
+_logger = logging.getLogger("lighthouse_assistant.backend")
+
+
+class HTTPError(Exception):
+    """Error que se devuelve al cliente como respuesta JSON."""
+
+    def __init__(self, status: int, message: str, headers: dict[str, str] | None = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: dict[str, str]
+    body: bytes = b""
+    params: dict[str, str] = field(default_factory=dict)
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            raise HTTPError(400, "El cuerpo no es un JSON válido")
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: bytes = b""
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class StreamResponse:
+    """Respuesta cuyo cuerpo se envía a medida que se produce."""
+
+    chunks: AsyncIterator[bytes]
+    status: int = 200
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def json_response(payload, status: int = 200, headers: dict[str, str] | None = None) -> Response:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return Response(
+        status=status,
+        body=body,
+        headers={"Content-Type": "application/json; charset=utf-8", **(headers or {})},
+    )
+
+
+def sse_event(data, event: str | None = None) -> bytes:
+    """Codifica un evento Server-Sent Events con datos JSON."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+Handler = Callable[[Request], Awaitable[Response | StreamResponse]]
+
+
+class Router:
+    """Rutas del tipo "/reports/{report_id}" asociadas a un método HTTP."""
+
+    def __init__(self):
+        self._routes: list[tuple[str, re.Pattern, Handler]] = []
+
+    def add(self, method: str, pattern: str, handler: Handler) -> None:
+        regex = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", pattern)
+        self._routes.append((method, re.compile(f"^{regex}$"), handler))
+
+    def resolve(self, method: str, path: str) -> tuple[Handler, dict[str, str]]:
+        allowed = False
+        for route_method, regex, handler in self._routes:
+            match = regex.match(path)
+            if match is None:
+                continue
+            if route_method == method:
+                return handler, match.groupdict()
+            allowed = True
+        if allowed:
+            raise HTTPError(405, "Método no permitido")
+        raise HTTPError(404, "Ruta no encontrada")
+
+
+class HTTPServer:
+    """
+    Servidor tornado que despacha las peticiones a un Router.
+
+    Args:
+        router: Rutas del servicio
+        max_body_bytes: Tamaño máximo del cuerpo de una petición
+    """
+
+    def __init__(self, router: Router, max_body_bytes: int = 50 * 1024 * 1024):
+        self.router = router
+        self.max_body_bytes = max_body_bytes
+        self._server: TornadoHTTPServer | None = None
+        self._sockets = []
+        self._closed: asyncio.Event | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        application = Application([(r".*", _RouterHandler, {"server": self})])
+        self._server = TornadoHTTPServer(
+            application,
+            max_header_size=MAX_HEADER_BYTES,
+            # El límite propio se comprueba antes (413); este es solo un tope
+            max_body_size=self.max_body_bytes,
+        )
+        self._sockets = bind_sockets(port, host)
+        self._server.add_sockets(self._sockets)
+        self._closed = asyncio.Event()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self._sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        await self._closed.wait()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.stop()
+            await self._server.close_all_connections()
+            self._closed.set()
+
+    def check_body_headers(self, headers: dict[str, list[str]]) -> None:
+        """
+        Valida las cabeceras que delimitan el cuerpo de la petición.
+
+        Args:
+            headers: Valores de cada cabecera (en minúsculas), en orden
+
+        Raises:
+            HTTPError: Si la petición es ambigua, usa chunked o es demasiado grande
+        """
+        lengths = headers.get("content-length", [])
+        encodings = headers.get("transfer-encoding", [])
+        if len(lengths) > 1 or len(encodings) > 1:
+            raise HTTPError(400, "Cabecera Content-Length o Transfer-Encoding repetida")
+        if lengths and encodings:
+            raise HTTPError(400, "Content-Length y Transfer-Encoding a la vez")
+        if encodings:
+            raise HTTPError(411, "Se requiere Content-Length")
+        if not lengths:
+            return
+        value = lengths[0].strip()
+        if not value.isdigit():
+            raise HTTPError(400, "Content-Length inválido")
+        if int(value) > self.max_body_bytes:
+            raise HTTPError(413, "El cuerpo de la petición es demasiado grande")
+
+    @staticmethod
+    def error_response(error: HTTPError) -> Response:
+        return json_response({"error": error.message}, status=error.status, headers=error.headers)
+
+
+@stream_request_body
+class _RouterHandler(RequestHandler):
+    """Pasa cada petición al Router del HTTPServer y escribe su respuesta."""
+
+    SUPPORTED_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+    def initialize(self, server: HTTPServer) -> None:
+        self.server = server
+        self._chunks: list[bytes] = []
+
+    def prepare(self):
+        headers: dict[str, list[str]] = {}
+        for name, value in self.request.headers.get_all():
+            headers.setdefault(name.lower(), []).append(value)
+        try:
+            self.server.check_body_headers(headers)
+        except HTTPError as e:
+            # tornado cierra la conexión al terminar sin haber leído el cuerpo, así
+            # que lo que venga detrás no se interpreta como otra petición
+            self.set_header("Connection", "close")
+            self._write_response(self.server.error_response(e))
+
+    def data_received(self, chunk: bytes) -> None:
+        self._chunks.append(chunk)
+
+    async def get(self):
+        await self._dispatch()
+
+    post = put = patch = delete = get
+
+    async def _dispatch(self) -> None:
+        request = Request(
+            method=self.request.method,
+            path=self.request.path,
+            query=dict(parse_qsl(self.request.query)),
+            headers={name.lower(): value for name, value in self.request.headers.items()},
+            body=b"".join(self._chunks),
+        )
+        try:
+            handler, request.params = self.server.router.resolve(request.method, request.path)
+            response = await handler(request)
+        except HTTPError as e:
+            response = self.server.error_response(e)
+        except Exception:
+            # El detalle queda en el log del servidor, no en la respuesta
+            _logger.exception("Error interno en %s %s", request.method, request.path)
+            response = json_response({"error": "Error interno del servidor"}, status=500)
+
+        if isinstance(response, StreamResponse):
+            await self._write_stream(response)
+        else:
+            self._write_response(response)
+
+    def _write_response(self, response: Response) -> None:
+        self.set_status(response.status)
+        for name, value in response.headers.items():
+            self.set_header(name, value)
+        self.finish(response.body)
+
+    async def _write_stream(self, response: StreamResponse) -> None:
+        """Envía la respuesta a trozos (tornado usa Transfer-Encoding: chunked)."""
+        self.set_status(response.status)
+        headers = {
+            "Content-Type": "text/event-stream; charset=utf-8",
+            "Cache-Control": "no-cache",
+            **response.headers,
+        }
+        for name, value in headers.items():
+            self.set_header(name, value)
+        try:
+            async for chunk in response.chunks:
+                if chunk:
+                    self.write(chunk)
+                    # flush() aplica contrapresión si el cliente lee despacio
+                    await self.flush()
+        except StreamClosedError:
+            return
+        except Exception:
+            _logger.exception("Error en la respuesta en streaming de %s", self.request.path)
+            # Sin el fragmento final el cliente sabe que la respuesta quedó incompleta
+            self.request.connection.stream.close()
+            return
+        finally:
+            # Si el cliente se desconecta, cerrar el generador cancela el trabajo pendiente
+            aclose = getattr(response.chunks, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        self.finish()
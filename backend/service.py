@@ -0,0 +1,265 @@
+"""
+Servicio de análisis compartido por todas las sesiones del backend.
+
+Los reportes se identifican por el hash de su contenido preprocesado, así que el
+mismo reporte subido desde varias sesiones se resume una sola vez. Las llamadas
+al modelo usan los clientes compartidos de core.clients y la caché de resúmenes
+de core.cache.
+
+Contrapresión: como mucho max_concurrent_chats respuestas se generan a la vez y
+hasta max_queued_chats esperan turno; por encima se rechazan con 503 y
+Retry-After. Lo mismo para los reportes pendientes de resumir.
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+
+from core.cache import report_hash
+from core.context import ContextAccounting
+from core.ingestion import ReportIngestor, ReportStatus
+from core.model import AsyncResponseStream
+from core.response_cache import get_response_cache
+from core.telemetry import span, start_trace
+from core.report_io import load_preprocessed_report
+from core.report_model import PreprocessedReport
+
+
+class Overloaded(Exception):
+    """El servicio no admite más trabajo en este momento."""
+
+
+class ConcurrencyGate:
+    """
+    Semáforo con cola acotada: limita el trabajo simultáneo y rechaza en vez de
+    encolar sin límite.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def __aenter__(self) -> "ConcurrencyGate":
+        if self._semaphore.locked() and self.waiting >= self.max_queued:
+            self.rejected += 1
+            raise Overloaded("Demasiadas peticiones en curso")
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+        }
+
+
+@dataclass(frozen=True)
+class ServiceSettings:
+    """
+    Límites del servicio; se pueden configurar con BACKEND_MAX_CONCURRENT_CHATS,
+    BACKEND_MAX_QUEUED_CHATS, BACKEND_MAX_PENDING_REPORTS y BACKEND_MAX_REPORTS
+    (reportes que se conservan en memoria; los más antiguos se descartan).
+    """
+
+    max_concurrent_chats: int = 32
+    max_queued_chats: int = 128
+    max_pending_reports: int = 32
+    max_reports: int = 256
+
+    @classmethod
+    def from_env(cls) -> "ServiceSettings":
+        return cls(
+            max_concurrent_chats=int(
+                os.getenv("BACKEND_MAX_CONCURRENT_CHATS", cls.max_concurrent_chats)
+            ),
+            max_queued_chats=int(os.getenv("BACKEND_MAX_QUEUED_CHATS", cls.max_queued_chats)),
+            max_pending_reports=int(
+                os.getenv("BACKEND_MAX_PENDING_REPORTS", cls.max_pending_reports)
+            ),
+            max_reports=int(os.getenv("BACKEND_MAX_REPORTS", cls.max_reports)),
+        )
+
+
+class AnalysisService:
+    """Ingestión, resumen y chat sobre core/, para usar desde el bucle de eventos."""
+
+    def __init__(self, settings: ServiceSettings | None = None):
+        self.settings = settings or ServiceSettings.from_env()
+        self.ingestor = ReportIngestor()
+        self.chat_gate = ConcurrencyGate(
+            self.settings.max_concurrent_chats, self.settings.max_queued_chats
+        )
+
+    # Reportes
+
+    async def ingest(self, data: bytes, preprocessed: bool = False) -> tuple[str, bool]:
+        """
+        Parsea un reporte y encola su resumen.
+
+        Args:
+            data: JSON del reporte original o, con preprocessed=True, ya preprocesado
+
+        Returns:
+            tuple: (id del reporte, True si es nuevo)
+
+        Raises:
+            ValueError: Si el contenido no es un JSON válido
+            Overloaded: Si hay demasiados reportes pendientes
+        """
+        if preprocessed:
+            processed = await asyncio.to_thread(json.loads, data)
+            if not isinstance(processed, dict):
+                raise ValueError("El reporte debe ser un objeto JSON")
+            processed = PreprocessedReport(processed)
+        else:
+            processed, _ = await asyncio.to_thread(load_preprocessed_report, data)
+        report_id = (await asyncio.to_thread(report_hash, processed))[:32]
+
+        entry = self.ingestor.get(report_id)
+        if entry is not None and entry.status != ReportStatus.FAILED:
+            return report_id, False
+
+        pending = sum(
+            status in (ReportStatus.QUEUED, ReportStatus.PROCESSING)
+            for status in self.ingestor.statuses().values()
+        )
+        if pending >= self.settings.max_pending_reports:
+            raise Overloaded("Demasiados reportes pendientes de procesar")
+
+        self.ingestor.submit(report_id, processed, preprocessed=True)
+        self._evict_old_reports()
+        return report_id, True
+
+    def _evict_old_reports(self) -> None:
+        """Descarta los reportes terminados más antiguos por encima de max_reports."""
+        statuses = self.ingestor.statuses()
+        excess = len(statuses) - self.settings.max_reports
+        for report_id, status in statuses.items():
+            if excess <= 0:
+                break
+            if status in (ReportStatus.READY, ReportStatus.FAILED):
+                self.ingestor.remove(report_id)
+                excess -= 1
+
+    def report_info(self, report_id: str) -> dict | None:
+        entry = self.ingestor.get(report_id)
+        if entry is None:
+            return None
+        return {
+            "report_id": report_id,
+            "status": entry.status.value,
+            "error": entry.error,
+        }
+
+    async def summary(self, report_id: str, timeout: float | None = None) -> str | None:
+        """
+        Espera al resumen de un reporte.
+
+        Raises:
+            KeyError: Si el reporte no existe
+            TimeoutError: Si no termina en timeout segundos
+        """
+        entry = self.ingestor.get(report_id)
+        if entry is None:
+            raise KeyError(report_id)
+        if entry.future is not None:
+            # shield: agotar el timeout no debe cancelar la ingestión en cola
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(entry.future)), timeout)
+        return entry.summary
+
+    # Chat
+
+    async def _report_context(
+        self, reports: dict[str, str]
+    ) -> tuple[dict[str, str], dict[str, dict]]:
+        """Resúmenes y reportes preprocesados por nombre, esperando a los pendientes."""
+        summaries, processed = {}, {}
+        for name, report_id in reports.items():
+            entry = self.ingestor.get(report_id)
+            if entry is None:
+                raise KeyError(report_id)
+            summary = await self.summary(report_id)
+            if entry.status == ReportStatus.READY:
+                summaries[name] = summary
+                processed[name] = entry.processed
+        return summaries, processed
+
+    async def stream_chat(
+        self,
+        messages: list[dict],
+        reports: dict[str, str] | None = None,
+        temperature: float = 0.7,
+    ):
+        """
+        Genera la respuesta del modelo principal como eventos
+        ("delta", texto) y, al final, ("done", métricas).
+
+        Args:
+            messages: Historial de la conversación
+            reports: Ids de los reportes a usar, por el nombre con el que se
+                muestran al modelo
+            temperature: Temperatura del modelo
+
+        Raises:
+            Overloaded: Si se supera la cola de peticiones (antes del primer evento)
+            KeyError: Si algún reporte no existe
+        """
+        with start_trace(
+            "chat_turn", temperature=temperature, reports=len(reports or {})
+        ) as trace:
+            # El prefetch no compite con la respuesta (ver core/prefetch.py)
+            self.ingestor.pause_prefetch()
+            try:
+                with span("wait_reports"):
+                    summaries, processed = await self._report_context(reports or {})
+
+                async with self.chat_gate:
+                    stream = AsyncResponseStream(
+                        messages,
+                        temperature=temperature,
+                        report_summaries=summaries,
+                        processed_reports=processed,
+                    )
+                    async for delta in stream:
+                        yield "delta", delta
+            finally:
+                self.ingestor.resume_prefetch()
+
+        accounting: ContextAccounting | None = stream.context_accounting
+        yield "done", {
+            **stream.timing(),
+            "trace_id": trace.trace_id,
+            "error": str(stream.error) if stream.error else None,
+            "cached": stream.cached,
+            "scope": stream.scope.scope.value if stream.scope else None,
+            "route": stream.route.as_attributes() if stream.route else None,
+            "model": stream.model,
+            "context": accounting.as_dict() if accounting else None,
+        }
+
+    def stats(self) -> dict:
+        statuses = self.ingestor.statuses().values()
+        return {
+            "chat": self.chat_gate.stats(),
+            "reports": {
+                status.value: sum(s == status for s in statuses) for status in ReportStatus
+            },
+            "response_cache": get_response_cache().stats(),
+        }
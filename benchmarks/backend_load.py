@@ -0,0 +1,172 @@
+"""
+Prueba de carga del backend HTTP contra el servidor falso de Groq.
+
+Arranca el servidor falso y el backend en hilos propios, sube el reporte incluido
+en docs/ y lanza peticiones de chat con streaming (SSE) con distintos niveles de
+concurrencia. Para cada nivel muestra p50/p95 del primer token y de la respuesta
+completa, peticiones por segundo y peticiones rechazadas por contrapresión (503).
+
+Uso:
+    python benchmarks/backend_load.py --requests 200 --concurrency 1 16 64 \\
+        --latency 0.2 --max-concurrent-chats 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+from benchmarks.synthetic import BUNDLED_REPORT  # noqa: E402
+
+QUESTIONS = [
+    "¿Cómo mejorar mi LCP?",
+    "Analiza mi reporte",
+    "¿Por qué falla el contraste de colores?",
+    "¿Qué debería priorizar?",
+]
+
+
+def _start_backend(settings) -> tuple[str, asyncio.AbstractEventLoop]:
+    """Arranca el backend en un hilo con su propio bucle de eventos."""
+    from backend.app import create_server
+    from backend.service import AnalysisService
+
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    address = {}
+
+    async def run():
+        server = create_server(AnalysisService(settings))
+        await server.start("127.0.0.1", 0)
+        address["url"] = "http://%s:%d" % server.address
+        started.set()
+        await server.serve_forever()
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True)
+    thread.start()
+    started.wait()
+    return address["url"], loop
+
+
+def _percentile(values: list[float], pct: int) -> float:
+    if not values:
+        return float("nan")
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+async def _chat(http, report_id: str, question: str) -> tuple[int, float | None, float]:
+    start = time.perf_counter()
+    first = None
+    payload = {
+        "messages": [{"role": "user", "content": question}],
+        "reports": {"reporte.json": report_id},
+        "stream": True,
+    }
+    async with http.stream("POST", "/chat", json=payload) as response:
+        async for line in response.aiter_lines():
+            if first is None and line.startswith("data: "):
+                first = time.perf_counter() - start
+    return response.status_code, first, time.perf_counter() - start
+
+
+async def _run_level(base_url: str, report_id: str, requests: int, concurrency: int) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as http:
+        queue = list(range(requests))
+        results = []
+
+        async def worker():
+            while queue:
+                n = queue.pop()
+                results.append(await _chat(http, report_id, QUESTIONS[n % len(QUESTIONS)]))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ok = [r for r in results if r[0] == 200]
+    first = [r[1] for r in ok if r[1] is not None]
+    total = [r[2] for r in ok]
+    return {
+        "ok": len(ok),
+        "rejected": sum(r[0] == 503 for r in results),
+        "rps": len(ok) / elapsed,
+        "ttft_p50": _percentile(first, 50),
+        "ttft_p95": _percentile(first, 95),
+        "p50": _percentile(total, 50),
+        "p95": _percentile(total, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--response-tokens", type=int, default=40)
+    parser.add_argument("--max-concurrent-chats", type=int, default=32)
+    parser.add_argument("--max-queued-chats", type=int, default=128)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["LIGHTHOUSE_CACHE_DIR"] = tempfile.mkdtemp()
+    os.environ["GROQ_MAX_CONNECTIONS"] = str(args.max_concurrent_chats * 2)
+
+    import httpx
+
+    from backend.service import ServiceSettings
+    from core.clients import reset_clients
+
+    with FakeGroqServer(
+        latency=args.latency,
+        token_delay=args.token_delay,
+        response_tokens=args.response_tokens,
+    ) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        reset_clients()
+
+        settings = ServiceSettings(
+            max_concurrent_chats=args.max_concurrent_chats,
+            max_queued_chats=args.max_queued_chats,
+        )
+        base_url, _ = _start_backend(settings)
+
+        with httpx.Client(base_url=base_url, timeout=None) as http:
+            report_id = http.post("/reports", content=BUNDLED_REPORT.read_bytes()).json()[
+                "report_id"
+            ]
+            http.get(f"/reports/{report_id}/summary").raise_for_status()
+
+        print(
+            f"{'concurrencia':>12} {'ok':>5} {'503':>5} {'rps':>7} "
+            f"{'1er token p50/p95':>19} {'total p50/p95':>15}"
+        )
+        for concurrency in args.concurrency:
+            server.reset()
+            result = asyncio.run(_run_level(base_url, report_id, args.requests, concurrency))
+            print(
+                f"{concurrency:>12} {result['ok']:>5} {result['rejected']:>5} "
+                f"{result['rps']:>7.1f} "
+                f"{result['ttft_p50']:>9.3f}/{result['ttft_p95']:.3f}s "
+                f"{result['p50']:>7.3f}/{result['p95']:.3f}s"
+                f"   (max en vuelo en Groq: {server.stats()['max_in_flight']})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compara el troceado por caracteres con el troceado por auditorías y categorías.
+
+Para cada modo de app/core/chunking.py ("fixed", el troceado anterior cada 3000
+caracteres; "structured"; y "failures") muestra, con el reporte de docs/ y sus
+versiones escaladas: trozos (= llamadas al modelo pequeño antes de la fusión),
+tokens enviados, tamaño del trozo más grande y qué parte de las auditorías con
+problemas (score < 1) aparece en algún trozo.
+
+Con --summarize resume además el reporte contra el servidor falso de Groq y
+muestra las peticiones, los tokens de prompt que recibe y el tiempo.
+
+Uso:
+    python benchmarks/chunking.py --scales 1 10 100
+    python benchmarks/chunking.py --scales 1 10 --summarize --latency 0.05
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import load_bundled_report, scale_report  # noqa: E402
+from core.chunking import CHUNKING_MODES, chunk_report  # noqa: E402
+from core.model import preprocess_lighthouse_report  # noqa: E402
+from core.tokens import count_tokens  # noqa: E402
+
+MODES = ("fixed", "structured", "failures")
+
+
+def _failing_coverage(processed: dict, chunks: list[str]) -> float:
+    """Parte de las auditorías con score < 1 cuyo id aparece en algún trozo."""
+    failing = [
+        audit_id
+        for audit_id, audit in processed.get("audits", {}).items()
+        if isinstance(audit.get("score"), (int, float)) and audit["score"] < 1
+    ]
+    if not failing:
+        return 1.0
+    text = "\n".join(chunks)
+    found = sum(f'"{audit_id}"' in text for audit_id in failing)
+    return found / len(failing)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--modes", nargs="+", choices=CHUNKING_MODES, default=list(MODES))
+    parser.add_argument("--token-budget", type=int, default=None)
+    parser.add_argument("--summarize", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    report = load_bundled_report()
+    rows = []
+    for scale in args.scales:
+        processed = preprocess_lighthouse_report(scale_report(report, scale))
+        for mode in args.modes:
+            chunks = chunk_report(processed, mode=mode, token_budget=args.token_budget)
+            tokens = [count_tokens(chunk) for chunk in chunks]
+            rows.append((scale, mode, processed, chunks))
+            print(
+                f"{scale:>4}x {mode:<10} trozos={len(chunks):<5} tokens={sum(tokens):<8} "
+                f"máx={max(tokens, default=0):<5} "
+                f"auditorías con problemas={_failing_coverage(processed, chunks):.0%}"
+            )
+
+    if not args.summarize:
+        return
+
+    from benchmarks.fake_groq import FakeGroqServer
+
+    # Sin caché de resúmenes: cada modo llama al modelo
+    os.environ["LIGHTHOUSE_CACHE_DIR"] = ""
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    from core.cache import get_summary_cache
+    from core.model import summarize_preprocessed_report
+
+    print()
+    with FakeGroqServer(latency=args.latency) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        for scale, mode, processed, _ in rows:
+            os.environ["SUMMARY_CHUNKING"] = mode
+            get_summary_cache().clear()
+            server.reset()
+            start = time.perf_counter()
+            summarize_preprocessed_report(processed)
+            elapsed = time.perf_counter() - start
+            stats = server.stats()
+            print(
+                f"{scale:>4}x {mode:<10} peticiones={stats['requests']:<5} "
+                f"tokens de prompt={stats['prompt_tokens']:<8} tiempo={elapsed:6.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
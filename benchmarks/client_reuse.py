@@ -0,0 +1,96 @@
+"""
+Reutilización de conexiones del cliente de Groq compartido.
+
+Lanza varios turnos de chat contra el servidor falso y cuenta cuántas conexiones
+TCP se abren: con un cliente nuevo por llamada, una por turno; con el cliente
+compartido de core.clients, solo las del pool.
+
+Uso:
+    python benchmarks/client_reuse.py --turns 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "¿Qué es el CLS?"}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+
+    from groq import Groq
+
+    from core.clients import get_async_groq_client, get_groq_client, reset_clients
+    from core.model import CHAT_MODEL
+
+    with FakeGroqServer(latency=args.latency) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        reset_clients()
+
+        start = time.perf_counter()
+        for _ in range(args.turns):
+            client = Groq(api_key=os.environ["GROQ_API_KEY"])
+            client.chat.completions.create(model=CHAT_MODEL, messages=MESSAGES)
+            client.close()
+        elapsed = time.perf_counter() - start
+        stats = server.stats()
+        print(
+            f"cliente por llamada: peticiones={stats['requests']:<4} "
+            f"conexiones={stats['connections']:<4} tiempo={elapsed:.2f}s"
+        )
+
+        server.reset()
+        start = time.perf_counter()
+        for _ in range(args.turns):
+            get_groq_client().chat.completions.create(model=CHAT_MODEL, messages=MESSAGES)
+        elapsed = time.perf_counter() - start
+        stats = server.stats()
+        print(
+            f"cliente compartido:  peticiones={stats['requests']:<4} "
+            f"conexiones={stats['connections']:<4} tiempo={elapsed:.2f}s"
+        )
+
+        async def run_async():
+            client = get_async_groq_client()
+            await asyncio.gather(
+                *(
+                    client.chat.completions.create(model=CHAT_MODEL, messages=MESSAGES)
+                    for _ in range(args.turns)
+                )
+            )
+            # Segunda ronda: debe reutilizar las conexiones de la primera
+            await asyncio.gather(
+                *(
+                    get_async_groq_client().chat.completions.create(
+                        model=CHAT_MODEL, messages=MESSAGES
+                    )
+                    for _ in range(args.turns)
+                )
+            )
+
+        server.reset()
+        asyncio.run(run_async())
+        stats = server.stats()
+        print(
+            f"cliente asíncrono:   peticiones={stats['requests']:<4} "
+            f"conexiones={stats['connections']:<4}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Coste de la comparación local de reportes frente a pegar los resúmenes.
+
+Genera historiales sintéticos de N ejecuciones a partir del reporte incluido en
+docs/ y mide el tiempo de alinear los reportes en matrices, construir la tabla de
+comparación y contar regresiones por URL, junto con los tokens de la tabla frente
+a los de los resúmenes deterministas de todos los reportes.
+
+Uso:
+    python benchmarks/compare_scale.py --runs 2 10 100 500 --urls 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import load_bundled_report, report_history  # noqa: E402
+from core.compare import (  # noqa: E402
+    build_comparison_context,
+    build_report_matrix,
+    regression_counts,
+)
+from core.digest import build_report_digest  # noqa: E402
+from core.model import preprocess_lighthouse_report  # noqa: E402
+from core.tokens import count_tokens  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, nargs="+", default=[2, 10, 100, 500])
+    parser.add_argument("--urls", type=int, default=3)
+    parser.add_argument("--show", action="store_true", help="Imprime la última tabla")
+    args = parser.parse_args()
+
+    processed = preprocess_lighthouse_report(load_bundled_report())
+    digest_tokens = count_tokens(build_report_digest(processed))
+
+    print(
+        f"{'ejecuciones':>11} {'matriz':>9} {'tabla':>9} {'regresiones':>12} "
+        f"{'tokens tabla':>13} {'tokens resúmenes':>17}"
+    )
+    context = ""
+    for runs in args.runs:
+        history = report_history(processed, runs, urls=min(args.urls, runs))
+
+        start = time.perf_counter()
+        matrix = build_report_matrix(history)
+        matrix_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        context = build_comparison_context(history, max_tokens=10**6)
+        table_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        regression_counts(matrix)
+        regressions_ms = (time.perf_counter() - start) * 1000
+
+        print(
+            f"{runs:>11} {matrix_ms:>7.1f}ms {table_ms:>7.1f}ms {regressions_ms:>10.2f}ms "
+            f"{count_tokens(context):>13} {digest_tokens * runs:>17}"
+        )
+
+    if args.show:
+        print()
+        print(context)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""
+Servidor local que imita el endpoint de chat completions de Groq.
+
+Sirve para medir el pipeline sin red ni API key: añade una latencia artificial
+configurable, puede devolver errores 429 periódicos y cuenta peticiones,
+conexiones y concurrencia máxima. Con prefix_cache=True simula además la caché
+de prefijos del proveedor: los mensajes iniciales idénticos a los de una petición
+anterior (del mismo modelo) se cuentan como tokens cacheados en
+usage.prompt_tokens_details.cached_tokens y no suman latencia por token.
+
+Uso como script:
+    python benchmarks/fake_groq.py --port 8765 --latency 0.3
+
+y en otra terminal:
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=fake uv run streamlit run app/main.py
+
+Uso desde Python:
+    with FakeGroqServer(latency=0.2) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        ...
+        print(server.stats())
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 para permitir conexiones keep-alive
+    protocol_version = "HTTP/1.1"
+    server: "_FakeHTTPServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.fake.record_connection()
+
+    def do_POST(self):
+        if self.path != COMPLETIONS_PATH:
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        fake = self.server.fake
+
+        request_number, prompt_tokens, cached_tokens = fake.begin_request(body)
+        try:
+            if fake.fail_every and request_number % fake.fail_every == 0:
+                self._send_json(
+                    429,
+                    {"error": {"message": "rate limit", "type": "tokens"}},
+                    headers={"retry-after": str(fake.retry_after)},
+                )
+                return
+
+            uncached_tokens = prompt_tokens - cached_tokens
+            latency = fake.model_latency.get(body.get("model", ""), fake.latency)
+            time.sleep(latency + fake.prompt_token_latency * uncached_tokens)
+            if body.get("stream"):
+                self._send_stream(fake.completion_chunks(body, cached_tokens))
+            else:
+                self._send_json(200, fake.completion(body, cached_tokens))
+        finally:
+            fake.end_request()
+
+    def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, chunks):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        fake = self.server.fake
+        for i, chunk in enumerate(chunks):
+            if fake.stream_abort_after and i >= fake.stream_abort_after:
+                # Simula un corte de la conexión a mitad de la respuesta
+                self.close_connection = True
+                return
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            time.sleep(fake.token_delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: "FakeGroqServer"
+
+
+class FakeGroqServer:
+    """
+    Servidor falso de Groq en un hilo en segundo plano.
+
+    Args:
+        latency: Segundos de espera antes de responder cada petición
+        prompt_token_latency: Segundos extra de espera por cada token de prompt
+        fail_every: Si es N > 0, una de cada N peticiones devuelve 429
+        retry_after: Valor de la cabecera retry-after en las respuestas 429
+        response_tokens: Palabras de relleno añadidas a cada respuesta
+        token_delay: Segundos entre fragmentos en las respuestas con stream=True
+        stream_abort_after: Si es N > 0, corta la conexión tras N fragmentos
+        prefix_cache: Simula la caché de prefijos (ver el docstring del módulo)
+        model_latency: Latencia por modelo, en lugar de latency para esos modelos
+        truncate_every: Si es N > 0, una de cada N respuestas sin stream termina
+            con finish_reason="length" (respuesta cortada por max_tokens)
+        host, port: Dirección de escucha (port=0 elige uno libre)
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        prompt_token_latency: float = 0.0,
+        fail_every: int = 0,
+        retry_after: float = 0.05,
+        response_tokens: int = 0,
+        token_delay: float = 0.0,
+        stream_abort_after: int = 0,
+        prefix_cache: bool = False,
+        model_latency: dict[str, float] | None = None,
+        truncate_every: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.prompt_token_latency = prompt_token_latency
+        self.fail_every = fail_every
+        self.retry_after = retry_after
+        self.response_tokens = response_tokens
+        self.token_delay = token_delay
+        self.stream_abort_after = stream_abort_after
+        self.prefix_cache = prefix_cache
+        self.model_latency = dict(model_latency or {})
+        self.truncate_every = truncate_every
+        self._httpd = _FakeHTTPServer((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGroqServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeGroqServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+            self.in_flight = 0
+            self.max_in_flight = 0
+            self.requests_by_model: dict[str, int] = {}
+            self.prompt_tokens = 0
+            self.cached_prompt_tokens = 0
+            self.completions = 0
+            self._prefixes: set[tuple[str, str]] = set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "max_in_flight": self.max_in_flight,
+                "requests_by_model": dict(self.requests_by_model),
+                "prompt_tokens": self.prompt_tokens,
+                "cached_prompt_tokens": self.cached_prompt_tokens,
+            }
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def begin_request(self, body: dict) -> tuple[int, int, int]:
+        """
+        Registra una petición; devuelve su número, sus tokens de prompt y cuántos
+        de ellos estaban en la caché de prefijos.
+        """
+        messages = body.get("messages", [])
+        prompt = "".join(str(m.get("content", "")) for m in messages)
+        prompt_tokens = _approx_tokens(prompt)
+        model = body.get("model", "")
+
+        # Hash acumulado de cada prefijo de mensajes completos (rol + contenido)
+        prefixes = []
+        digest = hashlib.sha256()
+        length = 0
+        for message in messages:
+            content = str(message.get("content", ""))
+            digest.update(f"{message.get('role', '')}\0{content}\0".encode("utf-8"))
+            length += len(content)
+            prefixes.append((digest.hexdigest(), length))
+
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.requests_by_model[model] = self.requests_by_model.get(model, 0) + 1
+            self.prompt_tokens += prompt_tokens
+
+            cached_tokens = 0
+            if self.prefix_cache:
+                # Nunca el prompt entero: el último mensaje siempre se procesa
+                for prefix, length in prefixes[:-1]:
+                    if (model, prefix) not in self._prefixes:
+                        break
+                    cached_tokens = min(length // 4, prompt_tokens)
+                self._prefixes.update((model, prefix) for prefix, _ in prefixes)
+                self.cached_prompt_tokens += cached_tokens
+            return self.requests, prompt_tokens, cached_tokens
+
+    def end_request(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _content(self, body: dict) -> tuple[str, str, str]:
+        """Respuesta determinista: el mismo prompt produce siempre el mismo texto."""
+        messages = body.get("messages", [])
+        prompt = "".join(str(m.get("content", "")) for m in messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        content = f"Respuesta simulada {digest} ({len(prompt)} caracteres de entrada)."
+        content += " lorem" * self.response_tokens
+        return prompt, digest, content
+
+    @staticmethod
+    def _usage(prompt_tokens: int, completion_tokens: int, cached_tokens: int) -> dict:
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+
+    def completion(self, body: dict, cached_tokens: int = 0) -> dict:
+        prompt, digest, content = self._content(body)
+        with self._lock:
+            self.completions += 1
+            truncated = bool(self.truncate_every) and self.completions % self.truncate_every == 0
+
+        prompt_tokens = _approx_tokens(prompt)
+        completion_tokens = _approx_tokens(content)
+        return {
+            "id": f"chatcmpl-{digest}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "length" if truncated else "stop",
+                }
+            ],
+            "usage": self._usage(prompt_tokens, completion_tokens, cached_tokens),
+        }
+
+    def completion_chunks(self, body: dict, cached_tokens: int = 0):
+        """Fragmentos SSE (una palabra por fragmento) de una respuesta con stream=True."""
+        prompt, digest, content = self._content(body)
+        words = content.split(" ")
+        base = {
+            "id": f"chatcmpl-{digest}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+        }
+
+        for i, word in enumerate(words):
+            text = word if i == 0 else " " + word
+            yield {
+                **base,
+                "choices": [
+                    {"index": 0, "delta": {"content": text}, "finish_reason": None}
+                ],
+            }
+
+        prompt_tokens = _approx_tokens(prompt)
+        yield {
+            **base,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"usage": self._usage(prompt_tokens, len(words), cached_tokens)},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso de Groq")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--response-tokens", type=int, default=0)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--prefix-cache", action="store_true")
+    args = parser.parse_args()
+
+    server = FakeGroqServer(
+        latency=args.latency,
+        fail_every=args.fail_every,
+        response_tokens=args.response_tokens,
+        token_delay=args.token_delay,
+        prefix_cache=args.prefix_cache,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Servidor falso de Groq escuchando en {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Memoria al cargar un reporte: json.load completo frente a load_preprocessed_report.
+
+Mide con tracemalloc el pico de memoria durante la carga y la memoria que queda
+retenida en la sesión (reporte original + preprocesado antes; solo el
+preprocesado ahora).
+
+Uso:
+    python benchmarks/ingest_memory.py --scales 1 10
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import BUNDLED_REPORT, scale_report  # noqa: E402
+from core.model import preprocess_lighthouse_report  # noqa: E402
+from core.report_io import load_preprocessed_report  # noqa: E402
+
+
+def _full_load(data: bytes) -> dict:
+    # Flujo anterior: se conservaba el reporte original y se preprocesaba después
+    report = json.load(io.BytesIO(data))
+    return {"raw": report, "processed": preprocess_lighthouse_report(report)}
+
+
+def _skeleton_load(data: bytes) -> dict:
+    processed, _ = load_preprocessed_report(io.BytesIO(data))
+    return {"processed": processed}
+
+
+def _measure(loader, data: bytes) -> tuple[float, float, float, dict]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = loader(data)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, retained, elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+
+    raw = BUNDLED_REPORT.read_bytes()
+    mb = 1024 * 1024
+
+    for scale in args.scales:
+        if scale == 1:
+            data = raw
+        else:
+            data = json.dumps(scale_report(json.loads(raw), scale)).encode("utf-8")
+
+        full_peak, full_retained, full_time, full = _measure(_full_load, data)
+        skel_peak, skel_retained, skel_time, skel = _measure(_skeleton_load, data)
+        assert full["processed"] == skel["processed"], "El preprocesado difiere"
+
+        # El contenido subido (data) ya está en memoria en ambos casos
+        print(f"x{scale} ({len(data) / mb:.2f} MB)")
+        print(
+            f"  json.load completo:       pico={full_peak / mb:7.2f} MB  "
+            f"retenido={full_retained / mb:7.2f} MB  tiempo={full_time * 1000:7.1f} ms"
+        )
+        print(
+            f"  load_preprocessed_report: pico={skel_peak / mb:7.2f} MB  "
+            f"retenido={skel_retained / mb:7.2f} MB  tiempo={skel_time * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
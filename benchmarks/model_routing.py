@@ -0,0 +1,145 @@
+"""
+Latencia del chat con enrutado entre el modelo rápido y el principal (core/routing.py).
+
+Responde un conjunto fijo de turnos (definiciones, continuaciones cortas,
+análisis del reporte, preguntas de implementación y comparaciones) con un reporte
+cargado, contra el servidor falso de Groq con una latencia distinta para cada
+modelo (--fast-latency para el 8B, --large-latency para el 70B). Compara
+MODEL_ROUTING=off (siempre el principal) con auto y muestra la ruta de cada turno,
+las latencias p50/p90 y cuántas respuestas rápidas se repitieron con el
+principal. Con --truncate-every N, una de cada N respuestas llega cortada
+(finish_reason="length") y no pasa la comprobación local.
+
+Uso:
+    python benchmarks/model_routing.py --fast-latency 0.25 --large-latency 1.0
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+from benchmarks.synthetic import load_bundled_report, scale_report  # noqa: E402
+
+_PREVIOUS = [
+    {"role": "user", "content": "¿Qué es el LCP?"},
+    {"role": "assistant", "content": "El LCP mide cuándo se pinta el elemento más grande."},
+]
+
+# (historial previo, pregunta, reportes cargados)
+TURNS = [
+    ([], "¿Qué es el CLS?", 1),
+    ([], "¿Qué significa TBT?", 1),
+    ([], "¿Para qué sirve el manifest.json?", 1),
+    ([], "¿Qué es un service worker?", 1),
+    ([], "¿Qué mide el Speed Index?", 1),
+    (_PREVIOUS, "¿y el INP?", 1),
+    (_PREVIOUS, "Vale, ¿y el FCP?", 1),
+    (_PREVIOUS, "Gracias", 1),
+    ([], "Analiza mi reporte", 1),
+    ([], "¿Qué debería priorizar?", 1),
+    ([], "¿Cómo mejorar mi LCP?", 1),
+    ([], "¿Cómo configuro el caché del navegador paso a paso?", 1),
+    ([], "¿Por qué falla el contraste de colores?", 1),
+    ([], "Compara los dos reportes", 2),
+    ([], "¿Qué ha empeorado entre los dos reportes?", 2),
+]
+
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fast-latency", type=float, default=0.25)
+    parser.add_argument("--large-latency", type=float, default=1.0)
+    parser.add_argument("--response-tokens", type=int, default=40)
+    parser.add_argument("--truncate-every", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["LIGHTHOUSE_CACHE_DIR"] = tempfile.mkdtemp()
+
+    from core.clients import reset_clients
+    from core.digest import build_report_digest
+    from core.model import (
+        CHAT_MODEL,
+        FAST_CHAT_MODEL,
+        get_model_response,
+        preprocess_lighthouse_report,
+    )
+    from core.routing import decide_route
+    from core.telemetry import METRICS
+
+    report = load_bundled_report()
+    reports = {
+        "reporte.json": preprocess_lighthouse_report(report),
+        "reporte-2.json": preprocess_lighthouse_report(scale_report(report, 2)),
+    }
+    summaries = {name: build_report_digest(processed) for name, processed in reports.items()}
+
+    with FakeGroqServer(
+        model_latency={FAST_CHAT_MODEL: args.fast_latency, CHAT_MODEL: args.large_latency},
+        response_tokens=args.response_tokens,
+        truncate_every=args.truncate_every,
+    ) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        reset_clients()
+
+        latencies: dict[str, list[float]] = {}
+        for mode in ("off", "auto"):
+            os.environ["MODEL_ROUTING"] = mode
+            server.reset()
+            METRICS.reset()
+            latencies[mode] = []
+            for _ in range(args.repeat):
+                for history, question, loaded in TURNS:
+                    names = list(reports)[:loaded]
+                    start = time.perf_counter()
+                    get_model_response(
+                        history + [{"role": "user", "content": question}],
+                        report_summaries={name: summaries[name] for name in names},
+                        processed_reports={name: reports[name] for name in names},
+                    )
+                    latencies[mode].append(time.perf_counter() - start)
+
+            routes = {
+                key.removeprefix("lighthouse_route_total"): int(value)
+                for key, value in METRICS.snapshot().items()
+                if key.startswith("lighthouse_route_total")
+            }
+            by_model = server.stats()["requests_by_model"]
+            print(
+                f"MODEL_ROUTING={mode:<4} p50={statistics.median(latencies[mode]):.2f}s "
+                f"p90={_percentile(latencies[mode], 0.9):.2f}s "
+                f"peticiones 8B={by_model.get(FAST_CHAT_MODEL, 0)} "
+                f"70B={by_model.get(CHAT_MODEL, 0)}"
+            )
+            for labels, count in sorted(routes.items()):
+                print(f"  {labels}: {count}")
+
+        print("\nruta por turno (MODEL_ROUTING=auto):")
+        for history, question, loaded in TURNS:
+            decision = decide_route(history + [{"role": "user", "content": question}], loaded)
+            print(
+                f"  {decision.route.value:<5} {decision.complexity:>3}  {question:<52} "
+                f"{', '.join(decision.reasons)}"
+            )
+
+        reduction = 1 - statistics.median(latencies["auto"]) / statistics.median(latencies["off"])
+        print(f"\nreducción de la latencia p50: {reduction:.0%}")
+
+
+if __name__ == "__main__":
+    main()
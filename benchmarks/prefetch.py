@@ -0,0 +1,140 @@
+"""
+Prefetch del contexto enfocado por categoría (core/prefetch.py).
+
+Carga el reporte de docs/ (escalado --scale veces) en un ReportIngestor contra el
+servidor falso de Groq y responde un conjunto de preguntas de seguimiento
+habituales (la categoría más baja, la peor Core Web Vital, una categoría
+concreta, una auditoría concreta). Para PREFETCH_MODE=off y digest muestra:
+
+- el tiempo de elegir el contexto de cada pregunta (select_report_context, que
+  sin prefetch construye el índice de auditorías la primera vez),
+- qué contexto se envía (prefetch, auditorías recuperadas o resumen),
+- la tasa de aciertos del prefetch (lighthouse_cache_events_total{cache="prefetch"}).
+
+Después, con PREFETCH_MODE=summary y --summary-latency segundos por llamada al
+modelo, llega un mensaje justo al terminar la ingestión: muestra cuántas
+llamadas del prefetch se hicieron durante el turno y cuántas al reanudarlo.
+
+Uso:
+    python benchmarks/prefetch.py --scale 10 --summary-latency 0.3
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+from benchmarks.synthetic import load_bundled_report, scale_report  # noqa: E402
+
+QUESTIONS = [
+    "¿Cuál es la categoría más baja?",
+    "¿Cómo mejoro la accesibilidad?",
+    "¿Qué puedo hacer con las buenas prácticas?",
+    "¿Cuál es la peor Core Web Vital?",
+    "¿Cómo mejorar el SEO de mi página?",
+    "¿Por qué falla el contraste de colores?",
+    "¿Las imágenes tienen atributo alt?",
+]
+
+
+def _context_kind(context: str, summary: str) -> str:
+    if context == summary:
+        return "resumen"
+    if "### Categoría:" in context:
+        return "prefetch"
+    return "recuperación"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--summary-latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["SUMMARY_STRATEGY"] = "digest"
+    os.environ.setdefault("TELEMETRY_LOG", "0")
+
+    from core import retrieval
+    from core.clients import reset_clients
+    from core.ingestion import ReportIngestor
+    from core.model import SUMMARY_MODEL, preprocess_lighthouse_report
+    from core.prefetch import clear_focused_contexts, prefetch_categories
+    from core.retrieval import select_report_context
+    from core.telemetry import METRICS
+
+    report = scale_report(load_bundled_report(), args.scale)
+    name = "reporte.json"
+
+    with FakeGroqServer(model_latency={SUMMARY_MODEL: args.summary_latency}) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        reset_clients()
+
+        for mode in ("off", "digest"):
+            os.environ["PREFETCH_MODE"] = mode
+            # Cada modo empieza sin índices ni contextos en memoria o en disco
+            os.environ["LIGHTHOUSE_CACHE_DIR"] = tempfile.mkdtemp()
+            retrieval._indexes.clear()
+            clear_focused_contexts()
+            METRICS.reset()
+
+            processed = preprocess_lighthouse_report(report)
+            ingestor = ReportIngestor()
+            ingestor.submit(name, processed, preprocessed=True)
+            summary = ingestor.wait([name])[name]
+            ingestor.prefetcher.wait()
+            if mode == "digest":
+                print(f"categorías precalculadas: {', '.join(prefetch_categories(processed))}")
+
+            print(f"\nPREFETCH_MODE={mode}")
+            total = 0.0
+            for question in QUESTIONS:
+                start = time.perf_counter()
+                context = select_report_context(question, {name: summary}, {name: processed})
+                elapsed = time.perf_counter() - start
+                total += elapsed
+                kind = _context_kind(context[name], summary)
+                print(f"  {elapsed * 1e3:7.2f} ms  {kind:<12} {question}")
+
+            events = METRICS.snapshot()
+            hits = sum(v for k, v in events.items() if 'cache="prefetch"' in k and "hit" in k)
+            misses = sum(v for k, v in events.items() if 'cache="prefetch"' in k and "miss" in k)
+            rate = f"{hits / (hits + misses):.0%}" if hits + misses else "-"
+            print(
+                f"  total {total * 1e3:.1f} ms · aciertos del prefetch {int(hits)}/"
+                f"{int(hits + misses)} ({rate})"
+            )
+
+        # Un mensaje del usuario detiene el prefetch con el modelo pequeño
+        os.environ["PREFETCH_MODE"] = "summary"
+        os.environ["LIGHTHOUSE_CACHE_DIR"] = tempfile.mkdtemp()
+        clear_focused_contexts()
+        server.reset()
+
+        processed = preprocess_lighthouse_report(report)
+        ingestor = ReportIngestor()
+        ingestor.submit(name, processed, preprocessed=True)
+        ingestor.wait([name])
+        ingestor.pause_prefetch()
+        time.sleep(3 * args.summary_latency)
+        during_turn = server.stats()["requests"]
+        ingestor.resume_prefetch()
+        ingestor.prefetcher.wait()
+        print(
+            f"\nPREFETCH_MODE=summary: mensaje al terminar la ingestión; "
+            f"{during_turn} llamada(s) del prefetch durante un turno de "
+            f"{3 * args.summary_latency:.1f} s, "
+            f"{server.stats()['requests'] - during_turn} al reanudarlo, "
+            f"pendiente: {ingestor.prefetcher.pending()}"
+        )
+
+
+if __name__ == "__main__":
+    main()
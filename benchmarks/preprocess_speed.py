@@ -0,0 +1,63 @@
+"""
+Velocidad del preprocesamiento en una sola pasada.
+
+Compara preprocess_lighthouse_report con la implementación anterior en dos
+pasadas (construir el resultado y después recorrerlo con _remove_large_values)
+sobre el reporte incluido en docs/ y versiones escaladas. La equivalencia de
+ambas salidas, incluido el orden de las claves, la comprueba
+tests/test_preprocess.py con la implementación de referencia de
+tests/legacy_preprocess.py.
+
+Uso:
+    python benchmarks/preprocess_speed.py --scales 1 10 100 --repeat 5
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import load_bundled_report, scale_report  # noqa: E402
+from core.model import preprocess_lighthouse_report  # noqa: E402
+from tests.legacy_preprocess import legacy_preprocess_lighthouse_report  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bundled = load_bundled_report()
+    reports = {f"docs x{scale}": scale_report(bundled, scale) for scale in args.scales}
+
+    for scale in args.scales:
+        report = reports[f"docs x{scale}"]
+        legacy = min(
+            timeit.repeat(
+                lambda: legacy_preprocess_lighthouse_report(report),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        single = min(
+            timeit.repeat(
+                lambda: preprocess_lighthouse_report(report),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print(
+            f"x{scale:<4} auditorías={len(report['audits']):<6} "
+            f"dos pasadas={legacy * 1000:8.2f} ms  "
+            f"una pasada={single * 1000:8.2f} ms  "
+            f"aceleración={legacy / single:4.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
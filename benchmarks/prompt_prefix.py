@@ -0,0 +1,131 @@
+"""
+Prefijo estable del prompt del modelo principal: tokens enviados y reutilizables.
+
+Simula una conversación de varios turnos contra el servidor falso de Groq con la
+caché de prefijos activada (prefix_cache=True): preguntas concretas y generales
+sobre un reporte y, a mitad de la conversación, un segundo reporte. Para cada
+perfil del system prompt (SYSTEM_PROMPT_PROFILE "full" y "compact") compara:
+
+- "anterior": el contexto de los reportes concatenado al system prompt, en un
+  único mensaje de sistema que cambia con cada pregunta concreta (la recuperación
+  elige otras auditorías) y al cargar un reporte.
+- "actual": el system prompt solo, siempre igual, y el contexto de los reportes
+  en un segundo mensaje de sistema.
+
+Muestra los tokens del system prompt, los tokens de prompt enviados, cuántos
+servía la caché de prefijos, los que hubo que procesar y el tiempo total (el
+servidor cobra --prompt-latency-ms por cada token no cacheado).
+
+Uso:
+    python benchmarks/prompt_prefix.py --prompt-latency-ms 0.05
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+from benchmarks.synthetic import load_bundled_report, scale_report  # noqa: E402
+
+QUESTIONS = [
+    "¿Cómo mejorar mi LCP?",
+    "¿Qué debería priorizar?",
+    "¿Por qué falla el contraste de colores?",
+    "¿Cómo reduzco el JavaScript no usado?",
+    # A partir de aquí hay dos reportes cargados
+    "Compara los dos reportes",
+    "¿Las imágenes tienen atributo alt?",
+    "¿Qué es el CLS y cómo lo reduzco?",
+    "Resume los problemas principales",
+]
+SECOND_REPORT_TURN = 4
+
+
+def _merge_system_messages(messages: list[dict]) -> list[dict]:
+    """Disposición anterior: los mensajes de sistema iniciales en uno solo."""
+    system = [m["content"] for m in messages if m["role"] == "system"]
+    rest = [m for m in messages if m["role"] != "system"]
+    return [{"role": "system", "content": "\n\n".join(system)}] + rest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--prompt-latency-ms",
+        type=float,
+        default=0.05,
+        help="milisegundos de latencia simulada por token de prompt no cacheado",
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["LIGHTHOUSE_CACHE_DIR"] = tempfile.mkdtemp()
+
+    from core.clients import get_groq_client, reset_clients
+    from core.digest import build_report_digest
+    from core.model import CHAT_MODEL, _build_chat_messages, preprocess_lighthouse_report
+    from core.prompts import PROMPT_PROFILES, get_system_prompt
+    from core.tokens import count_tokens
+
+    report = load_bundled_report()
+    reports = {
+        "reporte.json": preprocess_lighthouse_report(report),
+        "reporte-2.json": preprocess_lighthouse_report(scale_report(report, 2)),
+    }
+    summaries = {name: build_report_digest(processed) for name, processed in reports.items()}
+
+    with FakeGroqServer(
+        prompt_token_latency=args.prompt_latency_ms / 1000, prefix_cache=True
+    ) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        reset_clients()
+        client = get_groq_client()
+
+        print(f"{len(QUESTIONS)} turnos; segundo reporte desde el turno {SECOND_REPORT_TURN + 1}")
+        print(
+            f"{'perfil':<8} {'disposición':<10} {'system':>7} {'enviados':>9} "
+            f"{'cacheados':>10} {'procesados':>11} {'tiempo':>8}"
+        )
+        for profile in PROMPT_PROFILES:
+            os.environ["SYSTEM_PROMPT_PROFILE"] = profile
+            system_tokens = count_tokens(get_system_prompt())
+            for layout in ("anterior", "actual"):
+                server.reset()
+                history: list[dict] = []
+                start = time.perf_counter()
+                for turn, question in enumerate(QUESTIONS):
+                    loaded = list(reports)[: 2 if turn >= SECOND_REPORT_TURN else 1]
+                    history.append({"role": "user", "content": question})
+                    messages, _ = _build_chat_messages(
+                        history,
+                        None,
+                        {name: summaries[name] for name in loaded},
+                        processed_reports={name: reports[name] for name in loaded},
+                    )
+                    if layout == "anterior":
+                        messages = _merge_system_messages(messages)
+                    response = client.chat.completions.create(
+                        model=CHAT_MODEL, messages=messages
+                    )
+                    history.append(
+                        {"role": "assistant", "content": response.choices[0].message.content}
+                    )
+                elapsed = time.perf_counter() - start
+
+                stats = server.stats()
+                sent, cached = stats["prompt_tokens"], stats["cached_prompt_tokens"]
+                print(
+                    f"{profile:<8} {layout:<10} {system_tokens:>7} {sent:>9} "
+                    f"{cached:>10} {sent - cached:>11} {elapsed:>7.2f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
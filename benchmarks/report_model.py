@@ -0,0 +1,179 @@
+"""
+Memoria y tiempos del modelo compacto del reporte (core/report_model.py).
+
+Con el reporte de docs/ y sus versiones escaladas mide:
+
+- Memoria retenida, con tracemalloc, por el reporte preprocesado como dicts
+  anidados y por los dicts junto a su ReportModel (los dos conviven mientras la
+  sesión tiene el reporte cargado; el modelo comparte las cadenas con el dict), y
+  la que sigue ocupando la caché de get_report_model cuando se libera el dict.
+- Tiempo de construir el modelo, que se hace una vez por reporte.
+- Consultas repetidas (como en cada turno del chat) recorriendo los dicts frente
+  al modelo ya construido: auditorías suspendidas por impacto, auditorías de una
+  categoría y el hash de contenido del reporte que usa la recuperación.
+- build_comparison_context con --reports ejecuciones de la misma URL.
+
+Uso:
+    python benchmarks/report_model.py --scales 1 10 100
+"""
+
+import argparse
+import copy
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import load_bundled_report, scale_report  # noqa: E402
+from core.cache import report_hash  # noqa: E402
+from core.compare import build_comparison_context  # noqa: E402
+from core.model import preprocess_lighthouse_report  # noqa: E402
+from core.report_model import (  # noqa: E402
+    PASSING_SCORE,
+    SCORED_MODES,
+    PreprocessedReport,
+    ReportModel,
+    get_report_model,
+    report_content_hash,
+)
+
+
+def _median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e3
+
+
+def _retained_kb(build) -> float:
+    """Memoria que sigue asignada tras build() y una recolección."""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return current / 1e3
+
+
+def _dicts_and_model(text: str) -> tuple[dict, ReportModel]:
+    processed = PreprocessedReport(json.loads(text))
+    return processed, ReportModel(processed)
+
+
+def _cached_after_release(text: str) -> None:
+    """Pide el modelo por la caché y libera el dict, como al quitar el reporte."""
+    processed = PreprocessedReport(json.loads(text))
+    get_report_model(processed)
+
+
+def _failing_from_dicts(processed: dict) -> list[dict]:
+    """Suspendidas por impacto recorriendo los dicts (lo que hacía digest.py)."""
+    audits = processed.get("audits", {})
+    impact: dict[str, float] = {}
+    for category in processed.get("categories", {}).values():
+        weights = category.get("auditWeights", {})
+        total_weight = sum(weights.values())
+        if not total_weight:
+            continue
+        for audit_id, weight in weights.items():
+            score = audits.get(audit_id, {}).get("score")
+            if score is not None:
+                impact[audit_id] = impact.get(audit_id, 0.0) + weight / total_weight * (1 - score)
+    failing = [
+        audit
+        for audit in audits.values()
+        if audit.get("scoreDisplayMode") in SCORED_MODES
+        and audit.get("score") is not None
+        and audit["score"] < PASSING_SCORE
+    ]
+    return sorted(
+        failing,
+        key=lambda a: (-impact.get(a.get("id"), 0.0), -(a.get("numericValue") or 0), a.get("id")),
+    )
+
+
+def _category_from_dicts(processed: dict, category_id: str) -> list[dict]:
+    audits = processed.get("audits", {})
+    weights = processed.get("categories", {}).get(category_id, {}).get("auditWeights", {})
+    return [audits[audit_id] for audit_id in weights if audit_id in audits]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--reports", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    report = load_bundled_report()
+    for scale in args.scales:
+        processed = preprocess_lighthouse_report(scale_report(report, scale))
+        text = json.dumps(processed, ensure_ascii=False)
+        repeat = max(3, args.repeat // scale) if scale > 1 else args.repeat
+
+        dict_kb = _retained_kb(lambda: PreprocessedReport(json.loads(text)))
+        combined_kb = _retained_kb(lambda: _dicts_and_model(text))
+        released_kb = _retained_kb(lambda: _cached_after_release(text))
+        build_ms = _median_ms(lambda: ReportModel(processed), repeat)
+        model = get_report_model(processed)
+        report_content_hash(processed)
+
+        print(f"{scale}x ({len(model.audits)} auditorías, {len(model.failing)} suspendidas)")
+        print(
+            f"  memoria: dicts {dict_kb:,.0f} KB · dicts + modelo {combined_kb:,.0f} KB "
+            f"(+{combined_kb / dict_kb - 1:.0%}) · en caché tras liberar el dict "
+            f"{released_kb:,.0f} KB · construir el modelo {build_ms:.1f} ms"
+        )
+        rows = [
+            (
+                "suspendidas por impacto",
+                lambda: _failing_from_dicts(processed),
+                lambda: get_report_model(processed).failing_audits(),
+            ),
+            (
+                "auditorías de accesibilidad",
+                lambda: _category_from_dicts(processed, "accessibility"),
+                lambda: get_report_model(processed).category_audits("accessibility"),
+            ),
+            (
+                "hash de contenido",
+                lambda: report_hash(processed),
+                lambda: report_content_hash(processed),
+            ),
+        ]
+        for label, walk, indexed in rows:
+            walk_ms = _median_ms(walk, repeat)
+            indexed_ms = _median_ms(indexed, repeat)
+            print(f"  {label:<28} dicts {walk_ms:8.3f} ms · modelo {indexed_ms:8.3f} ms")
+
+        runs = {}
+        for i in range(args.reports):
+            run = copy.deepcopy(processed)
+            run["fetchTime"] = f"2025-01-{i + 1:02d}T00:00:00Z"
+            runs[f"run-{i}.json"] = run
+        cold_ms = _median_ms(
+            lambda: build_comparison_context(
+                {name: copy.copy(run) for name, run in runs.items()}, max_tokens=10**6
+            ),
+            max(3, repeat // 4),
+        )
+        warm_ms = _median_ms(lambda: build_comparison_context(runs, max_tokens=10**6), repeat)
+        print(
+            f"  comparar {args.reports} ejecuciones: modelos nuevos {cold_ms:.1f} ms · "
+            f"ya construidos {warm_ms:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Peticiones idénticas de varias sesiones simultáneas (core/singleflight.py).
+
+Simula --sessions sesiones que suben a la vez un reporte y hacen la misma
+pregunta, contra el servidor falso de Groq con --latency segundos por petición.
+Cada sesión lee el archivo con load_preprocessed_report, lo resume con su propio
+ReportIngestor y pide la respuesta sin streaming (get_model_response). Dos casos:
+
+- "mismo reporte": todas suben el mismo archivo (el reporte nocturno).
+- "reportes parecidos": cada una sube una variante con el displayValue de una
+  auditoría distinta cambiado, así que solo comparten parte de los trozos.
+
+Para REQUEST_COALESCING=0 y 1 muestra las llamadas al modelo pequeño (trozos y
+fusiones) y al principal, cuántas veces se preprocesó el archivo y el tiempo
+total. La referencia son los nodos únicos: las llamadas que hace resumir cada
+reporte distinto de uno en uno con la caché de nodos compartida.
+
+Uso:
+    python benchmarks/request_coalescing.py --sessions 8 --scale 10
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+from benchmarks.synthetic import load_bundled_report, scale_report  # noqa: E402
+
+QUESTION = "Analiza mi reporte y dime qué priorizar"
+
+
+def _variants(report: dict, sessions: int) -> list[bytes]:
+    """Una variante por sesión, cada una con una auditoría suspendida distinta cambiada."""
+    failing = [
+        audit_id
+        for audit_id, audit in report["audits"].items()
+        if isinstance(audit.get("score"), (int, float)) and audit["score"] < 1
+    ]
+    variants = []
+    for i in range(sessions):
+        changed = copy.deepcopy(report)
+        audit = changed["audits"][failing[i % len(failing)]]
+        audit["displayValue"] = f"{audit.get('displayValue', '')} (sesión {i})"
+        variants.append(json.dumps(changed).encode("utf-8"))
+    return variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ.setdefault("TELEMETRY_LOG", "0")
+    os.environ["LIGHTHOUSE_CACHE_DIR"] = ""
+    os.environ["REPORT_INGEST_WORKERS"] = str(args.sessions)
+    os.environ["SUMMARY_STRATEGY"] = "llm"
+    os.environ["PREFETCH_MODE"] = "off"
+    os.environ["MODEL_ROUTING"] = "off"
+    os.environ["SCOPE_CLASSIFIER"] = "local"
+
+    import core.cache
+    from core.chunking import chunk_report
+    from core.clients import reset_clients
+    from core.ingestion import ReportIngestor
+    from core.model import CHAT_MODEL, SUMMARY_MODEL, get_model_response
+    from core.report_io import load_preprocessed_report
+    from core.telemetry import METRICS
+
+    core.cache._summary_cache = core.cache.SummaryCache(path=None, max_memory_entries=100_000)
+    cache = core.cache.get_summary_cache()
+
+    report = scale_report(load_bundled_report(), args.scale)
+    same = json.dumps(report).encode("utf-8")
+    cases = [("mismo reporte", [same] * args.sessions), ("reportes parecidos", None)]
+
+    with FakeGroqServer(latency=args.latency) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        reset_clients()
+
+        for label, uploads in cases:
+            uploads = uploads or _variants(report, args.sessions)
+            unique = list(dict.fromkeys(uploads))
+            chunks = {
+                chunk
+                for data in unique
+                for chunk in chunk_report(load_preprocessed_report(data)[0])
+            }
+
+            # Referencia: cada reporte distinto de uno en uno, con la caché compartida
+            cache.clear()
+            server.reset()
+            os.environ["REQUEST_COALESCING"] = "1"
+            for data in unique:
+                ingestor = ReportIngestor()
+                ingestor.submit("reporte.json", load_preprocessed_report(data)[0], True)
+                ingestor.wait()
+            nodes = server.stats()["requests_by_model"].get(SUMMARY_MODEL, 0)
+            print(
+                f"{label}: {args.sessions} sesiones, {len(unique)} archivo(s) distinto(s), "
+                f"{len(chunks)} trozos únicos, {nodes} nodos únicos (trozos + fusiones)"
+            )
+
+            for coalescing in ("0", "1"):
+                os.environ["REQUEST_COALESCING"] = coalescing
+                cache.clear()
+                server.reset()
+                METRICS.reset()
+                barrier = threading.Barrier(args.sessions)
+                errors = []
+
+                def session(data: bytes) -> None:
+                    try:
+                        barrier.wait()
+                        processed, _ = load_preprocessed_report(data)
+                        ingestor = ReportIngestor()
+                        ingestor.submit("reporte.json", processed, preprocessed=True)
+                        summaries = ingestor.wait()
+                        get_model_response(
+                            [{"role": "user", "content": QUESTION}],
+                            report_summaries=summaries,
+                            processed_reports={"reporte.json": processed},
+                        )
+                    except Exception as e:
+                        errors.append(e)
+
+                threads = [threading.Thread(target=session, args=(data,)) for data in uploads]
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+
+                by_model = server.stats()["requests_by_model"]
+                preprocessed = METRICS.snapshot().get(
+                    'lighthouse_coalesced_requests_total{kind="preprocess",role="leader"}',
+                    len(uploads) if coalescing == "0" else 0,
+                )
+                print(
+                    f"  REQUEST_COALESCING={coalescing} "
+                    f"8B={by_model.get(SUMMARY_MODEL, 0):<4} "
+                    f"70B={by_model.get(CHAT_MODEL, 0):<3} "
+                    f"preprocesados={int(preprocessed):<3} "
+                    f"tiempo={elapsed:.2f}s" + (f" errores={len(errors)}" if errors else "")
+                )
+
+
+if __name__ == "__main__":
+    main()
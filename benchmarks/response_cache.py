@@ -0,0 +1,99 @@
+"""
+Mide la caché de respuestas con una mezcla de preguntas generales repetidas.
+
+Envía preguntas sin reportes cargados (algunas repetidas tal cual, otras con
+variaciones de mayúsculas, acentos y signos, y otras reformuladas) contra el
+servidor falso de Groq y muestra las llamadas al modelo, los aciertos y la tasa
+de aciertos, con y sin coincidencia por similitud. También lanza turnos con
+reportes o con historial para comprobar que no usan la caché.
+
+Uso:
+    python benchmarks/response_cache.py --latency 0.2 --similarity 0.8
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+
+QUESTIONS = [
+    "¿Cómo mejorar mi LCP?",
+    "como mejorar mi lcp",
+    "¿Cómo mejorar mi LCP??",
+    "¿Qué es el CLS?",
+    "que es el cls",
+    "¿Cómo puedo mejorar el Largest Contentful Paint?",
+    "¿Qué significa CLS?",
+    "¿Cómo optimizo las imágenes de mi web?",
+    "¿Cómo optimizo las imágenes de mi web?",
+    "¿Qué es el Total Blocking Time?",
+]
+
+# Turnos que deben saltarse la caché: con reportes o con historial
+BYPASS_TURNS = [
+    (
+        [{"role": "user", "content": "¿Cómo mejorar mi LCP?"}],
+        {"reporte.json": "Rendimiento: 45/100; LCP 4.2 s"},
+    ),
+    (
+        [
+            {"role": "user", "content": "¿Qué es el CLS?"},
+            {"role": "assistant", "content": "Es la estabilidad visual."},
+            {"role": "user", "content": "¿Cómo mejorar mi LCP?"},
+        ],
+        None,
+    ),
+]
+
+
+def _run(similarity: float | None, rounds: int) -> tuple[dict, int, float]:
+    import core.response_cache as response_cache
+    from core.model import stream_model_response
+
+    response_cache._response_cache = response_cache.ResponseCache(similarity_threshold=similarity)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for question in QUESTIONS:
+            for _delta in stream_model_response([{"role": "user", "content": question}]):
+                pass
+        for messages, summaries in BYPASS_TURNS:
+            for _delta in stream_model_response(messages, report_summaries=summaries):
+                pass
+    return response_cache.get_response_cache().stats(), rounds, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--similarity", type=float, default=0.8)
+    parser.add_argument("--rounds", type=int, default=2)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+
+    with FakeGroqServer(latency=args.latency, response_tokens=20) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+
+        modes = [("exacta", None), (f"similitud >= {args.similarity}", args.similarity)]
+        for label, similarity in modes:
+            server.reset()
+            stats, rounds, elapsed = _run(similarity, args.rounds)
+            turns = rounds * (len(QUESTIONS) + len(BYPASS_TURNS))
+            print(
+                f"{label:>18}: {turns} turnos, {server.stats()['requests']} llamadas al modelo, "
+                f"{stats['hits']} aciertos exactos, {stats['similar_hits']} por similitud, "
+                f"{stats['bypasses']} sin caché, tasa de aciertos {stats['hit_rate']:.0%}, "
+                f"{elapsed:.2f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
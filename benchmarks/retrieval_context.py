@@ -0,0 +1,116 @@
+"""
+Tokens de prompt y latencia con el contexto recuperado frente al resumen completo.
+
+Para un conjunto de preguntas concretas y generales, construye los mensajes del
+modelo principal con REPORT_CONTEXT_MODE=summary y con auto, usando el resumen
+determinista como resumen de cada reporte, y los envía al servidor falso de Groq
+(cuya latencia crece con los tokens de prompt). Muestra los tokens de la sección
+de reportes y del prompt completo, y el tiempo de construir el índice y de
+cargarlo desde disco.
+
+El resumen determinista ya es compacto; con resúmenes del modelo (más largos) el
+ahorro de la recuperación es mayor.
+
+Uso:
+    python benchmarks/retrieval_context.py --reports 3 --prompt-latency-ms 0.05
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+from benchmarks.synthetic import load_bundled_report  # noqa: E402
+
+QUESTIONS = [
+    "¿Cómo mejorar mi LCP?",
+    "¿Qué es el CLS y cómo lo reduzco?",
+    "¿Por qué falla el contraste de colores?",
+    "¿Cómo reduzco el JavaScript no usado?",
+    "¿Las imágenes tienen atributo alt?",
+    "Analiza mi reporte",
+    "¿Qué debería priorizar?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reports", type=int, default=3, help="reportes cargados")
+    parser.add_argument(
+        "--prompt-latency-ms",
+        type=float,
+        default=0.05,
+        help="milisegundos de latencia simulada por token de prompt",
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["LIGHTHOUSE_CACHE_DIR"] = tempfile.mkdtemp()
+
+    from core.cache import report_hash
+    from core.clients import get_groq_client, reset_clients
+    from core.digest import build_report_digest
+    from core.model import CHAT_MODEL, _build_chat_messages, preprocess_lighthouse_report
+    from core.retrieval import _index_dir
+    from rag import AuditIndex, load_or_build_index
+
+    processed = preprocess_lighthouse_report(load_bundled_report())
+    names = [f"reporte-{n}.json" for n in range(1, args.reports + 1)]
+    processed_reports = {name: processed for name in names}
+    digest = build_report_digest(processed)
+    summaries = {name: digest for name in names}
+
+    start = time.perf_counter()
+    AuditIndex.from_report(processed)
+    build_ms = (time.perf_counter() - start) * 1000
+    load_or_build_index(processed, report_hash(processed), _index_dir())
+    start = time.perf_counter()
+    load_or_build_index(processed, report_hash(processed), _index_dir())
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"índice: construir={build_ms:.1f} ms  cargar de disco={load_ms:.1f} ms\n")
+
+    with FakeGroqServer(prompt_token_latency=args.prompt_latency_ms / 1000) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        reset_clients()
+        client = get_groq_client()
+
+        print(f"{'':<42} {'resumen':^27} {'auto':^27}")
+        columns = "reportes  prompt  latencia"
+        print(f"{'pregunta':<42} {columns:>27} {columns:>27}")
+        totals = {"summary": 0, "auto": 0}
+        for question in QUESTIONS:
+            row = []
+            for mode in ("summary", "auto"):
+                os.environ["REPORT_CONTEXT_MODE"] = mode
+                messages, accounting = _build_chat_messages(
+                    [{"role": "user", "content": question}],
+                    None,
+                    summaries,
+                    processed_reports=processed_reports,
+                )
+                start = time.perf_counter()
+                client.chat.completions.create(model=CHAT_MODEL, messages=messages)
+                elapsed = time.perf_counter() - start
+                report_tokens = sum(accounting.reports.values())
+                totals[mode] += report_tokens
+                row.append(
+                    f"{report_tokens:>8} {accounting.total:>7} {elapsed * 1000:>7.0f} ms"
+                )
+            print(f"{question:<42} {row[0]:>27} {row[1]:>27}")
+
+        saved = 1 - totals["auto"] / totals["summary"]
+        print(
+            f"\ntokens de reportes: resumen={totals['summary']} "
+            f"auto={totals['auto']} ({saved:.0%} menos)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Precisión y exhaustividad del clasificador local de alcance.
+
+Evalúa app/core/scope.py sobre el conjunto etiquetado de
+benchmarks/data/scope_questions.jsonl. Para "fuera de alcance" (la respuesta fija
+que evita llamar al modelo principal) muestra precisión y exhaustividad de lo que
+se decide en local, y qué parte de las preguntas queda dudosa y se consultaría al
+modelo pequeño.
+
+Sin opciones evalúa solo las palabras clave; con --cross-validate añade el modelo
+lineal sobre TF-IDF entrenado por validación cruzada (cada pregunta se clasifica
+con un modelo que no la ha visto). Con --train PATH entrena el modelo con todo el
+conjunto y lo guarda para usarlo con SCOPE_MODEL_PATH.
+
+Uso:
+    python benchmarks/scope_classifier.py --cross-validate 5
+    python benchmarks/scope_classifier.py --train scope_model.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from core.scope import Scope, classify_scope, train_scope_model  # noqa: E402
+
+LABELED_SET = ROOT / "benchmarks" / "data" / "scope_questions.jsonl"
+
+
+def load_examples(path: Path = LABELED_SET) -> list[tuple[str, bool]]:
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                examples.append((record["question"], record["label"] == Scope.IN_SCOPE.value))
+    return examples
+
+
+def _report(label: str, examples: list[tuple[str, bool]], predictions: list[Scope]) -> None:
+    rejected = [(inside, p) for (_, inside), p in zip(examples, predictions) if p is Scope.OUT_OF_SCOPE]
+    accepted = [(inside, p) for (_, inside), p in zip(examples, predictions) if p is Scope.IN_SCOPE]
+    ambiguous = sum(p is Scope.AMBIGUOUS for p in predictions)
+    outside = sum(not inside for _, inside in examples)
+    true_rejections = sum(not inside for inside, _ in rejected)
+
+    precision = true_rejections / len(rejected) if rejected else float("nan")
+    recall = true_rejections / outside if outside else float("nan")
+    accepted_precision = (
+        sum(inside for inside, _ in accepted) / len(accepted) if accepted else float("nan")
+    )
+    print(
+        f"{label}: fuera de alcance precisión {precision:.0%}, exhaustividad {recall:.0%} · "
+        f"dentro de alcance precisión {accepted_precision:.0%} · "
+        f"dudosas (modelo pequeño) {ambiguous}/{len(examples)} ({ambiguous / len(examples):.0%})"
+    )
+
+
+def _print_errors(examples: list[tuple[str, bool]], predictions: list[Scope]) -> None:
+    for (question, inside), prediction in zip(examples, predictions):
+        wrong = (prediction is Scope.OUT_OF_SCOPE and inside) or (
+            prediction is Scope.IN_SCOPE and not inside
+        )
+        if wrong:
+            print(f"  ✗ {prediction.value:<13} {question}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", type=Path, default=LABELED_SET)
+    parser.add_argument("--cross-validate", type=int, default=0, metavar="FOLDS")
+    parser.add_argument("--train", type=Path, default=None, metavar="PATH")
+    parser.add_argument("--errors", action="store_true", help="Listar los errores")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    examples = load_examples(args.data)
+    print(
+        f"{len(examples)} preguntas ({sum(inside for _, inside in examples)} dentro de alcance)"
+    )
+
+    start = time.perf_counter()
+    keyword_predictions = [classify_scope(question, model=None).scope for question, _ in examples]
+    per_question = (time.perf_counter() - start) / len(examples)
+    _report("palabras clave", examples, keyword_predictions)
+    print(f"  {per_question * 1e6:.0f} µs por pregunta")
+    if args.errors:
+        _print_errors(examples, keyword_predictions)
+
+    if args.cross_validate > 1:
+        order = list(range(len(examples)))
+        random.Random(args.seed).shuffle(order)
+        predictions: list[Scope | None] = [None] * len(examples)
+        for fold in range(args.cross_validate):
+            test = set(order[fold :: args.cross_validate])
+            model = train_scope_model([examples[i] for i in order if i not in test])
+            for i in test:
+                predictions[i] = classify_scope(examples[i][0], model=model).scope
+        _report(f"+ modelo lineal ({args.cross_validate} pliegues)", examples, predictions)
+        if args.errors:
+            _print_errors(examples, predictions)
+
+    if args.train is not None:
+        train_scope_model(examples).save(args.train)
+        print(f"Modelo guardado en {args.train} (usar con SCOPE_MODEL_PATH={args.train})")
+
+
+if __name__ == "__main__":
+    main()
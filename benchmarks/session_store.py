@@ -0,0 +1,111 @@
+"""
+Coste de guardar y reabrir sesiones con el almacén persistente (core/store.py).
+
+Guarda el reporte de docs/ (y versiones escaladas) en un almacén temporal, con
+varias sesiones que lo comparten y un historial de chat, y mide:
+
+- Tamaño del reporte preprocesado frente al blob comprimido, y cuántas copias se
+  guardan (una por contenido aunque lo carguen varias sesiones).
+- Volver a subir el mismo archivo: parsear y preprocesar frente a buscarlo por su
+  hash y descomprimirlo.
+- Reabrir una sesión (reportes, resúmenes e historial, sin LLM) y el primer acceso
+  a cada reporte, que se descomprime bajo demanda.
+
+Uso:
+    python benchmarks/session_store.py --scales 1 10 --sessions 20 --messages 50
+"""
+
+import argparse
+import hashlib
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import load_bundled_report, scale_report  # noqa: E402
+from core.model import stored_summary_key  # noqa: E402
+from core.report_io import load_preprocessed_report  # noqa: E402
+from core.store import LazyReports, SessionStore  # noqa: E402
+
+
+def _median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    report = load_bundled_report()
+    messages = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Mensaje {i} " * 40}
+        for i in range(args.messages)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SessionStore(Path(tmp) / "sessions.sqlite3")
+
+        for scale in args.scales:
+            data = json.dumps(scale_report(report, scale)).encode("utf-8")
+            processed, _ = load_preprocessed_report(data)
+            source_hash = hashlib.sha256(data).hexdigest()
+
+            for i in range(args.sessions):
+                session_id = f"{scale}x-{i}"
+                digest = store.put_report(processed, source_hash)
+                store.add_session_report(session_id, "reporte.json", digest)
+                store.put_summary(digest, stored_summary_key(digest), "Resumen " * 300)
+                store.sync_messages(session_id, messages)
+
+            processed_size = len(json.dumps(processed, ensure_ascii=False).encode("utf-8"))
+            stats = store.stats()
+            print(f"{scale}x ({args.sessions} sesiones con el mismo reporte)")
+            print(
+                f"  original {len(data) / 1e6:.2f} MB · preprocesado "
+                f"{processed_size / 1e3:.0f} KB · blobs guardados {stats['reports']} "
+                f"({stats['stored_bytes'] / 1e3:.0f} KB en total)"
+            )
+
+            parse_ms = _median_ms(lambda: load_preprocessed_report(data), max(3, args.repeat // 4))
+            lookup_ms = _median_ms(
+                lambda: store.load_report(
+                    store.find_source(hashlib.sha256(data).hexdigest())
+                ),
+                args.repeat,
+            )
+            print(
+                f"  volver a subir: parsear {parse_ms:.1f} ms · desde el almacén {lookup_ms:.1f} ms"
+            )
+
+            session_id = f"{scale}x-0"
+            restore_ms = _median_ms(
+                lambda: store.restore_session(session_id, stored_summary_key), args.repeat
+            )
+            stored = store.restore_session(session_id, stored_summary_key)
+            first_access_ms = _median_ms(
+                lambda: LazyReports(store, stored.reports)["reporte.json"], args.repeat
+            )
+            print(
+                f"  reabrir la sesión ({len(stored.messages)} mensajes, "
+                f"{len(stored.summaries)} resumen): {restore_ms:.2f} ms · "
+                f"primer acceso al reporte: {first_access_ms:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compara la latencia percibida de get_model_response y stream_model_response.
+
+El servidor falso genera respuestas largas (por defecto ~2000 tokens) fragmento a
+fragmento, de modo que se ve la diferencia entre esperar la respuesta completa y
+mostrar el primer token.
+
+Uso:
+    python benchmarks/streaming_latency.py --response-tokens 2000 --token-delay 0.002
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--response-tokens", type=int, default=2000)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    # Se repite la misma pregunta: sin caché de respuestas para medir el modelo
+    os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+
+    from core.model import get_model_response, stream_model_response
+
+    messages = [{"role": "user", "content": "¿Cómo mejorar mi LCP?"}]
+
+    with FakeGroqServer(
+        latency=args.latency,
+        response_tokens=args.response_tokens,
+        token_delay=args.token_delay,
+    ) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+
+        # Sin streaming la respuesta se completa en el servidor antes de enviarse,
+        # así que se simula el mismo tiempo de generación
+        blocking_times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            get_model_response(messages)
+            blocking_times.append(
+                time.perf_counter() - start + args.response_tokens * args.token_delay
+            )
+
+        first_token_times, total_times = [], []
+        for _ in range(args.runs):
+            stream = stream_model_response(messages)
+            for _delta in stream:
+                pass
+            first_token_times.append(stream.time_to_first_token)
+            total_times.append(stream.total_time)
+
+    avg = lambda values: sum(values) / len(values)  # noqa: E731
+    print(f"sin streaming: respuesta visible a los {avg(blocking_times):.2f} s")
+    print(
+        f"con streaming: primer token a los {avg(first_token_times):.2f} s, "
+        f"respuesta completa a los {avg(total_times):.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
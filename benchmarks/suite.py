@@ -0,0 +1,336 @@
+"""
+Suite de benchmarks del pipeline de reportes con baselines guardadas.
+
+Mide, sobre el reporte incluido en docs/ y versiones escaladas (10x/100x
+auditorías):
+
+- preprocess: preprocess_lighthouse_report sobre el reporte completo
+- remove_large_values: _remove_large_values sobre el reporte completo
+- chunking: troceado del reporte preprocesado para el resumen
+- summarize: summarize_preprocessed_report contra el servidor falso de Groq
+- chat: get_model_response con el resumen como contexto, contra el servidor falso
+
+Para cada caso registra el tiempo (mediana y mínimo de --repeat ejecuciones), la
+memoria pico (tracemalloc, en una ejecución aparte), la reducción de tamaño
+(1 - salida/entrada, en bytes de JSON), el número de trozos y las llamadas al
+modelo (en la tabla, los trozos aparecen entre paréntesis en esa columna).
+summarize y chat solo se miden hasta --llm-max-scale (10x por defecto).
+
+El servidor falso es determinista (las respuestas dependen solo de la petición) y
+su latencia se configura con --latency, así que el número de llamadas y las
+reducciones deben coincidir exactamente entre ejecuciones; los tiempos y la
+memoria se comparan con una tolerancia.
+
+Uso:
+    python benchmarks/suite.py                         # mide y compara con la baseline
+    python benchmarks/suite.py --save                  # guarda la baseline
+    python benchmarks/suite.py --scales 1 10 --cases preprocess chunking
+    python benchmarks/suite.py --time-tolerance 0.5    # máquinas con más ruido
+
+Sale con código 1 si alguna métrica empeora respecto a la baseline. Los tiempos
+dependen de la máquina: conviene guardar la baseline en la misma máquina (o en el
+mismo runner de CI) en la que se compara.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+from benchmarks.synthetic import load_bundled_report, scale_report  # noqa: E402
+
+BASELINE_PATH = ROOT / "benchmarks" / "baselines" / "suite.json"
+CASES = ("preprocess", "remove_large_values", "chunking", "summarize", "chat")
+QUESTION = "¿Cómo mejorar mi LCP?"
+
+
+@dataclass
+class CaseResult:
+    name: str
+    time_median: float
+    time_min: float
+    peak_memory_mb: float
+    size_reduction: float | None = None
+    chunks: int | None = None
+    llm_calls: int | None = None
+
+
+@dataclass
+class Case:
+    name: str
+    # Ejecuta el caso una vez y devuelve sus métricas propias: "input_bytes" y
+    # "output_bytes" (para la reducción de tamaño) o "chunks"
+    run: Callable[[], dict | None]
+    # Se llama antes de cada ejecución (por ejemplo, para vaciar cachés)
+    setup: Callable[[], None] = lambda: None
+
+
+def _json_size(obj) -> int:
+    return len(json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+
+def _fresh_caches() -> None:
+    """Vacía las cachés para que cada ejecución llame al modelo."""
+    from core.cache import get_summary_cache
+    from core.response_cache import get_response_cache
+
+    get_summary_cache().clear()
+    get_response_cache().clear()
+
+
+def _build_cases(
+    scale: int, report: dict, server: FakeGroqServer, with_llm: bool
+) -> list[Case]:
+    from core.chunking import chunk_report
+    from core.model import (
+        _remove_large_values,
+        get_model_response,
+        preprocess_lighthouse_report,
+        summarize_preprocessed_report,
+    )
+
+    input_size = _json_size(report)
+    processed = preprocess_lighthouse_report(report)
+    processed_size = _json_size(processed)
+
+    summary = ""
+    if with_llm:
+        _fresh_caches()
+        summary = summarize_preprocessed_report(processed)
+    messages = [{"role": "user", "content": QUESTION}]
+
+    def preprocess():
+        output = preprocess_lighthouse_report(report)
+        return {"input_bytes": input_size, "output_bytes": _json_size(output)}
+
+    def remove_large_values():
+        output = _remove_large_values(report)
+        return {"input_bytes": input_size, "output_bytes": _json_size(output)}
+
+    def chunking():
+        # Cada trozo es una llamada al modelo en la fase de resumen por trozos
+        return {"chunks": len(chunk_report(processed))}
+
+    def summarize():
+        output = summarize_preprocessed_report(processed)
+        return {"input_bytes": processed_size, "output_bytes": len(output.encode("utf-8"))}
+
+    def chat():
+        get_model_response(
+            messages,
+            report_summaries={"reporte.json": summary},
+            processed_reports={"reporte.json": processed},
+        )
+
+    def reset():
+        _fresh_caches()
+        server.reset()
+
+    cases = [
+        Case(f"preprocess[{scale}x]", preprocess),
+        Case(f"remove_large_values[{scale}x]", remove_large_values),
+        Case(f"chunking[{scale}x]", chunking),
+    ]
+    if with_llm:
+        cases += [
+            Case(f"summarize[{scale}x]", summarize, reset),
+            Case(f"chat[{scale}x]", chat, reset),
+        ]
+    return cases
+
+
+def _measure(case: Case, repeat: int, server: FakeGroqServer) -> CaseResult:
+    times = []
+    metrics = None
+    llm_calls = None
+    for _ in range(repeat):
+        case.setup()
+        server.reset()
+        gc.collect()
+        start = time.perf_counter()
+        metrics = case.run() or {}
+        times.append(time.perf_counter() - start)
+        llm_calls = server.stats()["requests"]
+
+    # La memoria se mide aparte: tracemalloc ralentiza la ejecución
+    case.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    reduction = None
+    if metrics.get("input_bytes"):
+        reduction = round(1 - metrics["output_bytes"] / metrics["input_bytes"], 4)
+
+    return CaseResult(
+        name=case.name,
+        time_median=statistics.median(times),
+        time_min=min(times),
+        peak_memory_mb=peak / 1e6,
+        size_reduction=reduction,
+        chunks=metrics.get("chunks"),
+        llm_calls=llm_calls or None,
+    )
+
+
+def compare_results(
+    results: list[CaseResult],
+    baseline: dict,
+    time_tolerance: float,
+    memory_tolerance: float,
+) -> list[str]:
+    """Métricas que empeoran respecto a la baseline (vacío si ninguna)."""
+    regressions = []
+    for result in results:
+        previous = baseline.get("results", {}).get(result.name)
+        if previous is None:
+            continue
+        if result.time_median > previous["time_median"] * (1 + time_tolerance):
+            regressions.append(
+                f"{result.name}: tiempo {result.time_median * 1e3:.1f} ms "
+                f"(baseline {previous['time_median'] * 1e3:.1f} ms)"
+            )
+        if result.peak_memory_mb > previous["peak_memory_mb"] * (1 + memory_tolerance) + 0.5:
+            regressions.append(
+                f"{result.name}: memoria pico {result.peak_memory_mb:.1f} MB "
+                f"(baseline {previous['peak_memory_mb']:.1f} MB)"
+            )
+        if (
+            result.size_reduction is not None
+            and previous.get("size_reduction") is not None
+            and result.size_reduction < previous["size_reduction"] - 0.001
+        ):
+            regressions.append(
+                f"{result.name}: reducción {result.size_reduction:.1%} "
+                f"(baseline {previous['size_reduction']:.1%})"
+            )
+        if (result.chunks or 0) > (previous.get("chunks") or 0):
+            regressions.append(
+                f"{result.name}: {result.chunks} trozos (baseline {previous.get('chunks') or 0})"
+            )
+        if (result.llm_calls or 0) > (previous.get("llm_calls") or 0):
+            regressions.append(
+                f"{result.name}: {result.llm_calls} llamadas al modelo "
+                f"(baseline {previous.get('llm_calls') or 0})"
+            )
+    return regressions
+
+
+def _format_row(result: CaseResult, previous: dict | None) -> str:
+    delta = ""
+    if previous:
+        change = result.time_median / previous["time_median"] - 1
+        delta = f"{change:+.0%}"
+    reduction = f"{result.size_reduction:.1%}" if result.size_reduction is not None else "-"
+    calls = str(result.llm_calls) if result.llm_calls is not None else "-"
+    if result.chunks is not None:
+        calls = f"({result.chunks})"
+    return (
+        f"{result.name:<28} {result.time_median * 1e3:>10.1f} {result.time_min * 1e3:>10.1f} "
+        f"{delta:>7} {result.peak_memory_mb:>9.1f} {reduction:>10} {calls:>7}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--llm-max-scale",
+        type=int,
+        default=10,
+        help="Escala máxima de summarize y chat (a 100x son ~3000 llamadas por ejecución)",
+    )
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="Guardar como baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    # Cachés solo en memoria y sin caché de respuestas: se miden las llamadas reales
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["LIGHTHOUSE_CACHE_DIR"] = ""
+    os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["TELEMETRY_LOG"] = "0"
+    os.environ["SUMMARY_STRATEGY"] = "llm"
+
+    baseline = {}
+    if args.baseline.exists() and not args.save:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+
+    report = load_bundled_report()
+    results = []
+    with FakeGroqServer(latency=args.latency, token_delay=0.0, response_tokens=80) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        from core.clients import reset_clients
+
+        reset_clients()
+
+        print(
+            f"{'caso':<28} {'mediana ms':>10} {'mín ms':>10} {'vs base':>7} "
+            f"{'pico MB':>9} {'reducción':>10} {'llamadas':>7}"
+        )
+        for scale in args.scales:
+            scaled = scale_report(report, scale)
+            with_llm = scale <= args.llm_max_scale and bool(
+                {"summarize", "chat"} & set(args.cases)
+            )
+            for case in _build_cases(scale, scaled, server, with_llm):
+                if case.name.split("[")[0] not in args.cases:
+                    continue
+                result = _measure(case, args.repeat, server)
+                results.append(result)
+                previous = baseline.get("results", {}).get(result.name)
+                print(_format_row(result, previous), flush=True)
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency": args.latency,
+            "repeat": args.repeat,
+            "results": {result.name: asdict(result) for result in results},
+        }
+        args.baseline.write_text(
+            json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+        )
+        print(f"\nBaseline guardada en {args.baseline}")
+        return
+
+    if not baseline:
+        print("\nSin baseline; guárdala con --save")
+        return
+
+    regressions = compare_results(
+        results, baseline, args.time_tolerance, args.memory_tolerance
+    )
+    if regressions:
+        print("\nRegresiones respecto a la baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print("\nSin regresiones respecto a la baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compara el resumen secuencial y concurrente de un reporte contra el servidor falso.
+
+Uso:
+    python benchmarks/summarize_concurrency.py --latency 0.3 --concurrency 1 4 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+
+DEFAULT_REPORT = ROOT / "docs" / "git-scm.com-20251127T122252.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--report", type=Path, default=DEFAULT_REPORT)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--tokens-per-minute", type=int, default=None)
+    args = parser.parse_args()
+
+    # La caché se desactiva para medir siempre las llamadas reales
+    os.environ["LIGHTHOUSE_CACHE_DIR"] = ""
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+
+    from core.cache import get_summary_cache
+    from core.model import preprocess_lighthouse_report, summarize_preprocessed_report
+
+    with open(args.report, encoding="utf-8") as f:
+        processed = preprocess_lighthouse_report(json.load(f))
+
+    with FakeGroqServer(latency=args.latency, fail_every=args.fail_every) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+
+        baseline = None
+        for concurrency in args.concurrency:
+            get_summary_cache().clear()
+            server.reset()
+
+            start = time.perf_counter()
+            summary = summarize_preprocessed_report(
+                processed,
+                max_concurrency=concurrency,
+                tokens_per_minute=args.tokens_per_minute,
+            )
+            elapsed = time.perf_counter() - start
+
+            if baseline is None:
+                baseline = summary
+            stats = server.stats()
+            print(
+                f"concurrencia={concurrency:<3} tiempo={elapsed:7.2f}s "
+                f"peticiones={stats['requests']:<4} "
+                f"simultáneas={stats['max_in_flight']:<3} "
+                f"mismo_resultado={summary == baseline}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Fusión en árbol de los resúmenes parciales frente a una sola fusión.
+
+Resume el reporte de docs/ y sus versiones escaladas contra el servidor falso de
+Groq, con una latencia por petición y otra por token de prompt (--latency y
+--prompt-token-latency), para comparar:
+
+- "plano": una única fusión con todos los resúmenes (SUMMARY_FAN_IN muy grande),
+  cuyo prompt y latencia crecen linealmente con el número de trozos.
+- "árbol": fusiones de --fan-in resúmenes por nivel, en paralelo; la profundidad
+  crece con el logaritmo del número de trozos.
+
+Después cambia una auditoría del reporte y lo vuelve a resumir con la caché de
+nodos llena: solo deberían repetirse su trozo y las fusiones de su camino.
+
+Uso:
+    python benchmarks/summarize_tree.py --scales 1 10 100 --fan-in 4
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+from benchmarks.synthetic import load_bundled_report, scale_report  # noqa: E402
+
+
+def _change_one_audit(processed: dict) -> dict:
+    """Copia del reporte con el displayValue de una auditoría con problemas cambiado."""
+    changed = copy.deepcopy(processed)
+    for audit in changed["audits"].values():
+        if isinstance(audit.get("score"), (int, float)) and audit["score"] < 1:
+            audit["displayValue"] = f"{audit.get('displayValue', '')} (cambiado)"
+            break
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--fan-in", type=int, default=4)
+    parser.add_argument("--target-tokens", type=int, default=4000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0001)
+    parser.add_argument("--response-tokens", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    # Caché solo en memoria, con sitio para todos los nodos del reporte más grande
+    os.environ["LIGHTHOUSE_CACHE_DIR"] = ""
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ["SUMMARY_TARGET_TOKENS"] = str(args.target_tokens)
+    os.environ["SUMMARY_MAX_CONCURRENCY"] = str(args.concurrency)
+
+    import core.cache
+    from core.chunking import chunk_report
+    from core.model import preprocess_lighthouse_report, summarize_preprocessed_report
+
+    core.cache._summary_cache = core.cache.SummaryCache(path=None, max_memory_entries=100_000)
+    cache = core.cache.get_summary_cache()
+
+    report = load_bundled_report()
+    variants = [("plano", 10**9), ("árbol", args.fan_in)]
+
+    with FakeGroqServer(
+        latency=args.latency,
+        prompt_token_latency=args.prompt_token_latency,
+        response_tokens=args.response_tokens,
+    ) as server:
+        os.environ["GROQ_BASE_URL"] = server.base_url
+
+        for scale in args.scales:
+            processed = preprocess_lighthouse_report(scale_report(report, scale))
+            chunks = len(chunk_report(processed))
+            print(f"{scale}x: {chunks} trozos")
+
+            for label, fan_in in variants:
+                os.environ["SUMMARY_FAN_IN"] = str(fan_in)
+                cache.clear()
+                server.reset()
+                start = time.perf_counter()
+                summarize_preprocessed_report(processed)
+                elapsed = time.perf_counter() - start
+                stats = server.stats()
+                print(
+                    f"  {label:<6} tiempo={elapsed:6.2f}s peticiones={stats['requests']:<4} "
+                    f"fusiones={stats['requests'] - chunks:<3} "
+                    f"tokens de prompt={stats['prompt_tokens']}"
+                )
+
+            # Con la caché del árbol llena, una auditoría cambiada
+            server.reset()
+            start = time.perf_counter()
+            summarize_preprocessed_report(_change_one_audit(processed))
+            elapsed = time.perf_counter() - start
+            print(
+                f"  una auditoría cambiada: tiempo={elapsed:6.2f}s "
+                f"peticiones={server.stats()['requests']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Reportes Lighthouse sintéticos para benchmarks.
+
+- scale_report: multiplica las auditorías de un reporte real (10x, 100x...).
+- edge_case_report: reporte pequeño con los casos límite del preprocesamiento.
+- report_history: ejecuciones diarias de varias URLs a partir de un reporte
+  preprocesado, con puntuaciones y métricas que varían.
+"""
+
+import copy
+import datetime
+import json
+import random
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+BUNDLED_REPORT = ROOT / "docs" / "git-scm.com-20251127T122252.json"
+
+
+def load_bundled_report() -> dict:
+    with open(BUNDLED_REPORT, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def scale_report(report: dict, factor: int) -> dict:
+    """
+    Devuelve una copia del reporte con factor veces más auditorías.
+
+    Las copias llevan el sufijo "-copyN" en el id y se añaden a los auditRefs de
+    las mismas categorías, de modo que los pesos siguen siendo coherentes.
+    """
+    scaled = copy.deepcopy(report)
+    if factor <= 1:
+        return scaled
+
+    original_audits = report.get("audits", {})
+    for n in range(1, factor):
+        for audit_id, audit in original_audits.items():
+            copy_id = f"{audit_id}-copy{n}"
+            audit_copy = copy.deepcopy(audit)
+            audit_copy["id"] = copy_id
+            scaled["audits"][copy_id] = audit_copy
+
+        for category in scaled.get("categories", {}).values():
+            original_refs = [
+                ref for ref in category.get("auditRefs", []) if "-copy" not in ref["id"]
+            ]
+            for ref in original_refs:
+                category["auditRefs"].append({**ref, "id": f"{ref['id']}-copy{n}"})
+
+    return scaled
+
+
+def edge_case_report(seed: int = 0) -> dict:
+    """Reporte pequeño con valores None, textos largos y claves que se descartan."""
+    rng = random.Random(seed)
+    long_text = "x" * rng.randint(5001, 20000)
+
+    return {
+        "finalUrl": "https://example.com/",
+        "requestedUrl": "https://example.com",
+        "fetchTime": "2025-01-01T00:00:00.000Z",
+        "runtimeError": None,
+        "environment": {
+            "networkUserAgent": long_text,
+            "screenshot": "data:image/png;base64,AAAA",
+            "nested": [{"items": [1, 2, 3], "value": None}, None, long_text],
+        },
+        "timing": {"total": 1234.5, "entries": [{"name": "a", "traces": [1]}]},
+        "configSettings": {"emulatedFormFactor": None, "locale": "es", "onlyCategories": None},
+        "categories": {
+            "performance": {
+                "id": "performance",
+                "title": "Performance",
+                "score": None,
+                "description": long_text,
+                "auditRefs": [
+                    {"id": "network-requests", "weight": 3},
+                    {"id": "metric", "weight": 0},
+                ],
+            },
+            "seo": {"id": "seo", "title": "SEO", "score": 0.5, "auditRefs": []},
+        },
+        "audits": {
+            "metric": {
+                "id": "metric",
+                "title": "Metric",
+                "description": long_text,
+                "score": 0,
+                "scoreDisplayMode": "numeric",
+                "numericValue": 10,
+                "displayValue": ["list", long_text],
+                "details": {"summary": None},
+            },
+            "network-requests": {"id": "network-requests", "details": {"items": [1]}},
+            "table": {
+                "id": "table",
+                "score": None,
+                "numericUnit": {"nested": long_text, "items": []},
+                "details": {
+                    "type": "table",
+                    "items": [{"url": long_text}] * 5,
+                    "summary": {"wastedMs": 12, "trace": [1], "note": long_text},
+                },
+            },
+            "no-details": {"id": "no-details", "details": "not-a-dict"},
+            "type-only": {"id": "type-only", "details": {"type": None}},
+        },
+    }
+
+
+def report_history(
+    processed: dict, runs: int, urls: int = 1, seed: int = 0
+) -> dict[str, dict]:
+    """
+    Historial sintético: `runs` ejecuciones (un día entre cada una) repartidas
+    entre `urls` URLs, con puntuaciones y numericValue perturbados al azar.
+    """
+    rng = random.Random(seed)
+    start = datetime.datetime(2025, 1, 1, 3, 0)
+    history = {}
+    for run in range(runs):
+        report = copy.deepcopy(processed)
+        url_index = run % urls
+        report["finalUrl"] = f"https://example.com/page-{url_index}"
+        report["fetchTime"] = (
+            start + datetime.timedelta(days=run // urls)
+        ).isoformat() + ".000Z"
+
+        for audit in report.get("audits", {}).values():
+            if isinstance(audit.get("score"), (int, float)):
+                audit["score"] = min(1.0, max(0.0, audit["score"] + rng.gauss(0, 0.08)))
+            if isinstance(audit.get("numericValue"), (int, float)):
+                audit["numericValue"] *= max(0.1, rng.gauss(1, 0.15))
+        for category in report.get("categories", {}).values():
+            if isinstance(category.get("score"), (int, float)):
+                category["score"] = min(1.0, max(0.0, category["score"] + rng.gauss(0, 0.04)))
+
+        history[f"run-{run:04d}-page-{url_index}.json"] = report
+    return history
@@ -0,0 +1,21 @@
+"""
+Recuperación local de auditorías relevantes para una pregunta.
+"""
+
+from .index import (
+    AuditDocument,
+    AuditIndex,
+    audit_documents,
+    expand_query,
+    load_or_build_index,
+    tokenize,
+)
+
+__all__ = [
+    "AuditDocument",
+    "AuditIndex",
+    "audit_documents",
+    "expand_query",
+    "load_or_build_index",
+    "tokenize",
+]
@@ -0,0 +1,249 @@
+"""
+Índice BM25 de las auditorías de un reporte Lighthouse preprocesado.
+
+Cada auditoría es un documento con su id, título, descripción, displayValue,
+details.summary y las categorías en las que puntúa. Las preguntas se expanden con
+un pequeño diccionario (siglas de métricas y términos en español) para que, por
+ejemplo, "¿Cómo mejorar mi LCP?" encuentre "Largest Contentful Paint". Las siglas
+que coinciden con una palabra vacía ("si") solo se expanden escritas en mayúsculas.
+"""
+
+import json
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+INDEX_VERSION = 1
+
+_TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+_MARKDOWN_LINK_RE = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+
+_STOPWORDS = frozenset(
+    """
+    a al algo como con cual de del el en es esta este hay la las lo los me mi mis
+    mucho muy no para pero por que se si sin sobre su sus tu tus un una uno y ya
+    puedo puede hacer mejorar como cuales donde porque
+    an and are as at be by can do does for from how in is it of on or the this to
+    what which why with you your
+    """.split()
+)
+
+# Expansiones de términos de la pregunta al vocabulario de las auditorías
+QUERY_EXPANSIONS = {
+    "lcp": "largest contentful paint",
+    "fcp": "first contentful paint",
+    "cls": "cumulative layout shift",
+    "tbt": "total blocking time",
+    "inp": "interaction next paint",
+    "fid": "interaction next paint input delay",
+    "tti": "interactive",
+    "ttfb": "server response time document latency",
+    "imagen": "image images img",
+    "imagenes": "image images img",
+    "contraste": "contrast color",
+    "color": "contrast",
+    "cache": "cache ttl lifetimes",
+    "cacheo": "cache ttl lifetimes",
+    "javascript": "javascript js script",
+    "js": "javascript script",
+    "css": "css stylesheet",
+    "fuentes": "font fonts",
+    "fuente": "font",
+    "accesibilidad": "accessibility aria",
+    "seguridad": "https security",
+    "bloqueo": "blocking render",
+    "bloquean": "blocking render",
+    "renderizado": "render",
+    "tamano": "size sized",
+    "alt": "alt image",
+    "titulo": "title",
+    "descripcion": "description meta",
+    "enlaces": "link links anchors",
+    "teclado": "tabindex focus keyboard",
+    "movil": "viewport mobile target",
+    "redirecciones": "redirects",
+    "compresion": "compression text",
+    "minificar": "minify",
+    "lazy": "offscreen defer",
+}
+
+# Siglas que en minúsculas son palabras vacías: se buscan tal cual en la pregunta
+CASE_SENSITIVE_EXPANSIONS = {
+    "SI": "speed index",
+}
+_CASE_SENSITIVE_RE = re.compile(
+    r"\b(" + "|".join(map(re.escape, CASE_SENSITIVE_EXPANSIONS)) + r")\b"
+)
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> list[str]:
+    """Tokens en minúsculas y sin acentos, sin palabras vacías."""
+    return [token for token in _TOKEN_RE.findall(_normalize(text)) if token not in _STOPWORDS]
+
+
+def expand_query(question: str) -> list[str]:
+    tokens = tokenize(question)
+    expanded = list(tokens)
+    for token in tokens:
+        if token in QUERY_EXPANSIONS:
+            expanded.extend(tokenize(QUERY_EXPANSIONS[token]))
+    for acronym in _CASE_SENSITIVE_RE.findall(question):
+        expanded.extend(tokenize(CASE_SENSITIVE_EXPANSIONS[acronym]))
+    return expanded
+
+
+@dataclass
+class AuditDocument:
+    id: str
+    title: str
+    description: str
+    score: float | None
+    display_value: str | None
+    summary: dict | None
+    categories: list[str]
+
+    def text(self) -> str:
+        parts = [self.id.replace("-", " "), self.title, self.description]
+        if self.display_value:
+            parts.append(self.display_value)
+        if self.summary:
+            parts.append(" ".join(f"{key} {value}" for key, value in self.summary.items()))
+        parts.extend(self.categories)
+        return " ".join(parts)
+
+
+def audit_documents(processed: dict) -> list[AuditDocument]:
+    """Un documento por auditoría del reporte preprocesado."""
+    categories_by_audit: dict[str, list[str]] = {}
+    for category_id, category in processed.get("categories", {}).items():
+        for audit_id in category.get("auditWeights", {}):
+            categories_by_audit.setdefault(audit_id, []).append(
+                category.get("title") or category_id
+            )
+
+    documents = []
+    for audit_id, audit in processed.get("audits", {}).items():
+        summary = audit.get("details", {}).get("summary")
+        documents.append(
+            AuditDocument(
+                id=audit_id,
+                title=audit.get("title", ""),
+                description=_MARKDOWN_LINK_RE.sub(r"\1", audit.get("description", "")),
+                score=audit.get("score"),
+                display_value=audit.get("displayValue"),
+                summary=summary if isinstance(summary, dict) else None,
+                categories=categories_by_audit.get(audit_id, []),
+            )
+        )
+    return documents
+
+
+class AuditIndex:
+    """Índice BM25 en memoria sobre las auditorías de un reporte."""
+
+    def __init__(
+        self,
+        documents: list[AuditDocument],
+        term_frequencies: list[dict[str, int]],
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.documents = documents
+        self.term_frequencies = term_frequencies
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths = [sum(tf.values()) for tf in term_frequencies]
+        self.avg_doc_length = (
+            sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        )
+        document_frequency = Counter(term for tf in term_frequencies for term in tf)
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    @classmethod
+    def from_report(cls, processed: dict) -> "AuditIndex":
+        documents = audit_documents(processed)
+        return cls(documents, [dict(Counter(tokenize(doc.text()))) for doc in documents])
+
+    def search(self, question: str, top_k: int = 8) -> list[tuple[AuditDocument, float]]:
+        """Auditorías más relevantes para la pregunta, con su puntuación BM25."""
+        query = Counter(expand_query(question))
+        if not query:
+            return []
+
+        results = []
+        for doc, tf, length in zip(self.documents, self.term_frequencies, self.doc_lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_doc_length or 1))
+            for term, query_count in query.items():
+                freq = tf.get(term)
+                if freq:
+                    score += (
+                        self.idf[term] * freq * (self.k1 + 1) / (freq + norm) * query_count
+                    )
+            if score > 0:
+                results.append((doc, score))
+
+        results.sort(key=lambda item: -item[1])
+        return results[:top_k]
+
+    def save(self, path: str | Path) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "documents": [asdict(doc) for doc in self.documents],
+            "term_frequencies": self.term_frequencies,
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "AuditIndex | None":
+        """Carga un índice guardado; None si no existe o es de otra versión."""
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        documents = [AuditDocument(**doc) for doc in data["documents"]]
+        return cls(documents, data["term_frequencies"])
+
+
+def load_or_build_index(
+    processed: dict, report_key: str, index_dir: str | Path | None = None
+) -> AuditIndex:
+    """
+    Devuelve el índice del reporte, construyéndolo solo la primera vez.
+
+    Args:
+        processed: Reporte preprocesado
+        report_key: Identificador estable del contenido (p. ej. su hash)
+        index_dir: Directorio donde se guardan los índices; sin él no se persisten
+    """
+    path = Path(index_dir) / f"{report_key}.json" if index_dir else None
+    if path is not None:
+        index = AuditIndex.load(path)
+        if index is not None:
+            return index
+
+    index = AuditIndex.from_report(processed)
+    if path is not None:
+        try:
+            index.save(path)
+        except OSError:
+            pass
+    return index
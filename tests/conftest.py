@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# Los módulos de app/ se importan como en Streamlit (core.*, ui.*) y los de la raíz
+# como paquetes (backend, benchmarks, rag)
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT))
@@ -0,0 +1,139 @@
+"""
+Implementación anterior de preprocess_lighthouse_report, en dos pasadas (construir
+el resultado y después recorrerlo con _remove_large_values).
+
+Se conserva como referencia: test_preprocess.py comprueba que la versión en una
+pasada produce exactamente la misma salida, y benchmarks/preprocess_speed.py
+compara la velocidad de ambas.
+"""
+
+from typing import Any
+
+
+def legacy_preprocess_lighthouse_report(report: dict) -> dict:
+    """Versión en dos pasadas de preprocess_lighthouse_report."""
+    processed = {}
+
+    # Campos principales a mantener directamente
+    top_level_fields = [
+        "finalUrl",
+        "requestedUrl",
+        "fetchTime",
+        "userAgent",
+        "environment",
+        "runtimeError",
+        "timing",
+    ]
+
+    for field in top_level_fields:
+        if field in report:
+            processed[field] = report[field]
+
+    # Procesar configSettings (mantener solo configuración básica)
+    if "configSettings" in report:
+        config = report["configSettings"]
+        processed["configSettings"] = {
+            "emulatedFormFactor": config.get("emulatedFormFactor"),
+            "locale": config.get("locale"),
+            "onlyCategories": config.get("onlyCategories"),
+        }
+
+    # Procesar categories (mantener scores y títulos)
+    if "categories" in report:
+        processed["categories"] = {}
+        for category_id, category_data in report["categories"].items():
+            processed["categories"][category_id] = {
+                "id": category_data.get("id"),
+                "title": category_data.get("title"),
+                "score": category_data.get("score"),
+                "description": category_data.get("description"),
+            }
+
+            # Pesos de las auditorías que cuentan para la puntuación de la categoría
+            audit_weights = {
+                ref["id"]: ref["weight"]
+                for ref in category_data.get("auditRefs", [])
+                if ref.get("weight")
+            }
+            if audit_weights:
+                processed["categories"][category_id]["auditWeights"] = audit_weights
+
+    # Procesar audits (mantener solo información esencial)
+    if "audits" in report:
+        processed["audits"] = {}
+        for audit_id, audit_data in report["audits"].items():
+            processed_audit = {
+                "id": audit_data.get("id"),
+                "title": audit_data.get("title"),
+                "description": audit_data.get("description"),
+                "score": audit_data.get("score"),
+                "scoreDisplayMode": audit_data.get("scoreDisplayMode"),
+                "displayValue": audit_data.get("displayValue"),
+                "numericValue": audit_data.get("numericValue"),
+                "numericUnit": audit_data.get("numericUnit"),
+            }
+
+            # Mantener solo el summary de details, NO los items completos
+            if "details" in audit_data and isinstance(audit_data["details"], dict):
+                details = audit_data["details"]
+                processed_details = {}
+
+                # Mantener summary si existe
+                if "summary" in details:
+                    processed_details["summary"] = details["summary"]
+
+                # Mantener type para contexto
+                if "type" in details:
+                    processed_details["type"] = details["type"]
+
+                # Si hay items, solo contar cuántos hay, no incluir el array completo
+                if "items" in details and isinstance(details["items"], list):
+                    processed_details["itemsCount"] = len(details["items"])
+
+                if processed_details:
+                    processed_audit["details"] = processed_details
+
+            processed["audits"][audit_id] = processed_audit
+
+    # Eliminar cualquier valor que sea demasiado largo
+    processed = _legacy_remove_large_values(processed, max_length=5000)
+
+    return processed
+
+
+def _legacy_remove_large_values(obj: Any, max_length: int = 5000) -> Any:
+    """
+    Recursivamente elimina valores cuya representación en string supere max_length.
+    """
+    if isinstance(obj, dict):
+        result = {}
+        for key, value in obj.items():
+            # Saltar campos que sabemos que son grandes
+            if key in [
+                "full-page-screenshot",
+                "screenshot",
+                "screenshots",
+                "trace",
+                "traces",
+                "network-requests",
+                "items",  # Ya manejamos items en preprocess
+            ]:
+                continue
+
+            processed_value = _legacy_remove_large_values(value, max_length)
+
+            # Verificar si el valor procesado es demasiado grande
+            if isinstance(processed_value, str) and len(processed_value) > max_length:
+                result[key] = f"[Valor muy largo - {len(processed_value)} caracteres]"
+            elif processed_value is not None:
+                result[key] = processed_value
+
+        return result
+    elif isinstance(obj, list):
+        return [_legacy_remove_large_values(item, max_length) for item in obj]
+    elif isinstance(obj, str):
+        if len(obj) > max_length:
+            return f"[Texto muy largo - {len(obj)} caracteres]"
+        return obj
+    else:
+        return obj
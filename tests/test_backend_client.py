@@ -0,0 +1,65 @@
+"""RemoteResponseStream toma del backend lo mismo que muestra la UI con ResponseStream."""
+
+import asyncio
+import threading
+
+from backend.app import create_server
+from backend.client import RemoteReportIngestor, RemoteResponseStream
+from backend.service import AnalysisService, ServiceSettings
+from benchmarks.fake_groq import FakeGroqServer
+from benchmarks.synthetic import load_bundled_report
+from core.clients import reset_clients
+from core.routing import Route
+
+
+def _start_backend() -> tuple[str, asyncio.AbstractEventLoop, object]:
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def run():
+        server = create_server(AnalysisService(ServiceSettings()))
+        await server.start("127.0.0.1", 0)
+        state["server"] = server
+        state["url"] = "http://%s:%d" % server.address
+        started.set()
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True).start()
+    started.wait()
+    return state["url"], loop, state["server"]
+
+
+def test_remote_stream_reports_model_and_route(tmp_path, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "fake")
+    monkeypatch.setenv("LIGHTHOUSE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("SUMMARY_STRATEGY", "digest")
+    monkeypatch.setenv("PREFETCH_MODE", "off")
+    monkeypatch.setenv("TELEMETRY_LOG", "0")
+
+    with FakeGroqServer() as groq:
+        monkeypatch.setenv("GROQ_BASE_URL", groq.base_url)
+        reset_clients()
+        base_url, loop, server = _start_backend()
+        try:
+            ingestor = RemoteReportIngestor(base_url)
+            ingestor.submit("reporte.json", load_bundled_report())
+            ingestor.wait()
+
+            messages = [{"role": "user", "content": "¿Cómo mejoro el LCP de mi página?"}]
+            stream = RemoteResponseStream(
+                base_url, messages, reports=ingestor.report_ids(["reporte.json"])
+            )
+            assert (stream.model, stream.route, stream.scope) == (None, None, None)
+            assert "".join(stream)
+        finally:
+            asyncio.run_coroutine_threadsafe(server.close(), loop).result(timeout=10)
+            reset_clients()
+
+    assert stream.error is None
+    assert stream.model
+    assert isinstance(stream.route.route, Route)
+    assert stream.context_accounting is not None
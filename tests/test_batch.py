@@ -0,0 +1,31 @@
+"""Un reporte resumido con el respaldo determinista se reintenta al relanzar el lote."""
+
+import asyncio
+import json
+
+import batch
+import core.cache
+from benchmarks.synthetic import load_bundled_report
+from core.model import FALLBACK_SUMMARY_PREFIX
+
+
+def _run(paths, out_dir):
+    return asyncio.run(batch.run_batch(paths, out_dir, workers=1, llm_concurrency=1))
+
+
+def test_fallback_summary_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(core.cache, "_summary_cache", core.cache.SummaryCache(path=None))
+    report = tmp_path / "reporte.json"
+    report.write_text(json.dumps(load_bundled_report()), encoding="utf-8")
+    out_dir = tmp_path / "salida"
+
+    fallback = f"{FALLBACK_SUMMARY_PREFIX} (error al resumir: 429)\n\nDigest"
+    monkeypatch.setattr(batch, "summarize_preprocessed_report", lambda *a, **kw: fallback)
+    stats = _run([report], out_dir)
+    assert (stats.succeeded, stats.failed) == (0, 1)
+    assert batch.load_checkpoint(out_dir / batch.RESULTS_FILE) == {}
+
+    monkeypatch.setattr(batch, "summarize_preprocessed_report", lambda *a, **kw: "Resumen")
+    stats = _run([report], out_dir)
+    assert (stats.skipped, stats.succeeded, stats.failed) == (0, 1, 0)
+    assert str(report) in batch.load_checkpoint(out_dir / batch.RESULTS_FILE)
@@ -0,0 +1,35 @@
+import sqlite3
+
+from core.cache import SummaryCache
+
+
+def test_disk_errors_fall_back_to_memory(tmp_path):
+    cache = SummaryCache(path=tmp_path / "summaries.sqlite3")
+    cache.put("a", "resumen a")
+
+    # Una conexión inutilizable hace fallar cualquier operación con sqlite3.Error
+    cache._db.close()
+    cache.put("b", "resumen b")
+
+    assert cache.get("a") == "resumen a"
+    assert cache.get("b") == "resumen b"
+    assert cache.get("c") is None
+    cache.clear()
+
+
+def test_locked_database_is_a_miss(tmp_path):
+    path = tmp_path / "summaries.sqlite3"
+    SummaryCache(path=path).put("a", "resumen a")
+    cache = SummaryCache(path=path)
+    cache._db.execute("PRAGMA busy_timeout = 0")
+
+    # Otro proceso (por ejemplo, un worker de app/batch.py) bloquea la base de datos
+    locker = sqlite3.connect(str(path))
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        assert cache.get("a") is None
+        cache.put("b", "resumen b")
+        assert cache.get("b") == "resumen b"
+    finally:
+        locker.rollback()
+        locker.close()
@@ -0,0 +1,104 @@
+"""Troceado del reporte en los modos structured, failures y fixed."""
+
+import json
+import re
+
+import pytest
+from benchmarks.synthetic import edge_case_report, load_bundled_report
+from core.chunking import _audit_line, chunk_report, fixed_size_chunks
+from core.model import preprocess_lighthouse_report
+from core.tokens import count_tokens
+
+_AUDIT_ID_RE = re.compile(r'^\{"id":"([^"]+)"')
+_TRUNCATED = " […]"
+
+REPORTS = {
+    "bundled": lambda: preprocess_lighthouse_report(load_bundled_report()),
+    "edge_cases": lambda: preprocess_lighthouse_report(edge_case_report(0)),
+}
+
+
+def _audit_lines(chunks: list[str]) -> list[str]:
+    """Líneas de auditoría (las de las secciones, no las categorías de la cabecera)."""
+    lines = []
+    for chunk in chunks:
+        in_section = False
+        for line in chunk.split("\n"):
+            in_section = in_section or line.startswith("## Auditorías: ")
+            if in_section and _AUDIT_ID_RE.match(line):
+                lines.append(line)
+    return lines
+
+
+def _expected_ids(processed: dict, mode: str) -> list[str]:
+    audits = processed["audits"]
+    if mode == "structured":
+        return sorted(audits)
+    return sorted(
+        audit_id
+        for audit_id, audit in audits.items()
+        if audit.get("score") != 1
+        and audit.get("scoreDisplayMode") not in ("notApplicable", "manual")
+    )
+
+
+@pytest.mark.parametrize("report", REPORTS)
+@pytest.mark.parametrize("mode", ["structured", "failures"])
+@pytest.mark.parametrize("budget", [300, 800, 2000])
+def test_chunks_stay_within_budget(report, mode, budget):
+    chunks = chunk_report(REPORTS[report](), mode=mode, token_budget=budget)
+    assert chunks
+    assert max(count_tokens(chunk) for chunk in chunks) <= budget
+
+
+@pytest.mark.parametrize("report", REPORTS)
+@pytest.mark.parametrize("mode", ["structured", "failures"])
+@pytest.mark.parametrize("budget", [300, 2000])
+def test_every_selected_audit_appears_once_and_whole(report, mode, budget):
+    processed = REPORTS[report]()
+    lines = _audit_lines(chunk_report(processed, mode=mode, token_budget=budget))
+
+    ids = [_AUDIT_ID_RE.match(line).group(1) for line in lines]
+    assert sorted(ids) == _expected_ids(processed, mode)
+    for line in lines:
+        # Solo se recorta una auditoría que por sí sola no cabe en un trozo
+        if line.endswith(_TRUNCATED):
+            audit_id = _AUDIT_ID_RE.match(line).group(1)
+            whole = _audit_line(audit_id, processed["audits"][audit_id])
+            assert whole.startswith(line[: -len(_TRUNCATED)])
+            assert count_tokens(whole) > budget // 2
+        else:
+            assert json.loads(line)["id"] in processed["audits"]
+
+
+def test_large_budget_never_truncates():
+    processed = REPORTS["bundled"]()
+    for mode in ("structured", "failures"):
+        lines = _audit_lines(chunk_report(processed, mode=mode, token_budget=2000))
+        assert not any(line.endswith(_TRUNCATED) for line in lines)
+
+
+def test_failures_mode_counts_omitted_audits():
+    processed = REPORTS["bundled"]()
+    chunks = chunk_report(processed, mode="failures", token_budget=2000)
+    omitted = sum(
+        int(match)
+        for chunk in chunks
+        for match in re.findall(r"^## Auditorías: .* \((\d+) aprobadas", chunk, re.M)
+    )
+    assert omitted == len(processed["audits"]) - len(_expected_ids(processed, "failures"))
+
+
+def test_continued_sections_repeat_their_title():
+    chunks = chunk_report(REPORTS["bundled"](), mode="structured", token_budget=300)
+    for chunk in chunks[1:]:
+        assert chunk.startswith("## Auditorías: ")
+
+
+def test_fixed_mode_keeps_the_character_chunks():
+    processed = REPORTS["bundled"]()
+    chunks = chunk_report(processed, mode="fixed", token_budget=300)
+    assert chunks == fixed_size_chunks(processed)
+    assert "".join(chunks) == json.dumps(processed, indent=2, ensure_ascii=False)
+    assert all(len(chunk) <= 3000 for chunk in chunks)
+    assert all(len(chunk) == 3000 for chunk in chunks[:-1])
@@ -0,0 +1,117 @@
+"""Resumen determinista de build_report_digest sobre un reporte sintético."""
+
+import pytest
+from core.digest import build_report_digest
+from core.model import preprocess_lighthouse_report
+
+
+def _audit(audit_id: str, title: str, score, display_value=None, numeric_value=None) -> dict:
+    audit = {"id": audit_id, "title": title, "score": score, "scoreDisplayMode": "numeric"}
+    if display_value is not None:
+        audit["displayValue"] = display_value
+    if numeric_value is not None:
+        audit["numericValue"] = numeric_value
+    return audit
+
+
+def _report() -> dict:
+    audits = [
+        _audit("first-contentful-paint", "First Contentful Paint", 0.95, "1,2\xa0s", 1200),
+        _audit("largest-contentful-paint", "Largest Contentful Paint", 0.4, "4,1\xa0s", 4100),
+        _audit("cumulative-layout-shift", "Cumulative Layout Shift", 0.3, "0,25", 0.25),
+        _audit("total-blocking-time", "Total Blocking Time", 0.2, "900\xa0ms", 900),
+        _audit("speed-index", "Speed Index", 0.7, "3,9\xa0s", 3900),
+        _audit("color-contrast", "Background and foreground colors", 0),
+        _audit("image-alt", "Image elements have `[alt]`", 0),
+        _audit("button-name", "Buttons have an accessible name", 1),
+        # Oportunidades sin peso en ninguna categoría
+        _audit("unused-javascript", "Reduce unused JavaScript", 0.5, "Ahorro: 300 KiB", 300),
+        _audit(
+            "render-blocking-resources", "Eliminate render-blocking resources", 0.5, None, 1200
+        ),
+    ]
+    return {
+        "finalUrl": "https://example.com/",
+        "fetchTime": "2025-01-01T00:00:00.000Z",
+        "categories": {
+            "performance": {
+                "id": "performance",
+                "title": "Performance",
+                "score": 0.52,
+                "auditRefs": [
+                    {"id": "first-contentful-paint", "weight": 10},
+                    {"id": "largest-contentful-paint", "weight": 25},
+                    {"id": "cumulative-layout-shift", "weight": 25},
+                    {"id": "total-blocking-time", "weight": 30},
+                    {"id": "speed-index", "weight": 10},
+                ],
+            },
+            "accessibility": {
+                "id": "accessibility",
+                "title": "Accessibility",
+                "score": 0.806,
+                "auditRefs": [
+                    {"id": "color-contrast", "weight": 7},
+                    {"id": "image-alt", "weight": 10},
+                    {"id": "button-name", "weight": 3},
+                ],
+            },
+        },
+        "audits": {audit["id"]: audit for audit in audits},
+    }
+
+
+@pytest.fixture
+def processed():
+    return preprocess_lighthouse_report(_report())
+
+
+def test_digest_lines_and_order(processed):
+    assert build_report_digest(processed).split("\n") == [
+        "URL: https://example.com/",
+        "Fecha: 2025-01-01T00:00:00.000Z",
+        "",
+        "### Puntuaciones por categoría",
+        "- Performance: 52/100",
+        "- Accessibility: 81/100",
+        "",
+        "### Core Web Vitals",
+        "- LCP: 4,1 s (puntuación 40)",
+        "- CLS: 0,25 (puntuación 30)",
+        "- FCP: 1,2 s (puntuación 95)",
+        "- TBT: 900 ms (puntuación 20)",
+        "- SI: 3,9 s (puntuación 70)",
+        "",
+        "### Auditorías con problemas (8, por impacto)",
+        "id\tpuntuación\tvalor\ttítulo",
+        # Impacto: peso relativo en la categoría por lo que falta para llegar a 100
+        "image-alt\t0\t-\tImage elements have `[alt]`",
+        "color-contrast\t0\t-\tBackground and foreground colors",
+        "total-blocking-time\t20\t900 ms\tTotal Blocking Time",
+        "cumulative-layout-shift\t30\t0,25\tCumulative Layout Shift",
+        "largest-contentful-paint\t40\t4,1 s\tLargest Contentful Paint",
+        "speed-index\t70\t3,9 s\tSpeed Index",
+        # Sin peso en ninguna categoría: por numericValue
+        "render-blocking-resources\t50\t-\tEliminate render-blocking resources",
+        "unused-javascript\t50\tAhorro: 300 KiB\tReduce unused JavaScript",
+    ]
+
+
+def test_failing_table_is_trimmed_to_the_budget(processed):
+    full = build_report_digest(processed)
+    lines = build_report_digest(processed, token_budget=200).split("\n")
+
+    # Cabecera, puntuaciones y Core Web Vitals se incluyen siempre
+    header = full.split("\n")[: full.split("\n").index("id\tpuntuación\tvalor\ttítulo") + 1]
+    assert lines[: len(header)] == header
+    rows = lines[len(header) : -1]
+    assert rows == full.split("\n")[len(header) : len(header) + len(rows)]
+    assert lines[-1] == f"... y {8 - len(rows)} auditorías más"
+    assert 0 < len(rows) < 8
+
+
+def test_missing_sections_are_left_out():
+    digest = build_report_digest(
+        preprocess_lighthouse_report({"requestedUrl": "https://example.com", "audits": {}})
+    )
+    assert digest == "URL: https://example.com"
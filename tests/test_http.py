@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+from backend.http import HTTPServer, Router, StreamResponse, json_response, sse_event
+
+
+async def _exchange(router: Router, raw: bytes, max_body_bytes: int = 1024) -> bytes:
+    server = HTTPServer(router, max_body_bytes=max_body_bytes)
+    await server.start(port=0)
+    try:
+        reader, writer = await asyncio.open_connection(*server.address)
+        writer.write(raw)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout=5)
+        writer.close()
+    finally:
+        await server.close()
+    return response
+
+
+def _status(response: bytes) -> int:
+    return int(response.split(b" ", 2)[1])
+
+
+def _payload(response: bytes) -> dict:
+    return json.loads(response.partition(b"\r\n\r\n")[2])
+
+
+def _request(method: str, path: str, *headers: str, body: bytes = b"") -> bytes:
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", *headers, "", ""]
+    return "\r\n".join(lines).encode() + body
+
+
+def _router() -> Router:
+    async def echo(request):
+        return json_response({"bytes": len(request.body)})
+
+    async def fail(request):
+        raise RuntimeError("secreto interno")
+
+    async def events(request):
+        async def chunks():
+            yield sse_event({"content": "hola"}, event="delta")
+            if request.query.get("fail"):
+                raise RuntimeError("secreto interno")
+            yield sse_event({}, event="done")
+
+        return StreamResponse(chunks=chunks())
+
+    router = Router()
+    router.add("GET", "/events", events)
+    router.add("POST", "/echo", echo)
+    router.add("GET", "/fail", fail)
+    return router
+
+
+def _run(raw: bytes) -> bytes:
+    return asyncio.run(_exchange(_router(), raw))
+
+
+def test_body_is_read_with_content_length():
+    response = _run(
+        _request("POST", "/echo", "Content-Length: 3", "Connection: close", body=b"abc")
+    )
+    assert _status(response) == 200
+    assert _payload(response) == {"bytes": 3}
+
+
+def test_negative_content_length_is_rejected():
+    assert _status(_run(_request("POST", "/echo", "Content-Length: -5"))) == 400
+
+
+def test_oversized_body_is_rejected():
+    assert _status(_run(_request("POST", "/echo", "Content-Length: 4096"))) == 413
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        ("Content-Length: 3", "Content-Length: 3"),
+        ("Content-Length: 3", "Content-Length: 5"),
+        ("Transfer-Encoding: chunked", "Transfer-Encoding: chunked"),
+        ("Content-Length: 3", "Transfer-Encoding: chunked"),
+        ("Transfer-Encoding: chunked", "Content-Length: 3"),
+    ],
+)
+def test_ambiguous_body_length_is_rejected(headers):
+    assert _status(_run(_request("POST", "/echo", *headers, body=b"abc"))) == 400
+
+
+def test_chunked_body_requires_content_length():
+    raw = _request("POST", "/echo", "Transfer-Encoding: chunked", body=b"3\r\nabc\r\n0\r\n\r\n")
+    assert _status(_run(raw)) == 411
+
+
+def test_rejected_request_closes_the_connection():
+    # Lo que sigue a una petición rechazada no se procesa como otra petición
+    smuggled = _request("GET", "/fail", "Connection: close")
+    raw = _request("POST", "/echo", "Content-Length: 3", "Content-Length: 3", body=b"abc")
+    response = _run(raw + smuggled)
+    assert _status(response) == 400
+    assert response.count(b"HTTP/1.1 ") == 1
+
+
+def test_internal_errors_are_not_leaked():
+    response = _run(_request("GET", "/fail", "Connection: close"))
+    assert _status(response) == 500
+    assert _payload(response) == {"error": "Error interno del servidor"}
+    assert b"secreto" not in response
+
+
+def test_stream_is_sent_chunked():
+    response = _run(_request("GET", "/events", "Connection: close"))
+    assert b"Transfer-Encoding: chunked" in response
+    assert b"event: done" in response
+    assert response.endswith(b"0\r\n\r\n")
+
+
+def test_failed_stream_is_left_incomplete():
+    # Sin el fragmento final el cliente sabe que la respuesta quedó incompleta
+    response = _run(_request("GET", "/events?fail=1", "Connection: close"))
+    assert b"event: delta" in response
+    assert not response.endswith(b"0\r\n\r\n")
@@ -0,0 +1,27 @@
+"""Equivalencia del preprocesamiento en una pasada con la implementación anterior."""
+
+import json
+
+import pytest
+from benchmarks.synthetic import edge_case_report, load_bundled_report, scale_report
+from core.model import preprocess_lighthouse_report
+from legacy_preprocess import legacy_preprocess_lighthouse_report
+
+
+def _dumps(obj: dict) -> str:
+    # Sin sort_keys: el orden de las claves también debe coincidir
+    return json.dumps(obj, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("scale", [1, 10])
+def test_bundled_report_matches_legacy(scale):
+    report = scale_report(load_bundled_report(), scale)
+    expected = _dumps(legacy_preprocess_lighthouse_report(report))
+    assert _dumps(preprocess_lighthouse_report(report)) == expected
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_edge_cases_match_legacy(seed):
+    report = edge_case_report(seed)
+    expected = _dumps(legacy_preprocess_lighthouse_report(report))
+    assert _dumps(preprocess_lighthouse_report(report)) == expected
@@ -0,0 +1,67 @@
+"""Expansión de preguntas y búsqueda BM25 de rag/index.py."""
+
+import pytest
+from benchmarks.synthetic import load_bundled_report
+from core.model import preprocess_lighthouse_report
+from rag import AuditIndex, expand_query, load_or_build_index
+
+
+@pytest.fixture(scope="module")
+def index():
+    return AuditIndex.from_report(preprocess_lighthouse_report(load_bundled_report()))
+
+
+def test_acronyms_expand_to_audit_vocabulary():
+    assert expand_query("¿Cómo mejoro el LCP?") == [
+        "mejoro",
+        "lcp",
+        "largest",
+        "contentful",
+        "paint",
+    ]
+    assert expand_query("Imágenes sin tamaño") == [
+        "imagenes",
+        "tamano",
+        "image",
+        "images",
+        "img",
+        "size",
+        "sized",
+    ]
+
+
+def test_speed_index_only_in_uppercase():
+    assert expand_query("¿Qué tal está el SI?")[-2:] == ["speed", "index"]
+    # "si" en minúsculas (o al empezar la frase) es una palabra vacía
+    assert expand_query("si mejoro el LCP") == expand_query("mejoro el LCP")
+    assert "speed" not in expand_query("Si el CLS es alto")
+
+
+@pytest.mark.parametrize(
+    "question, audit_id",
+    [
+        ("¿Cómo mejoro el LCP?", "largest-contentful-paint"),
+        ("¿Qué tal está el SI?", "speed-index"),
+        ("contraste de colores", "color-contrast"),
+    ],
+)
+def test_search_ranks_the_matching_audit_first(index, question, audit_id):
+    results = index.search(question, top_k=3)
+    assert results[0][0].id == audit_id
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_unrelated_question_finds_nothing(index):
+    assert index.search("receta de paella") == []
+    assert index.search("¿qué tal está el si?") == []
+
+
+def test_saved_index_gives_the_same_results(tmp_path, index):
+    processed = preprocess_lighthouse_report(load_bundled_report())
+    built = load_or_build_index(processed, "reporte", tmp_path)
+    loaded = load_or_build_index({}, "reporte", tmp_path)
+    question = "recursos que bloquean el renderizado"
+    expected = [(doc.id, score) for doc, score in index.search(question)]
+    assert [(doc.id, score) for doc, score in built.search(question)] == expected
+    assert [(doc.id, score) for doc, score in loaded.search(question)] == expected
@@ -0,0 +1,45 @@
+"""El reporte preprocesado desde el esqueleto coincide con el del reporte completo."""
+
+import json
+
+from benchmarks.synthetic import load_bundled_report
+from core.model import preprocess_lighthouse_report
+from core.report_io import load_preprocessed_report
+
+
+def _nested_keys_report() -> dict:
+    """Reporte con claves descartables (nodes, entities...) en niveles que se conservan."""
+    report = load_bundled_report()
+    report["environment"]["entities"] = [{"name": "example.com"}]
+    report["environment"]["nodes"] = 3
+    report["timing"]["headings"] = "no es una tabla"
+    report["entities"] = [{"name": "cdn.example.com", "origins": ["https://cdn.example.com"]}]
+    report["fullPageScreenshot"] = {"screenshot": {"data": "AAAA"}, "nodes": {"a": {}}}
+
+    audit = next(a for a in report["audits"].values() if isinstance(a.get("details"), dict))
+    audit["details"]["summary"] = {"nodes": 4, "debugData": "resumen", "wastedMs": 120}
+    audit["details"]["headings"] = [{"key": "url"}]
+    audit["details"]["debugData"] = {"type": "debugdata", "nodes": [1, 2]}
+    audit["details"]["nodes"] = {"n1": {"snippet": "<div>"}}
+    return report
+
+
+def _dumps(obj: dict) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def test_skeleton_matches_full_report():
+    report = load_bundled_report()
+    processed, _ = load_preprocessed_report(json.dumps(report).encode("utf-8"))
+    assert _dumps(processed) == _dumps(preprocess_lighthouse_report(report))
+
+
+def test_nested_dropped_keys_are_kept():
+    report = _nested_keys_report()
+    processed, _ = load_preprocessed_report(json.dumps(report).encode("utf-8"))
+    assert _dumps(processed) == _dumps(preprocess_lighthouse_report(report))
+    assert processed["environment"]["entities"] == [{"name": "example.com"}]
+    assert any(
+        audit.get("details", {}).get("summary", {}).get("nodes") == 4
+        for audit in processed["audits"].values()
+    )
@@ -0,0 +1,27 @@
+"""La caché de get_report_model no retiene los reportes."""
+
+import gc
+import json
+
+from benchmarks.synthetic import load_bundled_report
+from core import report_model
+from core.model import preprocess_lighthouse_report
+from core.report_model import PreprocessedReport, get_report_model
+
+
+def test_model_is_cached_while_report_lives():
+    processed = preprocess_lighthouse_report(load_bundled_report())
+    assert isinstance(processed, PreprocessedReport)
+    assert get_report_model(processed) is get_report_model(processed)
+    assert get_report_model(json.loads(json.dumps(processed))) is not None
+
+
+def test_released_report_leaves_the_cache():
+    processed = preprocess_lighthouse_report(load_bundled_report())
+    key = id(processed)
+    get_report_model(processed)
+    assert key in report_model._models
+
+    del processed
+    gc.collect()
+    assert key not in report_model._models
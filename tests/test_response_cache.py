@@ -0,0 +1,96 @@
+"""Caducidad, desalojo, claves y bypass de la caché de respuestas."""
+
+import core.response_cache
+import pytest
+from core.model import response_prompt_version
+from core.response_cache import ResponseCache, cacheable_question
+
+VERSION = "v1"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(core.response_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.put("¿Qué es el LCP?", 0.7, VERSION, "respuesta")
+
+    clock[0] += 60
+    assert cache.get("¿Qué es el LCP?", 0.7, VERSION) == "respuesta"
+    clock[0] += 1
+    assert cache.get("¿Qué es el LCP?", 0.7, VERSION) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("¿Qué es el LCP?", 0.7, VERSION, "lcp")
+    cache.put("¿Qué es el CLS?", 0.7, VERSION, "cls")
+    # Leer el LCP lo convierte en el usado más recientemente
+    assert cache.get("¿Qué es el LCP?", 0.7, VERSION) == "lcp"
+    cache.put("¿Qué es el INP?", 0.7, VERSION, "inp")
+
+    assert cache.get("¿Qué es el CLS?", 0.7, VERSION) is None
+    assert cache.get("¿Qué es el LCP?", 0.7, VERSION) == "lcp"
+    assert cache.get("¿Qué es el INP?", 0.7, VERSION) == "inp"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_entries_disables_the_cache():
+    cache = ResponseCache(max_entries=0)
+    cache.put("¿Qué es el LCP?", 0.7, VERSION, "lcp")
+    assert cache.get("¿Qué es el LCP?", 0.7, VERSION) is None
+
+
+def test_key_uses_normalized_question_temperature_bucket_and_prompt_version():
+    cache = ResponseCache()
+    cache.put("¿Qué es el LCP?", 0.7, VERSION, "lcp")
+
+    # Misma pregunta normalizada y mismo tramo de temperatura
+    assert cache.get("que es el lcp", 0.5, VERSION) == "lcp"
+    # Otro tramo de temperatura u otra versión del prompt
+    assert cache.get("¿Qué es el LCP?", 0.2, VERSION) is None
+    assert cache.get("¿Qué es el LCP?", 0.9, VERSION) is None
+    assert cache.get("¿Qué es el LCP?", 0.7, "v2") is None
+
+
+def test_prompt_version_follows_the_system_prompt_profile(monkeypatch):
+    monkeypatch.setenv("SYSTEM_PROMPT_PROFILE", "full")
+    full = response_prompt_version()
+    monkeypatch.setenv("SYSTEM_PROMPT_PROFILE", "compact")
+    assert response_prompt_version() != full
+
+
+@pytest.mark.parametrize(
+    "messages, has_reports",
+    [
+        # Con reportes cargados la respuesta depende de ellos
+        ([{"role": "user", "content": "¿Qué es el LCP?"}], True),
+        # Con turnos anteriores depende de la conversación
+        (
+            [
+                {"role": "user", "content": "¿Qué es el LCP?"},
+                {"role": "assistant", "content": "Largest Contentful Paint."},
+                {"role": "user", "content": "¿Y cómo lo mejoro?"},
+            ],
+            False,
+        ),
+        ([{"role": "assistant", "content": "Hola"}], False),
+        ([], False),
+    ],
+)
+def test_bypass_when_answer_depends_on_context(messages, has_reports):
+    assert cacheable_question(messages, has_reports) is None
+
+
+def test_first_question_is_cacheable():
+    messages = [
+        {"role": "assistant", "content": "¡Hola! ¿En qué puedo ayudarte?"},
+        {"role": "user", "content": "¿Qué es el LCP?"},
+    ]
+    assert cacheable_question(messages, has_reports=False) == "¿Qué es el LCP?"
@@ -0,0 +1,52 @@
+"""El clasificador local de alcance sobre el conjunto etiquetado."""
+
+import random
+
+import pytest
+from benchmarks.scope_classifier import load_examples
+from core.scope import Scope, ScopeModel, classify_scope, train_scope_model
+
+EXAMPLES = load_examples()
+# Fracción máxima de preguntas que quedan dudosas y se consultarían al modelo pequeño
+MAX_AMBIGUOUS = 0.25
+
+
+def _wrong(predictions: list[Scope]) -> list[str]:
+    """Preguntas decididas en local al revés de su etiqueta."""
+    return [
+        question
+        for (question, inside), prediction in zip(EXAMPLES, predictions)
+        if (prediction is Scope.OUT_OF_SCOPE and inside)
+        or (prediction is Scope.IN_SCOPE and not inside)
+    ]
+
+
+def _check(predictions: list[Scope]) -> None:
+    assert _wrong(predictions) == []
+    ambiguous = sum(p is Scope.AMBIGUOUS for p in predictions)
+    assert ambiguous <= MAX_AMBIGUOUS * len(EXAMPLES)
+    assert any(p is Scope.OUT_OF_SCOPE for p in predictions)
+
+
+def test_keywords_on_labeled_set():
+    _check([classify_scope(question, model=None).scope for question, _ in EXAMPLES])
+
+
+def test_linear_model_cross_validated(folds=5):
+    order = list(range(len(EXAMPLES)))
+    random.Random(0).shuffle(order)
+    predictions: list[Scope | None] = [None] * len(EXAMPLES)
+    for fold in range(folds):
+        test = set(order[fold::folds])
+        model = train_scope_model([EXAMPLES[i] for i in order if i not in test])
+        for i in test:
+            predictions[i] = classify_scope(EXAMPLES[i][0], model=model).scope
+    _check(predictions)
+
+
+def test_saved_model_predicts_the_same(tmp_path):
+    model = train_scope_model(EXAMPLES, epochs=200)
+    model.save(tmp_path / "scope_model.json")
+    loaded = ScopeModel.load(tmp_path / "scope_model.json")
+    for question, _ in EXAMPLES[:20]:
+        assert loaded.predict_proba(question) == pytest.approx(model.predict_proba(question))
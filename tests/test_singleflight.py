@@ -0,0 +1,121 @@
+"""Agrupación de peticiones idénticas simultáneas (core/singleflight.py)."""
+
+import json
+import threading
+import time
+
+import pytest
+from benchmarks.fake_groq import FakeGroqServer
+from benchmarks.synthetic import load_bundled_report
+from core.singleflight import SingleFlight
+
+SESSIONS = 6
+
+
+def _run_together(target, count: int = SESSIONS) -> list:
+    """Lanza count hilos que llaman a target a la vez y devuelve sus resultados."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(i: int) -> None:
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _slow_counter(calls: list, result=None, error: Exception | None = None):
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        if error is not None:
+            raise error
+        return result
+
+    return fn
+
+
+def test_concurrent_calls_share_one_execution(monkeypatch):
+    monkeypatch.setenv("REQUEST_COALESCING", "1")
+    flight, calls = SingleFlight("test"), []
+    results = _run_together(lambda: flight.do("clave", _slow_counter(calls, "hecho")))
+    assert len(calls) == 1
+    assert results == ["hecho"] * SESSIONS
+    assert flight.in_flight() == 0
+
+
+def test_error_reaches_every_waiter(monkeypatch):
+    monkeypatch.setenv("REQUEST_COALESCING", "1")
+    flight, calls = SingleFlight("test"), []
+    error = RuntimeError("fallo")
+    results = _run_together(lambda: flight.do("clave", _slow_counter(calls, error=error)))
+    assert len(calls) == 1
+    assert all(result is error for result in results)
+
+
+def test_disabled_runs_every_call(monkeypatch):
+    monkeypatch.setenv("REQUEST_COALESCING", "0")
+    flight, calls = SingleFlight("test"), []
+    _run_together(lambda: flight.do("clave", _slow_counter(calls, "hecho")))
+    assert len(calls) == SESSIONS
+
+
+@pytest.fixture
+def fake_groq(monkeypatch):
+    import core.cache
+    from core.clients import reset_clients
+
+    for name, value in {
+        "GROQ_API_KEY": "fake",
+        "TELEMETRY_LOG": "0",
+        "LIGHTHOUSE_CACHE_DIR": "",
+        "REPORT_INGEST_WORKERS": str(SESSIONS),
+        "SUMMARY_STRATEGY": "llm",
+        "PREFETCH_MODE": "off",
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(
+        core.cache, "_summary_cache", core.cache.SummaryCache(path=None, max_memory_entries=10_000)
+    )
+    with FakeGroqServer(latency=0.2) as server:
+        monkeypatch.setenv("GROQ_BASE_URL", server.base_url)
+        reset_clients()
+        yield server
+    reset_clients()
+
+
+def _ingest(data: bytes) -> str:
+    from core.ingestion import ReportIngestor
+    from core.report_io import load_preprocessed_report
+
+    processed, _ = load_preprocessed_report(data)
+    ingestor = ReportIngestor()
+    ingestor.submit("reporte.json", processed, preprocessed=True)
+    return ingestor.wait()["reporte.json"]
+
+
+def test_sessions_share_summary_model_calls(fake_groq, monkeypatch):
+    """Varias sesiones que suben el mismo reporte hacen las llamadas de una sola."""
+    import core.cache
+    from core.model import SUMMARY_MODEL
+
+    data = json.dumps(load_bundled_report()).encode("utf-8")
+
+    # Referencia: una sola sesión
+    monkeypatch.setenv("REQUEST_COALESCING", "1")
+    expected = _ingest(data)
+    unique_calls = fake_groq.stats()["requests_by_model"][SUMMARY_MODEL]
+
+    core.cache.get_summary_cache().clear()
+    fake_groq.reset()
+    summaries = _run_together(lambda: _ingest(data))
+    assert summaries == [expected] * SESSIONS
+    assert fake_groq.stats()["requests_by_model"][SUMMARY_MODEL] == unique_calls
@@ -0,0 +1,75 @@
+"""El almacén de sesiones: resúmenes por configuración y errores de SQLite."""
+
+import sqlite3
+
+from benchmarks.synthetic import load_bundled_report
+from core.model import preprocess_lighthouse_report, report_summary_cache_key, stored_summary_key
+from core.store import SessionStore
+
+
+def test_summary_follows_summary_settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("SUMMARY_STRATEGY", "llm")
+    store = SessionStore(tmp_path / "sessions.sqlite3")
+    processed = preprocess_lighthouse_report(load_bundled_report())
+    digest = store.put_report(processed)
+    store.add_session_report("s1", "reporte.json", digest)
+
+    assert stored_summary_key(digest) == report_summary_cache_key(processed)
+    store.put_summary(digest, stored_summary_key(digest), "Resumen del modelo")
+    assert store.restore_session("s1", stored_summary_key).summaries == {
+        "reporte.json": "Resumen del modelo"
+    }
+
+    # Otra forma del árbol o la estrategia determinista
+    # no reutilizan el resumen guardado
+    monkeypatch.setenv("SUMMARY_FAN_IN", "8")
+    assert store.get_summary(stored_summary_key(digest)) is None
+    monkeypatch.delenv("SUMMARY_FAN_IN")
+    monkeypatch.setenv("SUMMARY_STRATEGY", "digest")
+    assert store.restore_session("s1", stored_summary_key).summaries == {}
+
+    monkeypatch.setenv("SUMMARY_STRATEGY", "llm")
+    assert store.get_summary(stored_summary_key(digest)) == "Resumen del modelo"
+
+
+def test_sqlite_errors_degrade_to_memory(tmp_path, caplog):
+    store = SessionStore(tmp_path / "sessions.sqlite3")
+    processed = preprocess_lighthouse_report(load_bundled_report())
+    digest = store.put_report(processed, source_hash="archivo")
+    store.sync_messages("s1", [{"role": "user", "content": "hola"}])
+
+    # Una conexión inutilizable hace fallar cualquier operación con sqlite3.Error
+    store._db.close()
+    assert store.put_report(processed) == digest
+    store.add_session_report("s1", "reporte.json", digest)
+    store.put_summary(digest, "clave", "Resumen")
+    store.sync_messages("s1", [{"role": "user", "content": "hola"}] * 2)
+    store.remove_session_report("s1", "reporte.json")
+    assert store.find_source("archivo") is None
+    assert store.load_report(digest) is None
+    assert store.get_summary("clave") is None
+    assert store.restore_session("s1") is None
+    assert store.stats() == {"reports": 0, "stored_bytes": 0, "sessions": 0}
+    assert "almacén de sesiones" in caplog.text
+
+
+def test_locked_database_keeps_the_session_in_memory(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    SessionStore(path).sync_messages("s1", [{"role": "user", "content": "hola"}])
+    store = SessionStore(path)
+    store._db.execute("PRAGMA busy_timeout = 0")
+    messages = [{"role": "user", "content": "hola"}, {"role": "assistant", "content": "¡Hola!"}]
+
+    # Otro proceso bloquea la base de datos
+    locker = sqlite3.connect(str(path))
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        store.sync_messages("s1", messages)
+    finally:
+        locker.rollback()
+        locker.close()
+
+    # Los mensajes que no se pudieron guardar se guardan en la siguiente llamada
+    assert store.restore_session("s1").messages == messages[:1]
+    store.sync_messages("s1", messages)
+    assert store.restore_session("s1").messages == messages
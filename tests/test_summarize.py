@@ -0,0 +1,200 @@
+"""Resumen por trozos y en árbol de summarize_preprocessed_report con un Groq simulado."""
+
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import core.cache
+import core.model
+import pytest
+from benchmarks.synthetic import load_bundled_report
+from core.chunking import chunk_report
+from core.digest import build_report_digest
+from core.model import (
+    FALLBACK_SUMMARY_PREFIX,
+    _SUMMARY_SEPARATOR,
+    preprocess_lighthouse_report,
+    report_summary_cache_key,
+    summarize_preprocessed_report,
+)
+from core.prompts import FUSION_SUMMARY_PROMPT
+
+_FRAGMENT_RE = re.compile(r"^Fragmento (\d+) de \d+:")
+
+
+class StubGroq:
+    """
+    Cliente con la interfaz de Groq que usa el resumen. Cada trozo se resume como
+    "R<n>.<longitud del trozo>" y cada fusión como "(a+b+...)", así que el
+    resultado refleja el árbol.
+    """
+
+    def __init__(self, delays: dict[int, float] | None = None, fail_chunks=()):
+        self.delays = delays or {}
+        self.fail_chunks = set(fail_chunks)
+        self.chunk_calls: list[int] = []
+        self.replies: dict[int, str] = {}
+        # Trozos en el orden en que terminan
+        self.finished: list[int] = []
+        self.fusion_calls: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def with_options(self, **options):
+        return self
+
+    def _create(self, model, messages, **params):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return self._respond(messages)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _respond(self, messages):
+        content = messages[-1]["content"]
+        if messages[0]["content"] == FUSION_SUMMARY_PROMPT:
+            with self._lock:
+                self.fusion_calls.append(content)
+            text = "(" + "+".join(content.split(_SUMMARY_SEPARATOR)) + ")"
+        else:
+            number = int(_FRAGMENT_RE.match(content).group(1))
+            with self._lock:
+                self.chunk_calls.append(number)
+            time.sleep(self.delays.get(number, 0))
+            if number in self.fail_chunks:
+                raise RuntimeError(f"fallo en el trozo {number}")
+            text = f"R{number}.{len(content)}"
+            with self._lock:
+                self.replies[number] = text
+                self.finished.append(number)
+        message = SimpleNamespace(content=text)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=None
+        )
+
+
+def _expected_tree(leaves: list[str], fan_in: int) -> str:
+    """Resultado esperado si se fusiona hasta que queda un solo resumen."""
+    while len(leaves) > 1:
+        groups = [leaves[i : i + fan_in] for i in range(0, len(leaves), fan_in)]
+        leaves = [group[0] if len(group) == 1 else "(" + "+".join(group) + ")" for group in groups]
+    return leaves[0]
+
+
+@pytest.fixture
+def processed():
+    return preprocess_lighthouse_report(load_bundled_report())
+
+
+@pytest.fixture
+def summary_env(monkeypatch):
+    monkeypatch.setenv("SUMMARY_STRATEGY", "llm")
+    monkeypatch.setenv("SUMMARY_CHUNKING", "structured")
+    monkeypatch.setenv("SUMMARY_CHUNK_TOKENS", "800")
+    monkeypatch.setenv("SUMMARY_FAN_IN", "4")
+    # Con un objetivo de 1 token se fusiona siempre hasta la raíz
+    monkeypatch.setenv("SUMMARY_TARGET_TOKENS", "1")
+    monkeypatch.setenv("TELEMETRY_LOG", "0")
+    monkeypatch.setattr(
+        core.cache, "_summary_cache", core.cache.SummaryCache(path=None, max_memory_entries=10_000)
+    )
+
+    def use(client: StubGroq) -> StubGroq:
+        monkeypatch.setattr(core.model, "get_groq_client", lambda: client)
+        return client
+
+    return use
+
+
+def test_tree_reduction_levels(summary_env, processed):
+    client = summary_env(StubGroq())
+    chunks = chunk_report(processed, mode="structured", token_budget=800)
+    assert len(chunks) > 16  # al menos tres niveles de fusión con fan_in 4
+
+    summary = summarize_preprocessed_report(processed, max_concurrency=4)
+
+    leaves = [client.replies[n] for n in range(1, len(chunks) + 1)]
+    assert summary == _expected_tree(leaves, 4)
+    assert sorted(client.chunk_calls) == list(range(1, len(chunks) + 1))
+    groups, width = 0, len(chunks)
+    while width > 1:
+        width = -(-width // 4)
+        groups += width
+    assert len(client.fusion_calls) == groups
+
+
+def test_nodes_are_reused_from_the_cache(summary_env, processed, monkeypatch):
+    first = summary_env(StubGroq())
+    chunks = chunk_report(processed, mode="structured", token_budget=800)
+    summarize_preprocessed_report(processed, max_concurrency=4)
+    leaves = [first.replies[n] for n in range(1, len(chunks) + 1)]
+
+    # Otra forma del árbol: los trozos ya resumidos salen de la caché
+    monkeypatch.setenv("SUMMARY_FAN_IN", "3")
+    client = summary_env(StubGroq())
+    summary = summarize_preprocessed_report(processed, max_concurrency=4)
+    assert client.chunk_calls == []
+    assert summary == _expected_tree(leaves, 3)
+
+    # Si cambia una auditoría, solo se recalculan su trozo y las fusiones de su camino
+    changed = preprocess_lighthouse_report(load_bundled_report())
+    audit_id = next(iter(changed["audits"]))
+    changed["audits"][audit_id]["title"] += " (modificada)"
+    client = summary_env(StubGroq())
+    summarize_preprocessed_report(changed, max_concurrency=4)
+    assert len(client.chunk_calls) == 1
+    depth, width = 0, len(chunks)
+    while width > 1:
+        width = -(-width // 3)
+        depth += 1
+    assert len(client.fusion_calls) == depth
+
+
+def test_fallback_summary_is_not_cached(summary_env, processed):
+    failing = summary_env(StubGroq(fail_chunks={2}))
+    summary = summarize_preprocessed_report(processed, max_concurrency=4)
+    assert summary.startswith(FALLBACK_SUMMARY_PREFIX)
+    assert "fallo en el trozo 2" in summary
+    assert core.cache.get_summary_cache().get(report_summary_cache_key(processed)) is None
+
+    # Al reintentar se vuelve a pedir el trozo que falló, pero no los ya resumidos
+    client = summary_env(StubGroq())
+    summary = summarize_preprocessed_report(processed, max_concurrency=4)
+    assert not summary.startswith(FALLBACK_SUMMARY_PREFIX)
+    assert 2 in client.chunk_calls
+    assert not set(client.chunk_calls) & set(failing.replies)
+    assert core.cache.get_summary_cache().get(report_summary_cache_key(processed)) == summary
+
+
+def test_uneven_chunks_keep_input_order(summary_env, processed, monkeypatch):
+    # Sin fusiones: los resúmenes de los trozos se concatenan
+    monkeypatch.setenv("SUMMARY_TARGET_TOKENS", "100000")
+    chunks = chunk_report(processed, mode="structured", token_budget=800)
+    # Los primeros trozos tardan más, así que terminan después que los siguientes
+    delays = {n: 0.02 * (4 - n) for n in range(1, 4)}
+    client = summary_env(StubGroq(delays=delays))
+
+    summary = summarize_preprocessed_report(processed, max_concurrency=4)
+
+    assert client.max_in_flight == 4
+    assert client.finished != sorted(client.finished)
+    replies = [client.replies[n] for n in range(1, len(chunks) + 1)]
+    assert summary == _SUMMARY_SEPARATOR.join(replies)
+
+
+def test_one_failing_chunk_falls_back_to_the_digest(summary_env, processed, monkeypatch):
+    monkeypatch.setenv("SUMMARY_TARGET_TOKENS", "100000")
+    delays = {n: 0.02 * (4 - n) for n in range(1, 4)}
+    summary_env(StubGroq(delays=delays, fail_chunks={5}))
+
+    summary = summarize_preprocessed_report(processed, max_concurrency=4)
+
+    assert summary.startswith(FALLBACK_SUMMARY_PREFIX)
+    assert "fallo en el trozo 5" in summary
+    assert summary.endswith(build_report_digest(processed))
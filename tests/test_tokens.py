@@ -0,0 +1,48 @@
+"""Selección del contador de tokens de core/tokens.py."""
+
+import logging
+import sys
+import types
+
+import pytest
+from core import tokens
+
+
+@pytest.fixture(autouse=True)
+def fresh_counter(monkeypatch):
+    monkeypatch.delenv("LIGHTHOUSE_TOKENIZER", raising=False)
+    tokens._select_counter.cache_clear()
+    yield
+    tokens._select_counter.cache_clear()
+
+
+def _without_libraries(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    monkeypatch.setitem(sys.modules, "tokenizers", None)
+
+
+def test_default_install_uses_the_approximation(monkeypatch):
+    _without_libraries(monkeypatch)
+    text = "El LCP de la página es 4,2 s; revisa `render-blocking-resources`."
+    assert tokens.counter_name() == "approximate"
+    assert tokens.count_tokens(text) == tokens._approximate_tokens(text)
+
+
+def test_unusable_tokenizer_file_falls_back_with_a_warning(monkeypatch, tmp_path, caplog):
+    _without_libraries(monkeypatch)
+    monkeypatch.setenv("LIGHTHOUSE_TOKENIZER", str(tmp_path / "tokenizer.json"))
+    with caplog.at_level(logging.WARNING, logger="lighthouse_assistant.tokens"):
+        assert tokens.counter_name() == "approximate"
+    assert "LIGHTHOUSE_TOKENIZER" in caplog.text
+
+
+def test_tiktoken_is_preferred_when_installed(monkeypatch):
+    class Encoding:
+        def encode(self, text, disallowed_special=()):
+            return text.split()
+
+    fake = types.ModuleType("tiktoken")
+    fake.get_encoding = lambda name: Encoding()
+    monkeypatch.setitem(sys.modules, "tiktoken", fake)
+    assert tokens.counter_name() == "tiktoken"
+    assert tokens.count_tokens("uno dos tres") == 3
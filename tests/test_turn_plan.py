@@ -0,0 +1,83 @@
+"""get_model_response, ResponseStream y AsyncResponseStream deciden igual el turno."""
+
+import asyncio
+
+import core.response_cache
+import pytest
+from benchmarks.fake_groq import FakeGroqServer
+from core.clients import reset_clients
+from core.model import AsyncResponseStream, ResponseStream, get_model_response
+from core.prompts import OUT_OF_SCOPE_REPLY
+from core.response_cache import ResponseCache
+
+
+def _sync_stream(messages: list[dict]) -> tuple[str, bool]:
+    stream = ResponseStream(messages)
+    text = "".join(stream)
+    assert stream.error is None
+    return text, stream.cached
+
+
+def _async_stream(messages: list[dict]) -> tuple[str, bool]:
+    async def collect():
+        stream = AsyncResponseStream(messages)
+        parts = [part async for part in stream]
+        assert stream.error is None
+        return "".join(parts), stream.cached
+
+    return asyncio.run(collect())
+
+
+def _blocking(messages: list[dict]) -> tuple[str, bool]:
+    return get_model_response(messages), None
+
+
+ENTRY_POINTS = [_blocking, _sync_stream, _async_stream]
+
+
+@pytest.fixture
+def groq(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "fake")
+    monkeypatch.setenv("MODEL_ROUTING", "off")
+    monkeypatch.setenv("SCOPE_CLASSIFIER", "local")
+    monkeypatch.setenv("TELEMETRY_LOG", "0")
+    monkeypatch.setattr(core.response_cache, "_response_cache", ResponseCache())
+    with FakeGroqServer() as server:
+        monkeypatch.setenv("GROQ_BASE_URL", server.base_url)
+        reset_clients()
+        yield server
+    reset_clients()
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def test_out_of_scope_skips_the_model(groq, entry_point):
+    text, _ = entry_point([{"role": "user", "content": "Escríbeme una receta de paella"}])
+    assert text == OUT_OF_SCOPE_REPLY
+    assert groq.requests == 0
+
+
+def test_cached_answer_is_shared(groq):
+    messages = [{"role": "user", "content": "¿Qué es el LCP?"}]
+    first = get_model_response(messages)
+    assert groq.requests == 1
+
+    for entry_point in ENTRY_POINTS:
+        text, cached = entry_point(messages)
+        assert text == first
+        assert cached in (None, True)
+    assert groq.requests == 1
+    assert core.response_cache.get_response_cache().stats()["hits"] == len(ENTRY_POINTS)
+
+
+def test_follow_up_bypasses_the_cache(groq):
+    messages = [
+        {"role": "user", "content": "¿Qué es el LCP?"},
+        {"role": "assistant", "content": "Es el Largest Contentful Paint."},
+        {"role": "user", "content": "¿Y cómo lo mejoro?"},
+    ]
+    for entry_point in ENTRY_POINTS:
+        text, cached = entry_point(messages)
+        assert text and not cached
+    assert groq.requests == len(ENTRY_POINTS)
+    stats = core.response_cache.get_response_cache().stats()
+    assert (stats["bypasses"], stats["entries"]) == (len(ENTRY_POINTS), 0)